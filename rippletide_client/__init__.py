@@ -2,6 +2,33 @@
 Rippletide SDK for interacting with the Rippletide evaluation API.
 """
 from .client import RippletideClient
+from .cache import EvaluationCache, PromptCache
+from .concurrency import AdaptiveConcurrencyLimiter
+from .conversations import AsyncConversationPool, ChatTurn, ConversationPool, ConversationStats
+from .ingest import IngestManifest, IngestResult
+from .instrumentation import HistogramCollector, InstrumentationHook, RequestInfo
+from .journal import RunJournal
+from .knowledge import KnowledgeProvisioner, sync_knowledge
+from .models import Agent, ChatReply, EvaluationReport, Fact, TestPrompt
+from .multipart import MultipartEncoder
+from .preprocess import PreprocessedPDF, preprocess_pdf
+from .rate_limit import RateLimiter
+from .results import EvaluationResultSet
+from .retry import RetryPolicy
 
-__all__ = ['RippletideClient']
+__all__ = ['RippletideClient', 'AsyncRippletideClient', 'RetryPolicy', 'RateLimiter',
+           'AdaptiveConcurrencyLimiter', 'EvaluationCache', 'PromptCache',
+           'Agent', 'ChatReply', 'EvaluationReport', 'Fact', 'TestPrompt', 'EvaluationResultSet',
+           'RunJournal', 'KnowledgeProvisioner', 'sync_knowledge',
+           'InstrumentationHook', 'RequestInfo', 'HistogramCollector', 'MultipartEncoder',
+           'IngestManifest', 'IngestResult', 'PreprocessedPDF', 'preprocess_pdf',
+           'ConversationPool', 'AsyncConversationPool', 'ChatTurn', 'ConversationStats']
 
+
+
+def __getattr__(name):
+    # The async client is imported on first use so that sync-only users do not load aiohttp
+    if name == 'AsyncRippletideClient':
+        from .async_client import AsyncRippletideClient
+        return AsyncRippletideClient
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,184 @@
+"""
+Transport-independent parts of the sync and async clients: session setup,
+request planning, retry decisions and result building.
+
+Both clients build their requests and results here and differ only in how
+they send them, so the two stay in step.
+"""
+import os
+import random
+import uuid
+from copy import deepcopy
+from typing import Any, Dict, List, Mapping, NamedTuple, Optional, Type, Union
+
+from .cache import PromptCacheEntry
+from .models import Model, TestPrompt
+from .rate_limit import RateLimiter
+from .retry import RetryPolicy
+
+# Default base URL (override via constructor or RIPPLETIDE_BASE_URL)
+BASE_URL = "https://rippletide-backend.azurewebsites.net"
+
+
+class ApiRequest(NamedTuple):
+    """
+    One planned call to the evaluation API.
+
+    Attributes:
+        method: HTTP method
+        endpoint: Path of the request, e.g. '/api/agents/abc/evaluate'
+        route: Endpoint template used for per-endpoint rate limits
+        json: JSON body, if any
+        headers: Extra request headers, if any
+    """
+    method: str
+    endpoint: str
+    route: str
+    json: Optional[Any] = None
+    headers: Optional[Dict[str, str]] = None
+
+    @property
+    def kwargs(self) -> Dict[str, Any]:
+        """Keyword arguments for the client's ``send``/``request``."""
+        kwargs: Dict[str, Any] = {}
+        if self.json is not None:
+            kwargs['json'] = self.json
+        if self.headers:
+            kwargs['headers'] = self.headers
+        return kwargs
+
+
+def resolve_base_url(base_url: Optional[str] = None, default: str = BASE_URL) -> str:
+    """The base URL to use: ``base_url``, else $RIPPLETIDE_BASE_URL, else ``default``."""
+    # Allow overriding base URL for staging/local via argument or env
+    return (base_url or os.getenv("RIPPLETIDE_BASE_URL") or default).rstrip('/')
+
+
+def resolve_session_id(api_key: Optional[str], session_id: Optional[str]) -> Optional[str]:
+    """The session ID to use, generating one for anonymous clients that have none."""
+    if not api_key and not session_id:
+        return str(uuid.uuid4())
+    return session_id
+
+
+def session_headers(api_key: Optional[str], session_id: Optional[str]) -> Dict[str, str]:
+    """Authentication headers sent with every request."""
+    headers = {}
+    if api_key:
+        headers['x-api-key'] = api_key
+    if session_id:
+        headers['X-Session-Id'] = session_id
+    return headers
+
+
+def create_agent_request(
+    name: str,
+    anonymous: bool,
+    seed: Optional[int] = None,
+    num_nodes: int = 100,
+    public_url: Optional[str] = None,
+    advanced_payload: Optional[Dict[str, str]] = None,
+    parent_agent_id: Optional[str] = None
+) -> ApiRequest:
+    """Plan the request that creates an agent; see ``RippletideClient.create_agent``."""
+    if seed is None:
+        seed = random.randint(0, 1000000)
+    payload: Dict[str, Any] = {
+        'name': name,
+        'seed': seed,
+        'numNodes': num_nodes,
+        'label': 'eval'
+    }
+    if public_url is not None:
+        payload['publicUrl'] = public_url
+    if advanced_payload is not None:
+        payload['advancedPayload'] = advanced_payload
+    if parent_agent_id is not None:
+        payload['parentAgentId'] = parent_agent_id
+    endpoint = '/api/agents/anonymous' if anonymous else '/api/agents'
+    return ApiRequest('POST', endpoint, endpoint, payload)
+
+
+def agent_request(agent_id: str) -> ApiRequest:
+    """Plan the request that fetches an agent."""
+    return ApiRequest('GET', f'/api/agents/{agent_id}', '/api/agents/{agent_id}')
+
+
+def upload_pdf_request(agent_id: str) -> ApiRequest:
+    """Plan a PDF upload; the client attaches the multipart body."""
+    return ApiRequest('POST', f'/api/agents/{agent_id}/upload-pdf', '/api/agents/{agent_id}/upload-pdf')
+
+
+def prompts_request(agent_id: str, entry: Optional[PromptCacheEntry] = None) -> ApiRequest:
+    """Plan a test prompt fetch, revalidating ``entry`` with its ETag if it has one."""
+    headers = {'If-None-Match': entry.etag} if entry is not None and entry.etag else None
+    return ApiRequest(
+        'GET', f'/api/agents/{agent_id}/test-prompts', '/api/agents/{agent_id}/test-prompts', headers=headers
+    )
+
+
+def chat_request(agent_id: str, message: str, stream: bool = False) -> ApiRequest:
+    """Plan a chat message, asking for server-sent events if ``stream``."""
+    return ApiRequest(
+        'POST', f'/api/agents/{agent_id}/chat', '/api/agents/{agent_id}/chat',
+        {'message': message},
+        {'Accept': 'text/event-stream'} if stream else None
+    )
+
+
+def evaluate_request(agent_id: str, question: str, expected_answer: Optional[str] = None) -> ApiRequest:
+    """Plan an evaluation of one question."""
+    payload = {'question': question}
+    if expected_answer is not None:
+        payload['expectedAnswer'] = expected_answer
+    return ApiRequest('POST', f'/api/agents/{agent_id}/evaluate', '/api/agents/{agent_id}/evaluate', payload)
+
+
+def retry_delay(
+    policy: RetryPolicy,
+    limiter: Optional[RateLimiter],
+    method: str,
+    route: str,
+    status: int,
+    headers: Mapping[str, str],
+    retries: int
+) -> Optional[float]:
+    """
+    Decide what to do after a response with ``status``.
+
+    A 429 also throttles ``route`` on the rate limiter, so other callers
+    sharing it back off too.
+
+    Returns:
+        Seconds to wait before retrying, or None if the response is final
+    """
+    retry_after = policy.parse_retry_after(headers.get('Retry-After'))
+    if limiter is not None and status == 429:
+        limiter.throttle(route, retry_after or 0)
+    if not policy.should_retry_status(method, status, retries):
+        return None
+    return policy.get_backoff(retries, retry_after)
+
+
+def error_message(reason: str, body: str, retries: int) -> str:
+    """Message of the error raised for a failed response, with its body for debugging."""
+    message = f"{reason}\nResponse: {body}"
+    if retries:
+        message += f"\nRetries: {retries}"
+    return message
+
+
+def build_result(model: Type[Model], body: Any, raw: bool) -> Union[Model, Dict[str, Any]]:
+    """Wrap a decoded response in ``model`` unless the caller asked for ``raw`` JSON."""
+    return body if raw else model.from_dict(body)
+
+
+def prompts_result(
+    prompts: List[Dict[str, Any]],
+    raw: bool,
+    cached: bool
+) -> Union[List[TestPrompt], List[Dict[str, Any]]]:
+    """Test prompts as returned to the caller; cached prompts are copied so callers cannot mutate the cache."""
+    if not raw:
+        return TestPrompt.from_list(prompts)
+    return deepcopy(prompts) if cached else prompts
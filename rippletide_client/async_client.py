@@ -0,0 +1,770 @@
+"""
+Asyncio client for interacting with the Rippletide evaluation API.
+"""
+import time
+import asyncio
+from collections import deque
+from typing import Optional, Dict, List, Any, Callable, Deque, AsyncIterator, BinaryIO, Iterable, Tuple, Union
+from pathlib import Path
+
+try:
+    import aiohttp
+except ImportError:  # pragma: no cover - optional dependency
+    aiohttp = None
+
+from . import api
+from .batch import BatchResult, EvaluationItem, item_id, normalize_item, resume_from_journal
+from .cache import EvaluationCache, PromptCache, fingerprint
+from .codec import JSONCodec, default_codec
+from .concurrency import AdaptiveConcurrencyLimiter
+from .ingest import IngestManifest, IngestResult, PathsOrGlob, UploadClaims, file_digest, resolve_pdf_paths
+from .instrumentation import InstrumentationHook, RequestInfo, body_size
+from .journal import RunJournal
+from .models import Agent, ChatReply, EvaluationReport, TestPrompt
+from .multipart import DEFAULT_CHUNK_SIZE, MultipartEncoder, ProgressCallback
+from .preprocess import check_preprocess_mode, preprocess_pdf
+from .rate_limit import RateLimiter
+from .retry import RetryPolicy
+from .streaming import AsyncChatStream
+
+
+class AsyncRippletideClient:
+    """
+    Asyncio client for interacting with the Rippletide evaluation API.
+
+    Mirrors the surface of :class:`RippletideClient`, but every method is a
+    coroutine and all requests share one pooled ``aiohttp`` connector, so a
+    single event loop can keep many evaluations in flight at once.
+
+    Args:
+        session_id: Optional session ID for anonymous requests (will be auto-generated if not provided and no api_key)
+        api_key: Optional API key for authenticated requests
+        base_url: Optional base URL (defaults to RIPPLETIDE_BASE_URL or the hosted backend)
+        max_connections: Maximum number of pooled connections (default: 100)
+        connect_timeout: Seconds to wait for a connection to be established (default: 10)
+        read_timeout: Seconds to wait for the server between bytes of a response (default: 300)
+        keep_alive: Reuse connections between requests (default: True)
+        retry_policy: Retry policy for transient failures (default: RetryPolicy(), idempotent methods only)
+        rate_limiter: Optional RateLimiter, which may be shared with other clients, threads and tasks
+        evaluation_cache: Optional EvaluationCache that short-circuits repeated evaluate calls
+        prompt_cache: Optional PromptCache for get_test_prompts, revalidated with ETags
+        json_codec: JSON codec for request and response bodies (default: orjson or msgspec if installed, else json)
+        hooks: Instrumentation hooks told about every HTTP attempt, e.g. a HistogramCollector;
+            aiohttp does not separate the TLS handshake, so it is counted in 'connect'
+    """
+
+    BASE_URL = api.BASE_URL
+
+    def __init__(
+        self,
+        session_id: Optional[str] = None,
+        api_key: Optional[str] = None,
+        base_url: Optional[str] = None,
+        max_connections: int = 100,
+        connect_timeout: Optional[float] = 10.0,
+        read_timeout: Optional[float] = 300.0,
+        keep_alive: bool = True,
+        retry_policy: Optional[RetryPolicy] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        evaluation_cache: Optional[EvaluationCache] = None,
+        prompt_cache: Optional[PromptCache] = None,
+        json_codec: Optional[JSONCodec] = None,
+        hooks: Optional[Iterable[InstrumentationHook]] = None
+    ):
+        if aiohttp is None:
+            raise ImportError(
+                "AsyncRippletideClient requires aiohttp. Install it with `pip install aiohttp`."
+            )
+
+        self.base_url = api.resolve_base_url(base_url, self.BASE_URL)
+        self.api_key = api_key
+        self.session_id = api.resolve_session_id(api_key, session_id)
+
+        self.max_connections = max_connections
+        self.keep_alive = keep_alive
+        self.timeout = aiohttp.ClientTimeout(sock_connect=connect_timeout, sock_read=read_timeout)
+        self.retry_policy = retry_policy if retry_policy is not None else RetryPolicy()
+        self.rate_limiter = rate_limiter
+        self.evaluation_cache = evaluation_cache
+        self.prompt_cache = prompt_cache
+        self.json_codec = json_codec if json_codec is not None else default_codec()
+        self.hooks: List[InstrumentationHook] = list(hooks or ())
+        self.headers: Dict[str, str] = api.session_headers(self.api_key, self.session_id)
+
+        # The aiohttp session must be created inside a running event loop,
+        # so it is built lazily on first use.
+        self._session: Optional["aiohttp.ClientSession"] = None
+
+    async def __aenter__(self) -> "AsyncRippletideClient":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.close()
+
+    @property
+    def session(self) -> "aiohttp.ClientSession":
+        """The pooled ``aiohttp.ClientSession`` used for all requests."""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.max_connections,
+                force_close=not self.keep_alive
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                headers=self.headers,
+                timeout=self.timeout,
+                trace_configs=[_connection_trace_config()] if self.hooks else None
+            )
+        return self._session
+
+    async def close(self) -> None:
+        """Close the underlying session and release pooled connections."""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def request(
+        self,
+        method: str,
+        endpoint: str,
+        route: Optional[str] = None,
+        **kwargs
+    ) -> Any:
+        """
+        Make an HTTP request to the API and return the decoded JSON body.
+
+        Use this for endpoints the client has no method for; see :meth:`send`
+        for the arguments.
+
+        Returns:
+            The decoded body, or None if it is empty
+        """
+        _, body = await self.send(method, endpoint, route, decode=True, **kwargs)
+        return body
+
+    async def send(
+        self,
+        method: str,
+        endpoint: str,
+        route: Optional[str] = None,
+        stream: bool = False,
+        decode: bool = False,
+        **kwargs
+    ) -> Tuple["aiohttp.ClientResponse", Any]:
+        """
+        Make an HTTP request to the API, retrying transient failures.
+
+        The request goes through the client's connection pool, retry policy,
+        rate limiter and hooks.
+
+        Args:
+            method: HTTP method (GET, POST, etc.)
+            endpoint: API endpoint (e.g., '/api/agents')
+            route: Endpoint template used for per-endpoint rate limits (defaults to endpoint)
+            stream: Return a successful response unread; the caller must release
+                it and then free the rate limiter slot for `route`, which stays
+                held so open streams count toward ``max_in_flight``
+            decode: Return the decoded JSON body (None if empty) instead of the raw bytes
+            **kwargs: Additional arguments to pass to aiohttp; ``data_factory``
+                may be given instead of ``data`` to build a fresh body per attempt
+
+        Returns:
+            The released response (status and headers remain readable) and its
+            body, or the open response and an empty body when streaming
+
+        Raises:
+            aiohttp.ClientResponseError: If the request fails
+        """
+        url = f"{self.base_url}{endpoint}"
+        route = route or endpoint
+        if 'json' in kwargs:
+            kwargs['data'] = self.json_codec.dumps(kwargs.pop('json'))
+            kwargs['headers'] = {'Content-Type': 'application/json', **(kwargs.get('headers') or {})}
+        policy = self.retry_policy
+        limiter = self.rate_limiter
+        data_factory = kwargs.pop('data_factory', None)
+        retries = 0
+        held = False
+        while True:
+            if data_factory is not None:
+                kwargs['data'] = data_factory()
+            if limiter is not None:
+                await limiter.acquire_async(route)
+            info = None
+            if self.hooks:
+                info = RequestInfo(method, route, endpoint, retries, body_size(kwargs.get('data')))
+                kwargs['trace_request_ctx'] = info.timings
+                for hook in self.hooks:
+                    hook.on_request_start(info)
+            try:
+                response = await self.session.request(method, url, **kwargs)
+                if info is not None:
+                    self._headers_received(info, response)
+                if stream and response.status < 400:
+                    body = b''
+                    held = True
+                    break
+                async with response:
+                    body = await response.read()
+                delay = api.retry_delay(policy, limiter, method, route, response.status, response.headers, retries)
+                if info is not None:
+                    info.bytes_in = len(body)
+                    info.timings['transfer'] = info.elapsed() - info.timings.pop('headers')
+                if delay is None:
+                    break
+                if info is not None:
+                    self._notify_response(info, will_retry=True)
+                reason = str(response.status)
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                connect_failed = isinstance(e, aiohttp.ClientConnectorError)
+                retry = policy.should_retry_error(method, retries, connect_failed)
+                if info is not None:
+                    info.error = e
+                    info.will_retry = retry
+                    info.timings['total'] = info.elapsed()
+                    for hook in self.hooks:
+                        hook.on_error(info)
+                if not retry:
+                    e.retry_count = retries
+                    raise
+                delay = policy.get_backoff(retries)
+                reason = type(e).__name__
+            finally:
+                if limiter is not None and not held:
+                    limiter.release(route)
+            retries += 1
+            policy.notify(method, endpoint, retries, delay, reason)
+            await asyncio.sleep(delay)
+
+        if decode and response.status < 400:
+            start = time.perf_counter()
+            body = self.json_codec.loads(body) if body else None
+            if info is not None and body is not None:
+                info.timings['decode'] = time.perf_counter() - start
+        if info is not None:
+            info.timings.pop('headers', None)
+            self._notify_response(info, will_retry=False)
+
+        response.retry_count = retries
+        if response.status >= 400:
+            # Include response body in error message for debugging
+            text = body.decode(response.get_encoding() or 'utf-8', errors='replace')
+            error = aiohttp.ClientResponseError(
+                response.request_info,
+                response.history,
+                status=response.status,
+                message=api.error_message(response.reason, text, retries),
+                headers=response.headers,
+            )
+            error.retry_count = retries
+            raise error
+        return response, body
+
+    def _headers_received(self, info: RequestInfo, response: "aiohttp.ClientResponse") -> None:
+        timings = info.timings
+        timings['headers'] = info.elapsed()
+        timings['server'] = max(0.0, timings['headers'] - timings.get('dns', 0.0) - timings.get('connect', 0.0))
+        info.status = response.status
+        if info.bytes_out is None and response.request_info.headers.get('Content-Length', '').isdigit():
+            info.bytes_out = int(response.request_info.headers['Content-Length'])
+
+    def _notify_response(self, info: RequestInfo, will_retry: bool) -> None:
+        info.will_retry = will_retry
+        info.timings['total'] = info.elapsed()
+        for hook in self.hooks:
+            hook.on_response(info)
+
+    async def create_agent(
+        self,
+        name: str,
+        seed: Optional[int] = None,
+        num_nodes: int = 100,
+        public_url: Optional[str] = None,
+        advanced_payload: Optional[Dict[str, str]] = None,
+        parent_agent_id: Optional[str] = None,
+        raw: bool = False
+    ) -> Union[Agent, Dict[str, Any]]:
+        """
+        Create a new agent for evaluation.
+
+        Args:
+            name: Name of the agent
+            seed: Seed value for the agent (default: random)
+            num_nodes: Number of nodes for the agent (default: 100)
+            public_url: Optional public URL for the agent
+            advanced_payload: Optional advanced payload configuration
+            parent_agent_id: Optional parent agent ID
+            raw: Return the decoded JSON dict instead of an Agent
+
+        Returns:
+            Agent (or dict if raw) containing the created agent data
+        """
+        call = api.create_agent_request(
+            name, bool(self.session_id and not self.api_key),
+            seed, num_nodes, public_url, advanced_payload, parent_agent_id
+        )
+        agent = await self.request(call.method, call.endpoint, call.route, **call.kwargs)
+        return api.build_result(Agent, agent, raw)
+
+    async def extract_questions_from_pdf(
+        self,
+        agent_id: str,
+        pdf_path: Union[str, Path, BinaryIO],
+        progress: Optional[ProgressCallback] = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        use_mmap: bool = True,
+        preprocess: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Extract questions and expected answers from a PDF file.
+
+        The upload is streamed in ``chunk_size`` pieces read off the event loop,
+        so memory use does not grow with the size of the PDF. File-like objects
+        must be seekable to be streamed; others are sent as a regular form.
+
+        Args:
+            agent_id: ID of the agent
+            pdf_path: Path to the PDF file or file-like object
+            progress: Optional callback called with (bytes sent, total bytes) as the upload
+                proceeds; it runs on an executor thread
+            chunk_size: Bytes read and sent at a time (default: 256 KiB)
+            use_mmap: Memory-map the PDF instead of reading it, where possible (default: True)
+            preprocess: Shrink the PDF locally, in the default executor, before
+                uploading it: 'strip' removes images and embedded fonts, 'text'
+                uploads only its text (see ``preprocess_pdf``; requires pypdf).
+                The original is uploaded if the copy is not smaller.
+
+        Returns:
+            Dictionary containing extraction results and Q&A pairs. With
+            ``preprocess``, its 'preprocessing' entry reports the mode, page
+            count, original and processed sizes, bytes saved, and whether the
+            processed copy was uploaded ('used')
+        """
+        # Handle both file path and file-like object
+        filename = Path(pdf_path).name if isinstance(pdf_path, (str, Path)) else 'document.pdf'
+        if preprocess is None:
+            return await self._upload_pdf(agent_id, pdf_path, filename, progress, chunk_size, use_mmap)
+        start = None if isinstance(pdf_path, (str, Path)) else pdf_path.tell()
+        copy = await asyncio.to_thread(preprocess_pdf, pdf_path, preprocess, name=filename)
+        with copy:
+            used = copy.saved > 0
+            if used:
+                result = await self._upload_pdf(agent_id, copy.file, filename, progress, chunk_size, use_mmap)
+        if not used:
+            if start is not None:
+                pdf_path.seek(start)
+            result = await self._upload_pdf(agent_id, pdf_path, filename, progress, chunk_size, use_mmap)
+        if isinstance(result, dict):
+            result['preprocessing'] = {**copy.to_dict(), 'used': used}
+        return result
+
+    async def _upload_pdf(
+        self,
+        agent_id: str,
+        source: Union[str, Path, BinaryIO],
+        filename: str,
+        progress: Optional[ProgressCallback] = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        use_mmap: bool = True
+    ) -> Dict[str, Any]:
+        call = api.upload_pdf_request(agent_id)
+        try:
+            encoder = MultipartEncoder(
+                [('file', (filename, source, 'application/pdf'))],
+                chunk_size=chunk_size, progress=progress, use_mmap=use_mmap
+            )
+        except ValueError:
+            def build_form() -> "aiohttp.FormData":
+                form = aiohttp.FormData()
+                form.add_field('file', source, filename=filename, content_type='application/pdf')
+                return form
+            return await self.request(call.method, call.endpoint, call.route, data_factory=build_form)
+
+        def stream_body() -> AsyncIterator[bytes]:
+            # An async generator can only be sent once, so start a new one per attempt
+            encoder.seek(0)
+            return encoder.aiter()
+
+        headers = {'Content-Type': encoder.content_type, 'Content-Length': str(encoder.len)}
+        with encoder:
+            return await self.request(call.method, call.endpoint, call.route, data_factory=stream_body, headers=headers)
+
+    def ingest_pdfs(
+        self,
+        agent_id: str,
+        paths_or_glob: PathsOrGlob,
+        max_concurrency: int = 4,
+        manifest: Optional[Union[IngestManifest, str, Path]] = None,
+        force: bool = False,
+        progress: Optional[Callable[[Path, int, int], None]] = None,
+        preprocess: Optional[str] = None
+    ) -> AsyncIterator[IngestResult]:
+        """
+        Upload many PDFs to an agent concurrently, skipping ones it already has.
+
+        Files are hashed in worker threads and looked up in the
+        manifest; files the agent has already ingested are yielded as skipped.
+        A second copy of a file within the run waits for the first: it is
+        skipped with that upload's result, or uploaded in its place if that
+        upload fails. The rest are streamed up and recorded in the manifest once they succeed. Results are yielded as
+        they complete; a failing file does not stop the others.
+
+        Args:
+            agent_id: ID of the agent
+            paths_or_glob: A file, directory (its ``*.pdf`` files) or glob pattern,
+                or an iterable of them
+            max_concurrency: Maximum number of files hashed or uploaded at once (default: 4)
+            manifest: IngestManifest, or the path of one (default: ``default_manifest_path()``)
+            force: Upload files even if the manifest says the agent has them
+            progress: Optional callback called with (path, bytes sent, total bytes)
+                during uploads; it runs on an executor thread
+            preprocess: Shrink each PDF locally before uploading it, 'strip' or 'text'
+                (see ``extract_questions_from_pdf``); ``IngestResult.saved`` reports
+                the bytes saved per file
+
+        Yields:
+            IngestResult for each file, in completion order
+
+        Raises:
+            FileNotFoundError: If a listed path that is not a pattern does not exist
+            ValueError: If max_concurrency is less than 1 or preprocess is not a known mode
+        """
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+        if preprocess is not None:
+            check_preprocess_mode(preprocess)
+        return self._ingest_pdfs(agent_id, paths_or_glob, max_concurrency, manifest, force, progress, preprocess)
+
+    async def _ingest_pdfs(
+        self,
+        agent_id: str,
+        paths_or_glob: PathsOrGlob,
+        max_concurrency: int,
+        manifest: Optional[Union[IngestManifest, str, Path]],
+        force: bool,
+        progress: Optional[Callable[[Path, int, int], None]],
+        preprocess: Optional[str]
+    ) -> AsyncIterator[IngestResult]:
+        # Globbing, hashing and manifest reads and writes run in worker threads
+        files = await asyncio.to_thread(resolve_pdf_paths, paths_or_glob)
+        owned = not isinstance(manifest, IngestManifest)
+        record = await asyncio.to_thread(IngestManifest, manifest) if owned else manifest
+        claims = UploadClaims(asyncio.Event)
+        loop = asyncio.get_running_loop()
+
+        async def run(index: int, path: Path) -> IngestResult:
+            start = loop.time()
+            digest = size = None
+            try:
+                size = (await asyncio.to_thread(path.stat)).st_size
+                digest = await asyncio.to_thread(file_digest, path)
+                entry = None if force else record.get(agent_id, digest)
+                if entry is not None:
+                    return IngestResult(index, path, digest, entry.result, skipped=True,
+                                        latency=loop.time() - start, size=size)
+                # Wait while another copy of this file is being uploaded
+                waiter = claims.claim(digest, index)
+                while waiter is not None:
+                    await waiter.wait()
+                    done, result = claims.uploaded(digest)
+                    if done:
+                        return IngestResult(index, path, digest, result, skipped=True,
+                                            latency=loop.time() - start, size=size)
+                    waiter = claims.claim(digest, index)
+                report = (lambda sent, total: progress(path, sent, total)) if progress is not None else None
+                uploaded = size
+                try:
+                    copy = None
+                    if preprocess is not None:
+                        copy = await asyncio.to_thread(preprocess_pdf, path, preprocess)
+                    try:
+                        if copy is not None and copy.saved > 0:
+                            uploaded = copy.size
+                            result = await self._upload_pdf(agent_id, copy.file, path.name, report)
+                        else:
+                            result = await self._upload_pdf(agent_id, path, path.name, report)
+                    finally:
+                        if copy is not None:
+                            copy.close()
+                    await asyncio.to_thread(record.record, agent_id, digest, path, size, result)
+                except BaseException:
+                    claims.release(digest, index)
+                    raise
+                claims.settle(digest, index, result)
+            except Exception as e:
+                return IngestResult(index, path, digest, error=e, latency=loop.time() - start, size=size)
+            return IngestResult(index, path, digest, result, latency=loop.time() - start,
+                                size=size, uploaded_size=uploaded)
+
+        source = iter(enumerate(files))
+        pending = set()
+
+        def fill() -> None:
+            while len(pending) < max_concurrency:
+                for index, path in source:
+                    pending.add(asyncio.ensure_future(run(index, path)))
+                    break
+                else:
+                    return
+
+        try:
+            fill()
+            while pending:
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    pending.discard(task)
+                    yield task.result()
+                fill()
+        finally:
+            # Cancel outstanding uploads if the consumer stops iterating early
+            for task in pending:
+                task.cancel()
+            if owned:
+                record.close()
+
+    async def get_test_prompts(
+        self,
+        agent_id: str,
+        raw: bool = False
+    ) -> Union[List[TestPrompt], List[Dict[str, Any]]]:
+        """
+        Get all test prompts (questions and expected answers) for an agent.
+
+        Args:
+            agent_id: ID of the agent
+            raw: Return decoded JSON dicts instead of TestPrompt objects
+
+        Returns:
+            List of test prompts with question and expected answer
+        """
+        cache = self.prompt_cache
+        entry = cache.get(agent_id) if cache is not None else None
+        if entry is not None and entry.fresh:
+            prompts = entry.prompts
+        else:
+            call = api.prompts_request(agent_id, entry)
+            response, body = await self.send(call.method, call.endpoint, call.route, **call.kwargs)
+            if response.status == 304 and entry is not None:
+                cache.touch(agent_id)
+                prompts = entry.prompts
+            else:
+                prompts = self.json_codec.loads(body)
+                if cache is not None:
+                    cache.set(agent_id, prompts, response.headers.get('ETag'))
+        return api.prompts_result(prompts, raw, cached=cache is not None)
+
+    async def chat(
+        self,
+        agent_id: str,
+        message: str,
+        raw: bool = False
+    ) -> Union[ChatReply, Dict[str, Any]]:
+        """
+        Send a chat message to an agent and get a response.
+
+        Args:
+            agent_id: ID of the agent
+            message: Message to send to the agent
+            raw: Return the decoded JSON dict instead of a ChatReply
+
+        Returns:
+            ChatReply (or dict if raw) containing agent response, session ID, etc.
+        """
+        call = api.chat_request(agent_id, message)
+        reply = await self.request(call.method, call.endpoint, call.route, **call.kwargs)
+        return api.build_result(ChatReply, reply, raw)
+
+    def chat_stream(
+        self,
+        agent_id: str,
+        message: str
+    ) -> AsyncChatStream:
+        """
+        Send a chat message and stream the agent's answer as it is generated.
+
+        The request is sent when iteration starts. Use ``async with`` or call
+        ``aclose()`` to cancel mid-stream and free the connection.
+
+        Args:
+            agent_id: ID of the agent
+            message: Message to send to the agent
+
+        Returns:
+            AsyncChatStream yielding incremental text chunks
+        """
+        call = api.chat_request(agent_id, message, stream=True)
+
+        async def open_response() -> "aiohttp.ClientResponse":
+            response, _ = await self.send(call.method, call.endpoint, call.route, stream=True, **call.kwargs)
+            return response
+
+        limiter = self.rate_limiter
+        on_close = (lambda: limiter.release(call.route)) if limiter is not None else None
+        return AsyncChatStream(open_response, on_close)
+
+    async def evaluate(
+        self,
+        agent_id: str,
+        question: str,
+        expected_answer: Optional[str] = None,
+        agent_version: Optional[str] = None,
+        raw: bool = False
+    ) -> Union[EvaluationReport, Dict[str, Any]]:
+        """
+        Simple evaluation endpoint - evaluates a question and returns a report.
+
+        Args:
+            agent_id: ID of the agent
+            question: The question to evaluate
+            expected_answer: Optional expected answer (will use knowledge base if not provided)
+            agent_version: Optional agent version for the evaluation cache; when omitted
+                and a cache is configured, a fingerprint of the agent is fetched instead
+            raw: Return the decoded JSON dict instead of an EvaluationReport
+
+        Returns:
+            EvaluationReport (or dict if raw) with label, justification, and facts
+        """
+        cache = self.evaluation_cache
+        if cache is not None:
+            if agent_version is None:
+                agent_version = await self._agent_fingerprint(agent_id)
+            key = cache.make_key(agent_id, question, expected_answer, agent_version)
+            # SQLite lookups and writes run off the event loop
+            cached = await asyncio.to_thread(cache.get, key)
+            if cached is not None:
+                return api.build_result(EvaluationReport, cached, raw)
+
+        call = api.evaluate_request(agent_id, question, expected_answer)
+        result = await self.request(call.method, call.endpoint, call.route, **call.kwargs)
+        if cache is not None:
+            await asyncio.to_thread(cache.set, key, result)
+        return api.build_result(EvaluationReport, result, raw)
+
+    async def _agent_fingerprint(self, agent_id: str) -> str:
+        """Version fingerprint of an agent's current configuration, memoised by the cache."""
+        cache = self.evaluation_cache
+        version = cache.get_fingerprint(agent_id)
+        if version is None:
+            call = api.agent_request(agent_id)
+            version = fingerprint(await self.request(call.method, call.endpoint, call.route))
+            cache.set_fingerprint(agent_id, version)
+        return version
+
+    def evaluate_many(
+        self,
+        agent_id: str,
+        items: Iterable[EvaluationItem],
+        max_concurrency: int = 10,
+        concurrency_limiter: Optional[AdaptiveConcurrencyLimiter] = None,
+        raw: bool = False,
+        journal: Optional[RunJournal] = None
+    ) -> AsyncIterator[BatchResult]:
+        """
+        Evaluate many questions concurrently with at most max_concurrency in flight.
+
+        Results are yielded as they complete; failures are reported through
+        ``BatchResult.error`` without cancelling the remaining items.
+
+        Args:
+            agent_id: ID of the agent
+            items: Questions, (question, expected_answer) pairs, or test prompt dicts
+            max_concurrency: Maximum number of evaluations in flight (default: 10)
+            concurrency_limiter: Optional adaptive limiter that replaces the fixed
+                max_concurrency and is fed the latency and outcome of each call
+            raw: Yield decoded JSON dicts instead of EvaluationReport objects
+            journal: Optional RunJournal; items it already holds are yielded from
+                it without calling the API, and each success is recorded to it
+
+        Yields:
+            BatchResult for each item, in completion order
+
+        Raises:
+            ValueError: If max_concurrency is less than 1
+        """
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+        return self._evaluate_many(agent_id, items, max_concurrency, concurrency_limiter, raw, journal)
+
+    async def _evaluate_many(
+        self,
+        agent_id: str,
+        items: Iterable[EvaluationItem],
+        max_concurrency: int,
+        concurrency_limiter: Optional[AdaptiveConcurrencyLimiter],
+        raw: bool,
+        journal: Optional[RunJournal]
+    ) -> AsyncIterator[BatchResult]:
+        limiter = concurrency_limiter
+        loop = asyncio.get_running_loop()
+
+        async def run(index: int, item: EvaluationItem) -> BatchResult:
+            start = loop.time()
+            try:
+                question, expected_answer = normalize_item(item)
+                result = await self.evaluate(agent_id, question, expected_answer, raw=raw)
+            except Exception as e:
+                return BatchResult(index, item, error=e, latency=loop.time() - start)
+            return BatchResult(index, item, result=result, latency=loop.time() - start)
+
+        resumed: Deque[BatchResult] = deque()
+        source = resume_from_journal(agent_id, items, journal, raw, resumed)
+        pending = set()
+
+        def fill() -> None:
+            limit = limiter.limit if limiter is not None else max_concurrency
+            while len(pending) < limit:
+                for index, item in source:
+                    pending.add(asyncio.ensure_future(run(index, item)))
+                    break
+                else:
+                    return
+
+        try:
+            fill()
+            while pending or resumed:
+                while resumed:
+                    yield resumed.popleft()
+                if not pending:
+                    break
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    pending.discard(task)
+                    outcome = task.result()
+                    if limiter is not None:
+                        limiter.record(outcome.latency, outcome.error)
+                    if journal is not None and outcome.ok:
+                        await asyncio.to_thread(
+                            journal.record, agent_id, item_id(outcome.item), outcome.result, outcome.latency
+                        )
+                    yield outcome
+                fill()
+        finally:
+            # Cancel outstanding work if the consumer stops iterating early
+            for task in pending:
+                task.cancel()
+
+
+def _connection_trace_config() -> "aiohttp.TraceConfig":
+    """Trace config recording DNS and connect time into the timings dict passed as ``trace_request_ctx``."""
+    config = aiohttp.TraceConfig()
+
+    async def connection_create_start(session, context, params) -> None:
+        context.connect_started = time.perf_counter()
+
+    async def dns_resolve_start(session, context, params) -> None:
+        context.dns_started = time.perf_counter()
+
+    async def dns_resolve_end(session, context, params) -> None:
+        if context.trace_request_ctx is not None:
+            context.trace_request_ctx['dns'] = time.perf_counter() - context.dns_started
+
+    async def connection_create_end(session, context, params) -> None:
+        timings = context.trace_request_ctx
+        if timings is not None:
+            timings['connect'] = time.perf_counter() - context.connect_started - timings.get('dns', 0.0)
+
+    config.on_connection_create_start.append(connection_create_start)
+    config.on_dns_resolvehost_start.append(dns_resolve_start)
+    config.on_dns_resolvehost_end.append(dns_resolve_end)
+    config.on_connection_create_end.append(connection_create_end)
+    return config
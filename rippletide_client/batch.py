@@ -0,0 +1,115 @@
+"""
+Helpers for fanning evaluations out over a bounded pool of workers.
+"""
+from typing import Any, Deque, Dict, Iterable, Iterator, Mapping, NamedTuple, Optional, Sequence, Tuple, Union
+
+from .cache import fingerprint
+from .journal import RunJournal
+from .models import EvaluationReport, Model
+
+# An evaluation item is either a bare question, a (question, expected_answer)
+# pair, or a mapping such as a test prompt ({'prompt', 'expectedAnswer'}) or a
+# qanda.json entry ({'question', 'answer'}).
+EvaluationItem = Union[str, Sequence[Optional[str]], Mapping[str, Any]]
+
+
+class BatchResult(NamedTuple):
+    """
+    Outcome of a single item in a batch evaluation.
+
+    Attributes:
+        index: Position of the item in the input iterable
+        item: The original input item
+        result: Evaluation report, or None if the call failed
+        error: Exception raised by the call, or None on success
+        latency: Wall-clock duration of the call in seconds
+    """
+    index: int
+    item: Any
+    result: Optional[Union[Model, Dict[str, Any]]] = None
+    error: Optional[BaseException] = None
+    latency: Optional[float] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def normalize_item(item: EvaluationItem) -> Tuple[str, Optional[str]]:
+    """
+    Turn an evaluation item into a ``(question, expected_answer)`` pair.
+
+    Args:
+        item: Question string, (question, expected_answer) pair, mapping, or
+            TestPrompt
+
+    Returns:
+        Tuple of question and optional expected answer
+
+    Raises:
+        ValueError: If no question can be found in the item
+    """
+    if isinstance(item, str):
+        return item, None
+    if isinstance(item, (Mapping, Model)):
+        question = item.get('question', item.get('prompt'))
+        if question is None:
+            raise ValueError(f"Evaluation item has no 'question' or 'prompt': {item!r}")
+        expected = item.get('expected_answer', item.get('expectedAnswer', item.get('answer')))
+        return question, expected
+    question, expected = item
+    return question, expected
+
+
+def item_id(item: EvaluationItem) -> str:
+    """
+    Stable identifier of an evaluation item, used to journal and resume runs.
+
+    Args:
+        item: Question string, (question, expected_answer) pair, mapping, or
+            TestPrompt
+
+    Returns:
+        The item's ``id`` if it has one, else a hash of its question and
+        expected answer
+    """
+    if isinstance(item, (Mapping, Model)):
+        value = item.get('id')
+        if value is not None:
+            return str(value)
+    return fingerprint(list(normalize_item(item)))
+
+
+def resume_from_journal(
+    agent_id: str,
+    items: Iterable[EvaluationItem],
+    journal: Optional[RunJournal],
+    raw: bool,
+    resumed: Deque[BatchResult]
+) -> Iterator[Tuple[int, EvaluationItem]]:
+    """
+    Split a batch into journaled and unfinished items, lazily.
+
+    Items ``journal`` already holds are appended to ``resumed`` as
+    successful results; the rest are yielded with their index so the caller
+    can evaluate them. A malformed item is yielded too, so evaluating it
+    reports the error.
+
+    Args:
+        agent_id: ID of the agent
+        items: Evaluation items
+        journal: RunJournal of earlier attempts, or None to yield every item
+        raw: Build resumed results as JSON dicts instead of EvaluationReport objects
+        resumed: Receives the results found in the journal
+    """
+    for index, item in enumerate(items):
+        if journal is not None:
+            try:
+                entry = journal.get(agent_id, item_id(item))
+            except (TypeError, ValueError):
+                entry = None
+            if entry is not None:
+                result = entry.result if raw else EvaluationReport.from_dict(entry.result)
+                resumed.append(BatchResult(index, item, result=result, latency=entry.latency))
+                continue
+        yield index, item
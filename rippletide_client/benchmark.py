@@ -0,0 +1,538 @@
+"""
+Benchmarks for the client hot paths, run against the local mock backend.
+
+Measures throughput and latency percentiles of ``evaluate``, ``chat``,
+``get_test_prompts`` on a large prompt set, PDF upload and bulk knowledge
+provisioning, plus the memory held by 10k evaluation results and the
+package import time, and writes them as JSON so runs can be compared::
+
+    python -m rippletide_client.benchmark -o before.json
+    python -m rippletide_client.benchmark -o after.json --compare before.json --fail-threshold 10
+
+The mock backend runs in a separate process by default so that it does not
+compete with the client for the GIL; pass ``--base-url`` to use a mock (or
+any other backend) that is already running.
+"""
+import argparse
+import contextlib
+import gc
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence
+
+import requests
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+from .batch import BatchResult
+from .client import RippletideClient
+from .codec import default_codec
+from .concurrency import percentile
+from .knowledge import KnowledgeProvisioner
+from .mock_server import MockRippletideServer
+from .models import EvaluationReport
+from .results import EvaluationResultSet
+
+BENCHMARKS = ('evaluate', 'chat', 'test_prompts', 'upload_pdf', 'provision', 'memory', 'import_time')
+
+# For --compare: metrics where a larger value is better; all others are better smaller
+HIGHER_IS_BETTER = frozenset({'throughput', 'mb_per_sec', 'objects_per_sec'})
+COMPARED_METRICS = ('throughput', 'mb_per_sec', 'objects_per_sec', 'p50', 'p95', 'p99',
+                    'peak_alloc_bytes', 'bytes_per_10k', 'median')
+
+
+class BenchmarkConfig:
+    """
+    Sizes of the benchmark workloads.
+
+    Args:
+        requests: Calls per evaluate and chat benchmark (default: 2000)
+        concurrency: Calls in flight (default: 32)
+        warmup: Untimed calls made first to open pooled connections (default: 50)
+        prompts: Test prompts in the large get_test_prompts payload (default: 10000)
+        prompt_size: Characters per expected answer in that payload (default: 500)
+        prompt_fetches: Times the large payload is fetched (default: 20)
+        pdf_mb: Size of the uploaded PDF in megabytes (default: 20)
+        uploads: Number of PDF uploads (default: 8)
+        q_and_as: Q&As created by the provisioning benchmark (default: 1000)
+        import_runs: Fresh interpreters started to time the import (default: 5)
+    """
+
+    def __init__(
+        self,
+        requests: int = 2000,
+        concurrency: int = 32,
+        warmup: int = 50,
+        prompts: int = 10_000,
+        prompt_size: int = 500,
+        prompt_fetches: int = 20,
+        pdf_mb: float = 20.0,
+        uploads: int = 8,
+        q_and_as: int = 1000,
+        import_runs: int = 5
+    ):
+        self.requests = requests
+        self.concurrency = concurrency
+        self.warmup = warmup
+        self.prompts = prompts
+        self.prompt_size = prompt_size
+        self.prompt_fetches = prompt_fetches
+        self.pdf_mb = pdf_mb
+        self.uploads = uploads
+        self.q_and_as = q_and_as
+        self.import_runs = import_runs
+
+    @classmethod
+    def quick(cls) -> "BenchmarkConfig":
+        """Small workloads for a smoke run."""
+        return cls(requests=200, warmup=10, prompts=1000, prompt_fetches=5, pdf_mb=2, uploads=4,
+                   q_and_as=100, import_runs=2)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(vars(self))
+
+
+def summarize(latencies: Sequence[float], duration: float, errors: int = 0, **extra) -> Dict[str, Any]:
+    """
+    Throughput and latency percentiles of a set of timed calls.
+
+    Args:
+        latencies: Seconds taken by each successful call
+        duration: Wall-clock seconds for the whole set
+        errors: Number of failed calls
+        **extra: Additional fields to include
+
+    Returns:
+        Dict with count, errors, duration, throughput (calls/s), mean, p50, p95 and p99
+    """
+    count = len(latencies)
+    return {
+        'count': count,
+        'errors': errors,
+        'duration': duration,
+        'throughput': count / duration if duration > 0 else None,
+        'mean': sum(latencies) / count if count else None,
+        **{f'p{q}': percentile(latencies, q) if count else None for q in (50, 95, 99)},
+        **extra,
+    }
+
+
+def timed_calls(fn: Callable[..., Any], calls: Sequence[tuple], concurrency: int) -> Dict[str, Any]:
+    """Run ``fn(*args)`` for each args tuple over a thread pool and summarize the timings."""
+    def call(args: tuple) -> float:
+        start = time.perf_counter()
+        fn(*args)
+        return time.perf_counter() - start
+
+    latencies: List[float] = []
+    errors = 0
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        start = time.perf_counter()
+        futures = [pool.submit(call, args) for args in calls]
+        for future in futures:
+            try:
+                latencies.append(future.result())
+            except Exception:
+                errors += 1
+        duration = time.perf_counter() - start
+    return summarize(latencies, duration, errors)
+
+
+def retained_bytes(build: Callable[[], Any]) -> int:
+    """Bytes still allocated after ``build()`` returns, while its result is alive."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        result = build()
+        gc.collect()
+        after = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    del result
+    return after - before
+
+
+def peak_bytes(run: Callable[[], Any]) -> int:
+    """Peak bytes allocated by Python while ``run()`` executes."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        base = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        run()
+        return tracemalloc.get_traced_memory()[1] - base
+    finally:
+        tracemalloc.stop()
+
+
+def sample_report(i: int) -> Dict[str, Any]:
+    """An evaluation report shaped like the backend's."""
+    passed = i % 5 != 0
+    return {
+        'label': 'correct' if passed else 'incorrect',
+        'justification': f"The answer {'matches' if passed else 'does not match'} the expected answer for question {i}.",
+        'facts': [
+            {'fact': f'Fact {n} of the expected answer to question {i}', 'label': 'FactIsPresent' if passed else 'FactIsAbsent'}
+            for n in range(3)
+        ],
+    }
+
+
+# Benchmarks; each takes a client for the backend and the config
+
+def bench_evaluate(client: RippletideClient, config: BenchmarkConfig) -> Dict[str, Any]:
+    agent_id = 'bench-evaluate'
+    list(client.evaluate_many(agent_id, [f'Warm-up {i}?' for i in range(config.warmup)], config.concurrency))
+    questions = [f'Benchmark question {i}?' for i in range(config.requests)]
+    start = time.perf_counter()
+    outcomes = list(client.evaluate_many(agent_id, questions, max_concurrency=config.concurrency))
+    duration = time.perf_counter() - start
+    return summarize(
+        [outcome.latency for outcome in outcomes if outcome.ok],
+        duration,
+        errors=sum(1 for outcome in outcomes if not outcome.ok),
+        concurrency=config.concurrency
+    )
+
+
+def bench_chat(client: RippletideClient, config: BenchmarkConfig) -> Dict[str, Any]:
+    agent_id = 'bench-chat'
+    timed_calls(client.chat, [(agent_id, f'Warm-up {i}') for i in range(config.warmup)], config.concurrency)
+    result = timed_calls(client.chat, [(agent_id, f'Benchmark message {i}') for i in range(config.requests)], config.concurrency)
+    result['concurrency'] = config.concurrency
+    return result
+
+
+def bench_test_prompts(client: RippletideClient, config: BenchmarkConfig) -> Dict[str, Any]:
+    agent_id = f'bench-prompts-{uuid.uuid4().hex[:8]}'
+    filler = ('lorem ipsum dolor sit amet ' * (config.prompt_size // 27 + 1))[:config.prompt_size]
+    # Generated agents start with a few prompts; add the large set on top
+    client.request('POST', f'/api/agents/{agent_id}/test-prompts', json=[
+        {'prompt': f'Benchmark question {i}?', 'expectedAnswer': filler} for i in range(config.prompts)
+    ])
+    payload_bytes = len(client.send('GET', f'/api/agents/{agent_id}/test-prompts').content)
+    result = timed_calls(client.get_test_prompts, [(agent_id,)] * config.prompt_fetches, 1)
+    result.update(
+        prompts=len(client.get_test_prompts(agent_id, raw=True)),
+        payload_bytes=payload_bytes,
+        mb_per_sec=payload_bytes * result['count'] / result['duration'] / 1e6 if result['duration'] else None,
+        peak_alloc_bytes=peak_bytes(lambda: client.get_test_prompts(agent_id))
+    )
+    return result
+
+
+def bench_upload_pdf(client: RippletideClient, config: BenchmarkConfig) -> Dict[str, Any]:
+    size = int(config.pdf_mb * 1024 * 1024)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / 'benchmark.pdf'
+        with open(path, 'wb') as f:
+            f.write(b'%PDF-1.4\n')
+            block = os.urandom(1 << 20)
+            for offset in range(0, size, len(block)):
+                f.write(block[:size - offset])
+        agent_id = 'bench-upload'
+        result = timed_calls(
+            client.extract_questions_from_pdf,
+            [(agent_id, path)] * config.uploads,
+            min(config.concurrency, config.uploads)
+        )
+        result.update(
+            file_bytes=path.stat().st_size,
+            mb_per_sec=path.stat().st_size * result['count'] / result['duration'] / 1e6 if result['duration'] else None,
+            peak_alloc_bytes=peak_bytes(lambda: client.extract_questions_from_pdf(agent_id, path))
+        )
+    return result
+
+
+def bench_provision(client: RippletideClient, config: BenchmarkConfig) -> Dict[str, Any]:
+    tags = [{'name': f'bench-tag-{n}', 'description': f'Benchmark tag {n}'} for n in range(5)]
+    q_and_as = [
+        {'question': f'Benchmark question {i}?', 'answer': f'Benchmark answer {i}.', 'tags': [tags[i % 5]['name']]}
+        for i in range(config.q_and_as)
+    ]
+    provisioner = KnowledgeProvisioner(client, max_workers=config.concurrency)
+    start = time.perf_counter()
+    report = provisioner.provision(f'bench-{uuid.uuid4()}', q_and_as=q_and_as, tags=tags)
+    duration = time.perf_counter() - start
+    objects = sum(report.created.values()) + sum(report.skipped.values())
+    return {
+        'q_and_as': config.q_and_as,
+        'objects': objects,
+        'errors': len(report.errors),
+        'duration': duration,
+        'objects_per_sec': objects / duration if duration > 0 else None,
+        'concurrency': config.concurrency,
+    }
+
+
+def bench_memory(config: BenchmarkConfig, n: int = 10_000) -> Dict[str, Any]:
+    codec = default_codec()
+    bodies = [codec.dumps(sample_report(i)) for i in range(n)]
+    result = {
+        'results': n,
+        'dicts': {'bytes_per_10k': retained_bytes(lambda: [codec.loads(body) for body in bodies]) * 10_000 // n},
+        'models': {'bytes_per_10k': retained_bytes(
+            lambda: [EvaluationReport.from_dict(codec.loads(body)) for body in bodies]
+        ) * 10_000 // n},
+    }
+    if np is not None:
+        def result_set() -> EvaluationResultSet:
+            results = EvaluationResultSet()
+            for i, body in enumerate(bodies):
+                results.add_result(BatchResult(i, f'Benchmark question {i}?', result=codec.loads(body), latency=0.1))
+            return results
+        result['result_set'] = {'bytes_per_10k': retained_bytes(result_set) * 10_000 // n}
+    return result
+
+
+def bench_import_time(config: BenchmarkConfig) -> Dict[str, Any]:
+    code = 'import time; t = time.perf_counter(); import rippletide_client; print(time.perf_counter() - t)'
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [_package_root(), os.getenv('PYTHONPATH')])))
+    times = []
+    for _ in range(config.import_runs):
+        output = subprocess.run([sys.executable, '-c', code], env=env, check=True, capture_output=True, text=True).stdout
+        times.append(float(output.strip()))
+    return {'runs': len(times), 'min': min(times), 'median': percentile(times, 50), 'max': max(times)}
+
+
+_RUNNERS: Dict[str, Callable[[RippletideClient, BenchmarkConfig], Dict[str, Any]]] = {
+    'evaluate': bench_evaluate,
+    'chat': bench_chat,
+    'test_prompts': bench_test_prompts,
+    'upload_pdf': bench_upload_pdf,
+    'provision': bench_provision,
+    'memory': lambda client, config: bench_memory(config),
+    'import_time': lambda client, config: bench_import_time(config),
+}
+
+
+def _package_root() -> str:
+    return str(Path(__file__).resolve().parent.parent)
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+@contextlib.contextmanager
+def mock_backend(
+    latency: str = '0',
+    seed: int = 0,
+    in_process: bool = False,
+    error_rate: float = 0.0
+) -> Iterator[str]:
+    """
+    Run the mock backend for the duration of a ``with`` block and yield its URL.
+
+    Args:
+        latency: Server latency spec (see :class:`mock_server.Latency`)
+        seed: Seed for the mock's random draws
+        in_process: Serve from a thread of this process instead of a subprocess
+        error_rate: Fraction of requests the mock answers with a 5xx
+    """
+    if in_process:
+        with MockRippletideServer(latency=latency, seed=seed, error_rate=error_rate) as mock:
+            yield mock.url
+        return
+
+    port = _free_port()
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [_package_root(), os.getenv('PYTHONPATH')])))
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'rippletide_client.mock_server', '--port', str(port),
+         '--latency', latency, '--seed', str(seed), '--error-rate', str(error_rate)],
+        env=env,
+        stderr=subprocess.DEVNULL
+    )
+    url = f'http://127.0.0.1:{port}'
+    try:
+        deadline = time.monotonic() + 10
+        while True:
+            try:
+                requests.get(f'{url}/health', timeout=1).raise_for_status()
+                break
+            except requests.RequestException:
+                if process.poll() is not None or time.monotonic() > deadline:
+                    raise RuntimeError('mock backend did not start')
+                time.sleep(0.05)
+        yield url
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def run_benchmarks(
+    base_url: str,
+    config: Optional[BenchmarkConfig] = None,
+    only: Optional[Sequence[str]] = None,
+    progress: bool = False
+) -> Dict[str, Any]:
+    """
+    Run the benchmarks against a backend.
+
+    Args:
+        base_url: URL of the mock (or another) backend
+        config: Workload sizes (default: BenchmarkConfig())
+        only: Names of the benchmarks to run (default: all of BENCHMARKS)
+        progress: Print each benchmark's name to stderr as it starts
+
+    Returns:
+        Dict with run metadata under 'meta' and per-benchmark results under 'benchmarks'
+    """
+    config = config or BenchmarkConfig()
+    names = list(only) if only else list(BENCHMARKS)
+    unknown = set(names) - set(BENCHMARKS)
+    if unknown:
+        raise ValueError(f"unknown benchmarks {sorted(unknown)}; expected some of {', '.join(BENCHMARKS)}")
+
+    results: Dict[str, Any] = {}
+    client = RippletideClient(api_key='benchmark', base_url=base_url, pool_maxsize=config.concurrency)
+    with client:
+        for name in names:
+            if progress:
+                print(f"{name}...", file=sys.stderr)
+            results[name] = _RUNNERS[name](client, config)
+    return {'meta': _metadata(base_url, config), 'benchmarks': results}
+
+
+def _metadata(base_url: str, config: BenchmarkConfig) -> Dict[str, Any]:
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], cwd=_package_root(), capture_output=True, text=True, timeout=10
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        'timestamp': time.time(),
+        'commit': commit,
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'json_codec': default_codec().name,
+        'numpy': getattr(np, '__version__', None),
+        'base_url': base_url,
+        'config': config.to_dict(),
+    }
+
+
+def _metrics(benchmark: Dict[str, Any], prefix: str = '') -> Iterator[tuple]:
+    for key, value in benchmark.items():
+        if isinstance(value, dict):
+            yield from _metrics(value, f'{prefix}{key}.')
+        elif key in COMPARED_METRICS and isinstance(value, (int, float)):
+            yield f'{prefix}{key}', key, value
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Compare two benchmark reports.
+
+    Args:
+        current: Report of this run
+        baseline: Report to compare against
+
+    Returns:
+        One row per metric present in both, with 'delta' the relative change of
+        the value and 'change' the same fraction signed to be positive when the
+        current run is worse
+    """
+    rows = []
+    for name, benchmark in current['benchmarks'].items():
+        previous = dict((path, value) for path, _, value in _metrics(baseline['benchmarks'].get(name) or {}))
+        for path, metric, value in _metrics(benchmark):
+            old = previous.get(path)
+            if not old:
+                continue
+            change = (value - old) / old
+            rows.append({
+                'benchmark': name,
+                'metric': path,
+                'baseline': old,
+                'current': value,
+                'delta': change,
+                'change': -change if metric in HIGHER_IS_BETTER else change,
+            })
+    return rows
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog='python -m rippletide_client.benchmark',
+        description='Benchmark the client hot paths against the local mock backend.'
+    )
+    parser.add_argument('--only', help=f"comma-separated benchmarks to run (default: all of {','.join(BENCHMARKS)})")
+    parser.add_argument('--output', '-o', help='write the JSON results here (default: stdout)')
+    parser.add_argument('--compare', help='JSON results of an earlier run to compare against')
+    parser.add_argument('--fail-threshold', type=float,
+                        help='exit 1 if any compared metric is this many percent worse than the baseline')
+    parser.add_argument('--quick', action='store_true', help='small workloads for a smoke run')
+    parser.add_argument('--requests', type=int, help='calls per evaluate and chat benchmark')
+    parser.add_argument('--concurrency', type=int, help='calls in flight (default: 32)')
+    parser.add_argument('--latency', default='0', help='mock server latency spec, e.g. lognormal:0.05,0.4 (default: 0)')
+    parser.add_argument('--seed', type=int, default=0, help='seed for the mock backend (default: 0)')
+    parser.add_argument('--in-process', action='store_true', help='serve the mock from a thread of this process')
+    parser.add_argument('--base-url', help='use a backend that is already running instead of starting the mock')
+    args = parser.parse_args(argv)
+
+    config = BenchmarkConfig.quick() if args.quick else BenchmarkConfig()
+    if args.requests is not None:
+        config.requests = args.requests
+    if args.concurrency is not None:
+        config.concurrency = args.concurrency
+    only = [name.strip() for name in args.only.split(',')] if args.only else None
+    baseline = None
+    if args.compare:
+        try:
+            with open(args.compare, 'r', encoding='utf-8') as f:
+                baseline = json.load(f)
+        except (OSError, ValueError) as e:
+            parser.error(f"cannot read {args.compare}: {e}")
+
+    try:
+        if args.base_url:
+            report = run_benchmarks(args.base_url, config, only, progress=True)
+        else:
+            with mock_backend(args.latency, args.seed, args.in_process) as url:
+                report = run_benchmarks(url, config, only, progress=True)
+    except ValueError as e:
+        parser.error(str(e))
+    report['meta']['latency'] = None if args.base_url else args.latency
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        sys.stdout.write('\n')
+
+    status = 0
+    if baseline is not None:
+        for row in compare(report, baseline):
+            worse = args.fail_threshold is not None and row['change'] * 100 > args.fail_threshold
+            status = 1 if worse else status
+            print(
+                f"{row['benchmark']:>12} {row['metric']:<28} {row['baseline']:>14.6g} -> {row['current']:<14.6g} "
+                f"{row['delta']:+.1%} {'REGRESSION' if worse else ''}",
+                file=sys.stderr
+            )
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
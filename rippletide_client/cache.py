@@ -0,0 +1,221 @@
+"""
+Persistent cache for evaluation reports.
+"""
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple, Union
+
+DEFAULT_CACHE_PATH = Path.home() / '.cache' / 'rippletide' / 'evaluations.sqlite3'
+
+
+def fingerprint(data: Any) -> str:
+    """Stable short hash of a JSON-serialisable value."""
+    encoded = json.dumps(data, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(encoded.encode('utf-8')).hexdigest()[:16]
+
+
+class EvaluationCache:
+    """
+    Content-addressed SQLite cache of evaluation reports.
+
+    Entries are keyed by a hash of (agent_id, question, expected_answer,
+    agent_version), so a report is only reused while the agent it was
+    produced against is unchanged. Entries older than ``ttl`` are ignored,
+    and once the cache holds more than ``max_entries`` the least recently
+    used ones are evicted. The database runs in WAL mode, so several worker
+    processes can share one file.
+
+    Args:
+        path: SQLite file location (default: ~/.cache/rippletide/evaluations.sqlite3)
+        ttl: Seconds an entry stays valid, or None to keep entries forever (default: 7 days)
+        max_entries: Maximum number of cached reports (default: 100000)
+        fingerprint_ttl: Seconds an agent's version fingerprint is reused before
+            it is fetched again (default: 60)
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path] = DEFAULT_CACHE_PATH,
+        ttl: Optional[float] = 7 * 24 * 3600,
+        max_entries: int = 100_000,
+        fingerprint_ttl: float = 60.0
+    ):
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+        self.path = Path(path)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.fingerprint_ttl = fingerprint_ttl
+        self.hits = 0
+        self.misses = 0
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._fingerprints: Dict[str, Tuple[str, float]] = {}
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS evaluations ('
+            ' key TEXT PRIMARY KEY,'
+            ' value TEXT NOT NULL,'
+            ' created_at REAL NOT NULL,'
+            ' last_used REAL NOT NULL)'
+        )
+        self._conn.execute('CREATE INDEX IF NOT EXISTS evaluations_last_used ON evaluations (last_used)')
+        self._size = self._conn.execute('SELECT COUNT(*) FROM evaluations').fetchone()[0]
+
+    @staticmethod
+    def make_key(
+        agent_id: str,
+        question: str,
+        expected_answer: Optional[str],
+        agent_version: str
+    ) -> str:
+        """Hash identifying one evaluation of a question against one version of an agent."""
+        encoded = json.dumps([agent_id, question, expected_answer, agent_version], separators=(',', ':'))
+        return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the cached report for `key`, or None if it is missing or expired."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT value, created_at FROM evaluations WHERE key = ?', (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            value, created_at = row
+            if self.ttl is not None and now - created_at > self.ttl:
+                self._conn.execute('DELETE FROM evaluations WHERE key = ?', (key,))
+                self._size -= 1
+                self.misses += 1
+                return None
+            self._conn.execute('UPDATE evaluations SET last_used = ? WHERE key = ?', (now, key))
+            self.hits += 1
+        return json.loads(value)
+
+    def set(self, key: str, value: Dict[str, Any]) -> None:
+        """Store a report under `key`, evicting the least recently used entries if full."""
+        now = time.time()
+        encoded = json.dumps(value, separators=(',', ':'))
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO evaluations (key, value, created_at, last_used) VALUES (?, ?, ?, ?)',
+                (key, encoded, now, now)
+            )
+            # Approximate (replacements also count); _evict recounts exactly
+            self._size += 1
+            if self._size > self.max_entries:
+                self._evict()
+
+    def _evict(self) -> None:
+        # Other processes may have written to the file, so recount first.
+        # Evict 10% below the cap so eviction is amortised over many writes.
+        self._size = self._conn.execute('SELECT COUNT(*) FROM evaluations').fetchone()[0]
+        excess = self._size - int(self.max_entries * 0.9)
+        if excess <= 0:
+            return
+        self._conn.execute(
+            'DELETE FROM evaluations WHERE key IN '
+            '(SELECT key FROM evaluations ORDER BY last_used ASC LIMIT ?)',
+            (excess,)
+        )
+        self._size -= excess
+
+    def get_fingerprint(self, agent_id: str) -> Optional[str]:
+        """Return the memoised version fingerprint of an agent, if still fresh."""
+        entry = self._fingerprints.get(agent_id)
+        if entry is None or entry[1] < time.monotonic():
+            return None
+        return entry[0]
+
+    def set_fingerprint(self, agent_id: str, version: str) -> None:
+        self._fingerprints[agent_id] = (version, time.monotonic() + self.fingerprint_ttl)
+
+    def clear(self) -> None:
+        """Remove every cached report."""
+        with self._lock:
+            self._conn.execute('DELETE FROM evaluations')
+            self._size = 0
+            self._fingerprints.clear()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM evaluations').fetchone()[0]
+
+
+class PromptCacheEntry(NamedTuple):
+    prompts: List[Dict[str, Any]]
+    etag: Optional[str]
+    expires_at: float
+
+    @property
+    def fresh(self) -> bool:
+        return time.monotonic() < self.expires_at
+
+
+class PromptCache:
+    """
+    In-memory LRU cache of test prompt lists, one entry per agent.
+
+    Within ``ttl`` a cached list is returned without touching the network.
+    After that, if the backend sent an ETag, the list is revalidated with
+    ``If-None-Match`` so an unchanged list costs a 304 instead of a full
+    download and parse.
+
+    Args:
+        ttl: Seconds a list is served without revalidation (default: 60)
+        max_agents: Maximum number of agents kept, least recently used first out (default: 128)
+    """
+
+    def __init__(self, ttl: float = 60.0, max_agents: int = 128):
+        if max_agents < 1:
+            raise ValueError("max_agents must be at least 1")
+        self.ttl = ttl
+        self.max_agents = max_agents
+        self._entries: "OrderedDict[str, PromptCacheEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, agent_id: str) -> Optional[PromptCacheEntry]:
+        """Return the entry for an agent, fresh or stale, or None if there is none."""
+        with self._lock:
+            entry = self._entries.get(agent_id)
+            if entry is not None:
+                self._entries.move_to_end(agent_id)
+            return entry
+
+    def set(self, agent_id: str, prompts: List[Dict[str, Any]], etag: Optional[str]) -> None:
+        with self._lock:
+            self._entries[agent_id] = PromptCacheEntry(prompts, etag, time.monotonic() + self.ttl)
+            self._entries.move_to_end(agent_id)
+            while len(self._entries) > self.max_agents:
+                self._entries.popitem(last=False)
+
+    def touch(self, agent_id: str) -> None:
+        """Extend an entry's freshness after the backend confirmed it is unchanged."""
+        with self._lock:
+            entry = self._entries.get(agent_id)
+            if entry is not None:
+                self._entries[agent_id] = entry._replace(expires_at=time.monotonic() + self.ttl)
+
+    def invalidate(self, agent_id: Optional[str] = None) -> None:
+        """Drop one agent's entry, or every entry if agent_id is None."""
+        with self._lock:
+            if agent_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(agent_id, None)
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -1,12 +1,40 @@
 """
 Rippletide SDK Client for interacting with the Rippletide evaluation API.
 """
-import os
-import uuid
-import random
+import time
 import requests
-from typing import Optional, Dict, List, Any, BinaryIO, Union
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Optional, Dict, List, Any, Callable, Deque, BinaryIO, Iterable, Iterator, Union
 from pathlib import Path
+from urllib3.exceptions import NewConnectionError
+
+from . import api
+from .batch import BatchResult, EvaluationItem, item_id, normalize_item, resume_from_journal
+from .cache import EvaluationCache, PromptCache, fingerprint
+from .codec import JSONCodec, default_codec
+from .concurrency import AdaptiveConcurrencyLimiter
+from .ingest import IngestManifest, IngestResult, PathsOrGlob, UploadClaims, file_digest, resolve_pdf_paths
+from .instrumentation import InstrumentationHook, RequestInfo, body_size
+from .journal import RunJournal
+from .models import Agent, ChatReply, EvaluationReport, TestPrompt
+from .multipart import DEFAULT_CHUNK_SIZE, MultipartEncoder, ProgressCallback
+from .preprocess import check_preprocess_mode, preprocess_pdf
+from .rate_limit import RateLimiter
+from .retry import RetryPolicy, rewind_streams, snapshot_streams
+from .streaming import ChatStream
+from .transport import PooledHTTPAdapter, keepalive_socket_options, record_connection_timings
+
+# Marks a response whose JSON body has not been decoded ahead of _decode
+_UNDECODED = object()
+
+
+def _connect_failed(error: requests.RequestException) -> bool:
+    """Whether a transport error happened before the request reached the server."""
+    if isinstance(error, requests.ConnectTimeout):
+        return True
+    reason = getattr(error.args[0], 'reason', None) if error.args else None
+    return isinstance(reason, NewConnectionError)
 
 
 class RippletideClient:
@@ -16,70 +44,249 @@ class RippletideClient:
     Args:
         session_id: Optional session ID for anonymous requests (will be auto-generated if not provided and no api_key)
         api_key: Optional API key for authenticated requests
+        base_url: Optional base URL (defaults to RIPPLETIDE_BASE_URL or the hosted backend)
+        pool_connections: Number of per-host connection pools to cache (default: 10)
+        pool_maxsize: Maximum pooled connections per host; size this to your thread count (default: 32)
+        pool_block: Block when the pool is exhausted instead of opening throwaway connections (default: False)
+        connect_timeout: Seconds to wait for a connection to be established (default: 10)
+        read_timeout: Seconds to wait for the server between bytes of a response (default: 300)
+        keep_alive: Reuse connections and enable TCP keep-alive probes on them (default: True)
+        retry_policy: Retry policy for transient failures (default: RetryPolicy(), idempotent methods only)
+        rate_limiter: Optional RateLimiter, which may be shared with other clients, threads and tasks
+        evaluation_cache: Optional EvaluationCache that short-circuits repeated evaluate calls
+        prompt_cache: Optional PromptCache for get_test_prompts, revalidated with ETags
+        json_codec: JSON codec for request and response bodies (default: orjson or msgspec if installed, else json)
+        hooks: Instrumentation hooks told about every HTTP attempt, e.g. a HistogramCollector
     """
     
     # Default base URL (override via constructor or RIPPLETIDE_BASE_URL)
-    BASE_URL = "https://rippletide-backend.azurewebsites.net"
+    BASE_URL = api.BASE_URL
 
     def __init__(
         self,
         session_id: Optional[str] = None,
         api_key: Optional[str] = None,
-        base_url: Optional[str] = None
+        base_url: Optional[str] = None,
+        pool_connections: int = 10,
+        pool_maxsize: int = 32,
+        pool_block: bool = False,
+        connect_timeout: Optional[float] = 10.0,
+        read_timeout: Optional[float] = 300.0,
+        keep_alive: bool = True,
+        retry_policy: Optional[RetryPolicy] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        evaluation_cache: Optional[EvaluationCache] = None,
+        prompt_cache: Optional[PromptCache] = None,
+        json_codec: Optional[JSONCodec] = None,
+        hooks: Optional[Iterable[InstrumentationHook]] = None
     ):
-        # Allow overriding base URL for staging/local via argument or env
-        env_base_url = os.getenv("RIPPLETIDE_BASE_URL")
-        self.base_url = (base_url or env_base_url or self.BASE_URL).rstrip('/')
+        self.base_url = api.resolve_base_url(base_url, self.BASE_URL)
         self.api_key = api_key
-        
-        # Generate session_id if not provided and no api_key
-        if not api_key and not session_id:
-            self.session_id = str(uuid.uuid4())
-        else:
-            self.session_id = session_id
-        
+        self.session_id = api.resolve_session_id(api_key, session_id)
+
+        self.pool_maxsize = pool_maxsize
+        self.timeout = (connect_timeout, read_timeout)
+        self.retry_policy = retry_policy if retry_policy is not None else RetryPolicy()
+        self.rate_limiter = rate_limiter
+        self.evaluation_cache = evaluation_cache
+        self.prompt_cache = prompt_cache
+        self.json_codec = json_codec if json_codec is not None else default_codec()
+        self.hooks: List[InstrumentationHook] = list(hooks or ())
+
         self.session = requests.Session()
-        
-        # Set up headers
-        if self.api_key:
-            self.session.headers.update({
-                'x-api-key': self.api_key
-            })
-        if self.session_id:
-            self.session.headers.update({
-                'X-Session-Id': self.session_id
-            })
+        adapter = PooledHTTPAdapter(
+            socket_options=keepalive_socket_options() if keep_alive else None,
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            pool_block=pool_block
+        )
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        if not keep_alive:
+            self.session.headers['Connection'] = 'close'
+        self.session.headers.update(api.session_headers(self.api_key, self.session_id))
+
+    def __enter__(self) -> "RippletideClient":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Close the underlying session and release pooled connections."""
+        self.session.close()
     
-    def _make_request(
+    def request(
         self,
         method: str,
         endpoint: str,
+        route: Optional[str] = None,
+        **kwargs
+    ) -> Any:
+        """
+        Make an HTTP request to the API and return the decoded JSON body.
+
+        Use this for endpoints the client has no method for; see :meth:`send`
+        for the arguments.
+
+        Returns:
+            The decoded body, or None if it is empty
+        """
+        response = self.send(method, endpoint, route, **kwargs)
+        return self._decode(response) if response.content else None
+
+    def send(
+        self,
+        method: str,
+        endpoint: str,
+        route: Optional[str] = None,
         **kwargs
     ) -> requests.Response:
         """
-        Make an HTTP request to the API.
+        Make an HTTP request to the API, retrying transient failures.
+
+        The request goes through the client's connection pool, retry policy,
+        rate limiter and hooks.
         
         Args:
             method: HTTP method (GET, POST, etc.)
             endpoint: API endpoint (e.g., '/api/agents')
-            **kwargs: Additional arguments to pass to requests
+            route: Endpoint template used for per-endpoint rate limits (defaults to endpoint)
+            **kwargs: Additional arguments to pass to requests (timeout defaults to the client's)
             
         Returns:
-            Response object
+            Response object, with the number of retries it took in ``retry_count``;
+            with ``stream=True`` the caller must also free its rate limiter slot
             
         Raises:
             requests.HTTPError: If the request fails
         """
         url = f"{self.base_url}{endpoint}"
-        response = self.session.request(method, url, **kwargs)
+        kwargs.setdefault('timeout', self.timeout)
+        if 'json' in kwargs:
+            kwargs['data'] = self.json_codec.dumps(kwargs.pop('json'))
+            kwargs['headers'] = {'Content-Type': 'application/json', **(kwargs.get('headers') or {})}
+        route = route or endpoint
+        policy = self.retry_policy
+        limiter = self.rate_limiter
+        streams = snapshot_streams(kwargs)
+        retries = 0
+        held = False
+        while True:
+            if limiter is not None:
+                limiter.acquire(route)
+            info = self._start_attempt(method, endpoint, route, retries, kwargs) if self.hooks else None
+            try:
+                if info is None:
+                    response = self.session.request(method, url, **kwargs)
+                else:
+                    with record_connection_timings(info.timings):
+                        response = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                retry = policy.should_retry_error(method, retries, _connect_failed(e))
+                if info is not None:
+                    self._attempt_failed(info, e, retry)
+                if not retry:
+                    e.retry_count = retries
+                    raise
+                delay = policy.get_backoff(retries)
+                reason = type(e).__name__
+            else:
+                delay = api.retry_delay(
+                    policy, limiter, method, route, response.status_code, response.headers, retries
+                )
+                if info is not None:
+                    self._attempt_answered(info, response, delay is not None, kwargs.get('stream', False))
+                if delay is None:
+                    # An open stream keeps its slot until the caller closes it
+                    held = kwargs.get('stream', False) and response.status_code < 400
+                    break
+                reason = str(response.status_code)
+                response.close()
+            finally:
+                if limiter is not None and not held:
+                    limiter.release(route)
+            retries += 1
+            policy.notify(method, endpoint, retries, delay, reason)
+            time.sleep(delay)
+            rewind_streams(streams)
+
+        response.retry_count = retries
         try:
             response.raise_for_status()
         except requests.HTTPError as e:
             # Include response body in error message for debugging
-            error_msg = f"{e}\nResponse: {response.text}"
-            raise requests.HTTPError(error_msg, response=response) from e
+            error = requests.HTTPError(api.error_message(str(e), response.text, retries), response=response)
+            error.retry_count = retries
+            raise error from e
         return response
     
+    def _start_attempt(
+        self,
+        method: str,
+        endpoint: str,
+        route: str,
+        retries: int,
+        kwargs: Dict[str, Any]
+    ) -> RequestInfo:
+        info = RequestInfo(
+            method, route, endpoint, retries,
+            bytes_out=None if kwargs.get('files') else body_size(kwargs.get('data'))
+        )
+        for hook in self.hooks:
+            hook.on_request_start(info)
+        return info
+
+    def _attempt_failed(self, info: RequestInfo, error: Exception, will_retry: bool) -> None:
+        info.error = error
+        info.will_retry = will_retry
+        info.timings['total'] = info.elapsed()
+        for hook in self.hooks:
+            hook.on_error(info)
+
+    def _attempt_answered(
+        self,
+        info: RequestInfo,
+        response: requests.Response,
+        will_retry: bool,
+        stream: bool
+    ) -> None:
+        timings = info.timings
+        # response.elapsed runs from sending the request to parsing the headers,
+        # including the setup of a new connection
+        headers_at = response.elapsed.total_seconds()
+        timings['server'] = max(0.0, headers_at - sum(timings.get(phase, 0.0) for phase in ('dns', 'connect', 'tls')))
+        info.status = response.status_code
+        info.will_retry = will_retry
+        request_size = body_size(response.request.body)
+        if request_size is not None:
+            info.bytes_out = request_size
+        if stream:
+            length = response.headers.get('Content-Length')
+            info.bytes_in = int(length) if length and length.isdigit() else None
+        else:
+            timings['transfer'] = max(0.0, info.elapsed() - headers_at)
+            info.bytes_in = len(response.content)
+            if not will_retry and response.ok and response.content and 'json' in response.headers.get('Content-Type', ''):
+                # Decode now so the hooks see the decode time; _decode reuses the result
+                start = time.perf_counter()
+                try:
+                    response._decoded = self.json_codec.loads(response.content)
+                except ValueError:
+                    pass
+                else:
+                    timings['decode'] = time.perf_counter() - start
+        timings['total'] = info.elapsed()
+        for hook in self.hooks:
+            hook.on_response(info)
+
+    def _decode(self, response: requests.Response) -> Any:
+        """Decode a JSON response body with the client's codec."""
+        decoded = getattr(response, '_decoded', _UNDECODED)
+        if decoded is not _UNDECODED:
+            return decoded
+        return self.json_codec.loads(response.content)
+    
     def create_agent(
         self,
         name: str,
@@ -87,8 +294,9 @@ class RippletideClient:
         num_nodes: int = 100,
         public_url: Optional[str] = None,
         advanced_payload: Optional[Dict[str, str]] = None,
-        parent_agent_id: Optional[str] = None
-    ) -> Dict[str, Any]:
+        parent_agent_id: Optional[str] = None,
+        raw: bool = False
+    ) -> Union[Agent, Dict[str, Any]]:
         """
         Create a new agent for evaluation.
         
@@ -99,80 +307,257 @@ class RippletideClient:
             public_url: Optional public URL for the agent
             advanced_payload: Optional advanced payload configuration
             parent_agent_id: Optional parent agent ID
+            raw: Return the decoded JSON dict instead of an Agent
             
         Returns:
-            Dictionary containing the created agent data
+            Agent (or dict if raw) containing the created agent data
         """
-        endpoint = '/api/agents/anonymous' if self.session_id and not self.api_key else '/api/agents'
-        
-        if seed is None:
-            seed = random.randint(0, 1000000)
-        
-        payload = {
-            'name': name,
-            'seed': seed,
-            'numNodes': num_nodes,
-            'label': 'eval'
-        }
-        
-        if public_url is not None:
-            payload['publicUrl'] = public_url
-        if advanced_payload is not None:
-            payload['advancedPayload'] = advanced_payload
-        if parent_agent_id is not None:
-            payload['parentAgentId'] = parent_agent_id
-        
-        response = self._make_request('POST', endpoint, json=payload)
-        return response.json()
+        call = api.create_agent_request(
+            name, bool(self.session_id and not self.api_key),
+            seed, num_nodes, public_url, advanced_payload, parent_agent_id
+        )
+        agent = self.request(call.method, call.endpoint, call.route, **call.kwargs)
+        return api.build_result(Agent, agent, raw)
     
     def extract_questions_from_pdf(
         self,
         agent_id: str,
-        pdf_path: Union[str, Path, BinaryIO]
+        pdf_path: Union[str, Path, BinaryIO],
+        progress: Optional[ProgressCallback] = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        use_mmap: bool = True,
+        preprocess: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         Extract questions and expected answers from a PDF file.
         
+        The upload is streamed in ``chunk_size`` pieces, so memory use does not
+        grow with the size of the PDF. File-like objects must be seekable to be
+        streamed; others are read into memory as before.
+        
         Args:
             agent_id: ID of the agent
             pdf_path: Path to the PDF file or file-like object
+            progress: Optional callback called with (bytes sent, total bytes) as the upload proceeds
+            chunk_size: Bytes read and sent at a time (default: 256 KiB)
+            use_mmap: Memory-map the PDF instead of reading it, where possible (default: True)
+            preprocess: Shrink the PDF locally before uploading it: 'strip' removes
+                images and embedded fonts, 'text' uploads only its text (see
+                ``preprocess_pdf``; requires pypdf). The original is uploaded if
+                the copy is not smaller.
             
         Returns:
-            Dictionary containing extraction results and Q&A pairs
+            Dictionary containing extraction results and Q&A pairs. With
+            ``preprocess``, its 'preprocessing' entry reports the mode, page
+            count, original and processed sizes, bytes saved, and whether the
+            processed copy was uploaded ('used')
         """
-        endpoint = f'/api/agents/{agent_id}/upload-pdf'
-        
         # Handle both file path and file-like object
-        if isinstance(pdf_path, (str, Path)):
-            with open(pdf_path, 'rb') as f:
-                files = {'file': (Path(pdf_path).name, f, 'application/pdf')}
-                response = self._make_request('POST', endpoint, files=files)
-        else:
-            # Assume it's a file-like object
-            files = {'file': ('document.pdf', pdf_path, 'application/pdf')}
-            response = self._make_request('POST', endpoint, files=files)
+        filename = Path(pdf_path).name if isinstance(pdf_path, (str, Path)) else 'document.pdf'
+        if preprocess is None:
+            return self._upload_pdf(agent_id, pdf_path, filename, progress, chunk_size, use_mmap)
+        start = None if isinstance(pdf_path, (str, Path)) else pdf_path.tell()
+        with preprocess_pdf(pdf_path, preprocess, name=filename) as copy:
+            used = copy.saved > 0
+            if used:
+                result = self._upload_pdf(agent_id, copy.file, filename, progress, chunk_size, use_mmap)
+        if not used:
+            if start is not None:
+                pdf_path.seek(start)
+            result = self._upload_pdf(agent_id, pdf_path, filename, progress, chunk_size, use_mmap)
+        if isinstance(result, dict):
+            result['preprocessing'] = {**copy.to_dict(), 'used': used}
+        return result
+    
+    def _upload_pdf(
+        self,
+        agent_id: str,
+        source: Union[str, Path, BinaryIO],
+        filename: str,
+        progress: Optional[ProgressCallback] = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        use_mmap: bool = True
+    ) -> Dict[str, Any]:
+        call = api.upload_pdf_request(agent_id)
+        try:
+            encoder = MultipartEncoder(
+                [('file', (filename, source, 'application/pdf'))],
+                chunk_size=chunk_size, progress=progress, use_mmap=use_mmap
+            )
+        except ValueError:
+            # Not seekable, so it cannot be measured or rewound; let requests buffer it
+            files = {'file': (filename, source, 'application/pdf')}
+            return self.request(call.method, call.endpoint, call.route, files=files)
         
-        return response.json()
+        with encoder:
+            return self.request(
+                call.method, call.endpoint, call.route, data=encoder, headers={'Content-Type': encoder.content_type}
+            )
     
-    def get_test_prompts(self, agent_id: str) -> List[Dict[str, Any]]:
+    def ingest_pdfs(
+        self,
+        agent_id: str,
+        paths_or_glob: PathsOrGlob,
+        max_concurrency: int = 4,
+        manifest: Optional[Union[IngestManifest, str, Path]] = None,
+        force: bool = False,
+        progress: Optional[Callable[[Path, int, int], None]] = None,
+        preprocess: Optional[str] = None
+    ) -> Iterator[IngestResult]:
+        """
+        Upload many PDFs to an agent concurrently, skipping ones it already has.
+
+        Each file is hashed (SHA-256 over a memory map) and looked up in the
+        manifest; files the agent has already ingested are yielded as skipped
+        without being uploaded. A second copy of a file within the run waits
+        for the first: it is skipped with that upload's result, or uploaded in
+        its place if that upload fails. The rest are streamed up by ``extract_questions_from_pdf`` and recorded
+        in the manifest once they succeed. Results are yielded as they
+        complete; a failing file does not stop the others.
+
+        Args:
+            agent_id: ID of the agent
+            paths_or_glob: A file, directory (its ``*.pdf`` files) or glob pattern,
+                or an iterable of them
+            max_concurrency: Maximum number of files hashed or uploaded at once (default: 4)
+            manifest: IngestManifest, or the path of one (default: ``default_manifest_path()``)
+            force: Upload files even if the manifest says the agent has them
+            progress: Optional callback called with (path, bytes sent, total bytes) during uploads
+            preprocess: Shrink each PDF locally before uploading it, 'strip' or 'text'
+                (see ``extract_questions_from_pdf``); ``IngestResult.saved`` reports
+                the bytes saved per file
+
+        Yields:
+            IngestResult for each file, in completion order
+
+        Raises:
+            FileNotFoundError: If a listed path that is not a pattern does not exist
+            ValueError: If max_concurrency is less than 1 or preprocess is not a known mode
+        """
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+        if preprocess is not None:
+            check_preprocess_mode(preprocess)
+        return self._ingest_pdfs(agent_id, paths_or_glob, max_concurrency, manifest, force, progress, preprocess)
+
+    def _ingest_pdfs(
+        self,
+        agent_id: str,
+        paths_or_glob: PathsOrGlob,
+        max_concurrency: int,
+        manifest: Optional[Union[IngestManifest, str, Path]],
+        force: bool,
+        progress: Optional[Callable[[Path, int, int], None]],
+        preprocess: Optional[str]
+    ) -> Iterator[IngestResult]:
+        files = resolve_pdf_paths(paths_or_glob)
+        owned = not isinstance(manifest, IngestManifest)
+        record = IngestManifest(manifest) if owned else manifest
+        claims = UploadClaims()
+
+        def run(index: int, path: Path) -> IngestResult:
+            start = time.perf_counter()
+            digest = size = None
+            try:
+                size = path.stat().st_size
+                digest = file_digest(path)
+                entry = None if force else record.get(agent_id, digest)
+                if entry is not None:
+                    return IngestResult(index, path, digest, entry.result, skipped=True,
+                                        latency=time.perf_counter() - start, size=size)
+                # Wait while another copy of this file is being uploaded
+                waiter = claims.claim(digest, index)
+                while waiter is not None:
+                    waiter.wait()
+                    done, result = claims.uploaded(digest)
+                    if done:
+                        return IngestResult(index, path, digest, result, skipped=True,
+                                            latency=time.perf_counter() - start, size=size)
+                    waiter = claims.claim(digest, index)
+                report = (lambda sent, total: progress(path, sent, total)) if progress is not None else None
+                uploaded = size
+                try:
+                    copy = preprocess_pdf(path, preprocess) if preprocess is not None else None
+                    try:
+                        if copy is not None and copy.saved > 0:
+                            uploaded = copy.size
+                            result = self._upload_pdf(agent_id, copy.file, path.name, report)
+                        else:
+                            result = self._upload_pdf(agent_id, path, path.name, report)
+                    finally:
+                        if copy is not None:
+                            copy.close()
+                    record.record(agent_id, digest, path, size, result)
+                except BaseException:
+                    claims.release(digest, index)
+                    raise
+                claims.settle(digest, index, result)
+            except Exception as e:
+                return IngestResult(index, path, digest, error=e, latency=time.perf_counter() - start, size=size)
+            return IngestResult(index, path, digest, result, latency=time.perf_counter() - start,
+                                size=size, uploaded_size=uploaded)
+
+        source = iter(enumerate(files))
+        try:
+            with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+                pending = set()
+
+                def fill() -> None:
+                    while len(pending) < max_concurrency:
+                        for index, path in source:
+                            pending.add(executor.submit(run, index, path))
+                            break
+                        else:
+                            return
+
+                fill()
+                while pending:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        pending.discard(future)
+                        yield future.result()
+                    fill()
+        finally:
+            if owned:
+                record.close()
+
+    def get_test_prompts(
+        self,
+        agent_id: str,
+        raw: bool = False
+    ) -> Union[List[TestPrompt], List[Dict[str, Any]]]:
         """
         Get all test prompts (questions and expected answers) for an agent.
         
         Args:
             agent_id: ID of the agent
+            raw: Return decoded JSON dicts instead of TestPrompt objects
             
         Returns:
             List of test prompts with question and expected answer
         """
-        endpoint = f'/api/agents/{agent_id}/test-prompts'
-        response = self._make_request('GET', endpoint)
-        return response.json()
+        cache = self.prompt_cache
+        entry = cache.get(agent_id) if cache is not None else None
+        if entry is not None and entry.fresh:
+            prompts = entry.prompts
+        else:
+            call = api.prompts_request(agent_id, entry)
+            response = self.send(call.method, call.endpoint, call.route, **call.kwargs)
+            if response.status_code == 304 and entry is not None:
+                cache.touch(agent_id)
+                prompts = entry.prompts
+            else:
+                prompts = self._decode(response)
+                if cache is not None:
+                    cache.set(agent_id, prompts, response.headers.get('ETag'))
+        return api.prompts_result(prompts, raw, cached=cache is not None)
     
     def chat(
         self,
         agent_id: str,
-        message: str
-    ) -> Dict[str, Any]:
+        message: str,
+        raw: bool = False
+    ) -> Union[ChatReply, Dict[str, Any]]:
         """
         Send a chat message to an agent and get a response.
         This generates the response internally without using the agent's public URL.
@@ -180,21 +565,47 @@ class RippletideClient:
         Args:
             agent_id: ID of the agent
             message: Message to send to the agent
+            raw: Return the decoded JSON dict instead of a ChatReply
             
         Returns:
-            Dictionary containing agent response, session ID, etc.
+            ChatReply (or dict if raw) containing agent response, session ID, etc.
         """
-        endpoint = f'/api/agents/{agent_id}/chat'
-        payload = {'message': message}
-        response = self._make_request('POST', endpoint, json=payload)
-        return response.json()
+        call = api.chat_request(agent_id, message)
+        reply = self.request(call.method, call.endpoint, call.route, **call.kwargs)
+        return api.build_result(ChatReply, reply, raw)
+    
+    def chat_stream(
+        self,
+        agent_id: str,
+        message: str
+    ) -> ChatStream:
+        """
+        Send a chat message and stream the agent's answer as it is generated.
+        
+        Iterate over the returned stream to receive text chunks as they
+        arrive. Close it (or leave its ``with`` block) to cancel mid-stream
+        and free the connection.
+        
+        Args:
+            agent_id: ID of the agent
+            message: Message to send to the agent
+            
+        Returns:
+            ChatStream yielding incremental text chunks
+        """
+        call = api.chat_request(agent_id, message, stream=True)
+        response = self.send(call.method, call.endpoint, call.route, stream=True, **call.kwargs)
+        limiter = self.rate_limiter
+        return ChatStream(response, on_close=(lambda: limiter.release(call.route)) if limiter is not None else None)
     
     def evaluate(
         self,
         agent_id: str,
         question: str,
-        expected_answer: Optional[str] = None
-    ) -> Dict[str, Any]:
+        expected_answer: Optional[str] = None,
+        agent_version: Optional[str] = None,
+        raw: bool = False
+    ) -> Union[EvaluationReport, Dict[str, Any]]:
         """
         Simple evaluation endpoint - evaluates a question and returns a report.
         
@@ -202,15 +613,124 @@ class RippletideClient:
             agent_id: ID of the agent
             question: The question to evaluate
             expected_answer: Optional expected answer (will use knowledge base if not provided)
+            agent_version: Optional agent version for the evaluation cache; when omitted
+                and a cache is configured, a fingerprint of the agent is fetched instead
+            raw: Return the decoded JSON dict instead of an EvaluationReport
             
         Returns:
-            Dictionary containing evaluation report with label, justification, and facts
+            EvaluationReport (or dict if raw) with label, justification, and facts
         """
-        endpoint = f'/api/agents/{agent_id}/evaluate'
-        payload = {'question': question}
-        if expected_answer is not None:
-            payload['expectedAnswer'] = expected_answer
-        
-        response = self._make_request('POST', endpoint, json=payload)
-        return response.json()
+        cache = self.evaluation_cache
+        if cache is not None:
+            if agent_version is None:
+                agent_version = self._agent_fingerprint(agent_id)
+            key = cache.make_key(agent_id, question, expected_answer, agent_version)
+            cached = cache.get(key)
+            if cached is not None:
+                return api.build_result(EvaluationReport, cached, raw)
+
+        call = api.evaluate_request(agent_id, question, expected_answer)
+        result = self.request(call.method, call.endpoint, call.route, **call.kwargs)
+        if cache is not None:
+            cache.set(key, result)
+        return api.build_result(EvaluationReport, result, raw)
+
+    def _agent_fingerprint(self, agent_id: str) -> str:
+        """Version fingerprint of an agent's current configuration, memoised by the cache."""
+        cache = self.evaluation_cache
+        version = cache.get_fingerprint(agent_id)
+        if version is None:
+            call = api.agent_request(agent_id)
+            version = fingerprint(self.request(call.method, call.endpoint, call.route))
+            cache.set_fingerprint(agent_id, version)
+        return version
+
+    def evaluate_many(
+        self,
+        agent_id: str,
+        items: Iterable[EvaluationItem],
+        max_concurrency: int = 10,
+        concurrency_limiter: Optional[AdaptiveConcurrencyLimiter] = None,
+        raw: bool = False,
+        journal: Optional[RunJournal] = None
+    ) -> Iterator[BatchResult]:
+        """
+        Evaluate many questions concurrently over a bounded thread pool.
+
+        Results are yielded as they complete, not in input order; use
+        ``BatchResult.index`` to map them back. A failing item does not stop
+        the batch: its ``BatchResult.error`` is set and the rest keep running.
+
+        Args:
+            agent_id: ID of the agent
+            items: Questions, (question, expected_answer) pairs, or test prompt dicts
+            max_concurrency: Maximum number of evaluations in flight (default: 10)
+            concurrency_limiter: Optional adaptive limiter that replaces the fixed
+                max_concurrency and is fed the latency and outcome of each call
+            raw: Yield decoded JSON dicts instead of EvaluationReport objects
+            journal: Optional RunJournal; items it already holds are yielded from
+                it without calling the API, and each success is recorded to it
+
+        Yields:
+            BatchResult for each item, in completion order
+
+        Raises:
+            ValueError: If max_concurrency is less than 1
+        """
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+        return self._evaluate_many(agent_id, items, max_concurrency, concurrency_limiter, raw, journal)
+
+    def _evaluate_many(
+        self,
+        agent_id: str,
+        items: Iterable[EvaluationItem],
+        max_concurrency: int,
+        concurrency_limiter: Optional[AdaptiveConcurrencyLimiter],
+        raw: bool,
+        journal: Optional[RunJournal]
+    ) -> Iterator[BatchResult]:
+        limiter = concurrency_limiter
+        workers = limiter.max_limit if limiter is not None else max_concurrency
+
+        def run(index: int, item: EvaluationItem) -> BatchResult:
+            start = time.perf_counter()
+            try:
+                question, expected_answer = normalize_item(item)
+                result = self.evaluate(agent_id, question, expected_answer, raw=raw)
+            except Exception as e:
+                return BatchResult(index, item, error=e, latency=time.perf_counter() - start)
+            return BatchResult(index, item, result=result, latency=time.perf_counter() - start)
+
+        resumed: Deque[BatchResult] = deque()
+        source = resume_from_journal(agent_id, items, journal, raw, resumed)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            pending = set()
+
+            def fill() -> None:
+                # Only keep `limit` items submitted so large inputs are
+                # consumed lazily instead of being queued up front.
+                limit = limiter.limit if limiter is not None else max_concurrency
+                while len(pending) < limit:
+                    for index, item in source:
+                        pending.add(executor.submit(run, index, item))
+                        break
+                    else:
+                        return
 
+            fill()
+            while pending or resumed:
+                while resumed:
+                    yield resumed.popleft()
+                if not pending:
+                    break
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    pending.discard(future)
+                    outcome = future.result()
+                    if limiter is not None:
+                        limiter.record(outcome.latency, outcome.error)
+                    if journal is not None and outcome.ok:
+                        journal.record(agent_id, item_id(outcome.item), outcome.result, outcome.latency)
+                    yield outcome
+                fill()
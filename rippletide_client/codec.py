@@ -0,0 +1,92 @@
+"""
+Pluggable JSON encoding and decoding for request and response bodies.
+"""
+import json
+from typing import Any, Optional, Union
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:  # pragma: no cover - optional dependency
+    msgspec = None
+
+
+class JSONCodec:
+    """
+    Standard library JSON codec, and the interface other codecs implement.
+
+    ``dumps`` must return UTF-8 encoded bytes and ``loads`` must accept bytes
+    or str and raise ``ValueError`` on malformed input.
+    """
+
+    name = 'json'
+
+    def dumps(self, obj: Any) -> bytes:
+        return json.dumps(obj, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+    def loads(self, data: Union[bytes, str]) -> Any:
+        return json.loads(data)
+
+
+class OrjsonCodec(JSONCodec):
+    """Codec backed by ``orjson``."""
+
+    name = 'orjson'
+
+    def __init__(self):
+        if orjson is None:
+            raise ImportError("OrjsonCodec requires orjson. Install it with `pip install orjson`.")
+
+    def dumps(self, obj: Any) -> bytes:
+        return orjson.dumps(obj)
+
+    def loads(self, data: Union[bytes, str]) -> Any:
+        return orjson.loads(data)
+
+
+class MsgspecCodec(JSONCodec):
+    """Codec backed by ``msgspec``, reusing one encoder and decoder."""
+
+    name = 'msgspec'
+
+    def __init__(self):
+        if msgspec is None:
+            raise ImportError("MsgspecCodec requires msgspec. Install it with `pip install msgspec`.")
+        self._encoder = msgspec.json.Encoder()
+        self._decoder = msgspec.json.Decoder()
+
+    def dumps(self, obj: Any) -> bytes:
+        return self._encoder.encode(obj)
+
+    def loads(self, data: Union[bytes, str]) -> Any:
+        try:
+            return self._decoder.decode(data)
+        except msgspec.DecodeError as e:
+            raise ValueError(str(e)) from e
+
+
+def default_codec(name: Optional[str] = None) -> JSONCodec:
+    """
+    Return a JSON codec, preferring the fastest one installed.
+
+    Args:
+        name: Force a specific codec ('orjson', 'msgspec' or 'json'); by default
+            orjson is used if installed, then msgspec, then the standard library
+
+    Returns:
+        JSONCodec instance
+    """
+    codecs = {'orjson': OrjsonCodec, 'msgspec': MsgspecCodec, 'json': JSONCodec}
+    if name is not None:
+        if name not in codecs:
+            raise ValueError(f"Unknown JSON codec {name!r}; expected one of {sorted(codecs)}")
+        return codecs[name]()
+    if orjson is not None:
+        return OrjsonCodec()
+    if msgspec is not None:
+        return MsgspecCodec()
+    return JSONCodec()
@@ -0,0 +1,163 @@
+"""
+Adaptive (AIMD) concurrency control for batch evaluation.
+"""
+import asyncio
+import math
+import sys
+import threading
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+import requests
+
+
+def percentile(values, q: float) -> float:
+    """Nearest-rank percentile of a non-empty sequence, with q in [0, 100]."""
+    ordered = sorted(values)
+    rank = max(1, math.ceil(q / 100.0 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def is_overload_error(error: BaseException) -> bool:
+    """
+    Whether an error suggests the backend is overloaded.
+
+    Connection errors, timeouts, 429 and 5xx responses count; other 4xx
+    responses are the caller's fault and say nothing about capacity, and
+    any other exception (a bad item, a decoding error) is not the backend's.
+    """
+    response = getattr(error, 'response', None)
+    status = getattr(response, 'status_code', None) or getattr(error, 'status', None)
+    if isinstance(status, int):
+        return status == 429 or status >= 500
+    if isinstance(error, (requests.ConnectionError, requests.Timeout, asyncio.TimeoutError)):
+        return True
+    # An aiohttp error can only exist once aiohttp is imported, so don't import it here
+    aiohttp = sys.modules.get('aiohttp')
+    return aiohttp is not None and isinstance(error, aiohttp.ClientConnectionError)
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    AIMD (additive increase, multiplicative decrease) concurrency limit.
+
+    The limit grows by roughly ``increase`` per round of ``limit`` successful
+    completions while the p95 latency of recent requests stays within
+    ``latency_tolerance`` of its baseline, and is multiplied by
+    ``decrease_factor`` when a request fails with an overload error or the
+    p95 latency grows past the tolerance. At most one decrease happens per
+    round, so a burst of failures from the same cohort of in-flight requests
+    only shrinks the limit once.
+
+    The current limit is exposed through :attr:`limit` and :meth:`stats` so it
+    can be exported as a metric.
+
+    Args:
+        initial_limit: Starting number of requests in flight (default: 4)
+        min_limit: Lower bound on the limit (default: 1)
+        max_limit: Upper bound on the limit, also the worker pool size (default: 64)
+        increase: Amount added to the limit per healthy round (default: 1)
+        decrease_factor: Multiplier applied on overload (default: 0.5)
+        latency_tolerance: Allowed p95 growth over baseline before backing off (default: 1.5)
+        window: Number of recent latencies used to compute p95 (default: 50)
+    """
+
+    # Completions required before p95 latency is considered meaningful
+    MIN_SAMPLES = 10
+
+    def __init__(
+        self,
+        initial_limit: int = 4,
+        min_limit: int = 1,
+        max_limit: int = 64,
+        increase: float = 1.0,
+        decrease_factor: float = 0.5,
+        latency_tolerance: float = 1.5,
+        window: int = 50
+    ):
+        if not 1 <= min_limit <= initial_limit <= max_limit:
+            raise ValueError("Limits must satisfy 1 <= min_limit <= initial_limit <= max_limit")
+        if not 0 < decrease_factor < 1:
+            raise ValueError("decrease_factor must be between 0 and 1")
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.increase = increase
+        self.decrease_factor = decrease_factor
+        self.latency_tolerance = latency_tolerance
+
+        self._limit = float(initial_limit)
+        self._latencies: Deque[float] = deque(maxlen=window)
+        self._baseline_p95: Optional[float] = None
+        self._since_decrease = initial_limit
+        self._since_check = 0
+        self._increases = 0
+        self._decreases = 0
+        self._lock = threading.Lock()
+
+    @property
+    def limit(self) -> int:
+        """Current number of requests allowed in flight."""
+        return int(self._limit)
+
+    def record(self, latency: float, error: Optional[BaseException] = None) -> None:
+        """
+        Feed the outcome of one completed request into the controller.
+
+        Args:
+            latency: Wall-clock duration of the request in seconds
+            error: Exception raised by the request, if any
+        """
+        with self._lock:
+            self._since_decrease += 1
+            if error is not None:
+                if is_overload_error(error):
+                    self._decrease()
+                return
+
+            self._latencies.append(latency)
+            self._since_check += 1
+            if self._since_check < max(self.limit, self.MIN_SAMPLES):
+                # Additive increase is spread over a round of `limit` completions
+                self._grow(self.increase / self._limit)
+                return
+
+            # Once per round, compare the window's p95 against the baseline
+            self._since_check = 0
+            p95 = percentile(self._latencies, 95)
+            if self._baseline_p95 is None or p95 < self._baseline_p95:
+                self._baseline_p95 = p95
+            elif p95 > self._baseline_p95 * self.latency_tolerance:
+                self._decrease()
+                return
+            else:
+                # Let the baseline creep up slowly so gradual drift is tolerated
+                self._baseline_p95 = 0.9 * self._baseline_p95 + 0.1 * p95
+            self._grow(self.increase / self._limit)
+
+    def _grow(self, amount: float) -> None:
+        before = self.limit
+        self._limit = min(float(self.max_limit), self._limit + amount)
+        if self.limit > before:
+            self._increases += 1
+
+    def _decrease(self) -> None:
+        if self._since_decrease < self.limit:
+            # Already backed off for this round of in-flight requests
+            return
+        self._since_decrease = 0
+        self._limit = max(float(self.min_limit), self._limit * self.decrease_factor)
+        self._decreases += 1
+        # Latencies measured at the old limit no longer describe the new one
+        self._latencies.clear()
+        self._since_check = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot of the controller state, suitable for metrics export."""
+        with self._lock:
+            return {
+                'limit': self.limit,
+                'p95_latency': percentile(self._latencies, 95) if self._latencies else None,
+                'baseline_p95_latency': self._baseline_p95,
+                'increases': self._increases,
+                'decreases': self._decreases,
+            }
@@ -0,0 +1,420 @@
+"""
+Many concurrent SDK chat conversations over one pooled transport.
+"""
+import asyncio
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Deque, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from .client import RippletideClient
+from .concurrency import percentile
+from .knowledge import SDK_BASE_URL, SDK_PREFIX
+
+CHAT_ROUTE = f'{SDK_PREFIX}/chat/{{agent_id}}'
+
+
+class ChatTurn(NamedTuple):
+    """
+    One completed turn of an SDK chat conversation.
+
+    Attributes:
+        conversation_id: The conversation's ``conversation_uuid``
+        turn: Position of the turn in its conversation, from 0
+        message: User message sent
+        answer: Agent's answer
+        latency: Seconds the request took
+        queued: Seconds the turn waited for earlier turns of its conversation
+            and for a free slot before it was sent
+        response: Decoded response body
+    """
+    conversation_id: str
+    turn: int
+    message: str
+    answer: Optional[str]
+    latency: float
+    queued: float
+    response: Dict[str, Any]
+
+
+class ConversationStats:
+    """
+    Latency record of one conversation.
+
+    Attributes:
+        conversation_id: The conversation's ``conversation_uuid``
+        turns: Completed turns, including failed ones
+        errors: Turns that raised
+        latencies: Seconds taken by each successful turn, in order
+    """
+
+    __slots__ = ('conversation_id', 'turns', 'errors', 'latencies')
+
+    def __init__(self, conversation_id: str):
+        self.conversation_id = conversation_id
+        self.turns = 0
+        self.errors = 0
+        self.latencies: List[float] = []
+
+    @property
+    def mean(self) -> Optional[float]:
+        return sum(self.latencies) / len(self.latencies) if self.latencies else None
+
+    @property
+    def last(self) -> Optional[float]:
+        return self.latencies[-1] if self.latencies else None
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Nearest-rank latency percentile, with q in [0, 100], or None before any success."""
+        return percentile(self.latencies, q) if self.latencies else None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'conversation_id': self.conversation_id,
+            'turns': self.turns,
+            'errors': self.errors,
+            'mean': self.mean,
+            'p50': self.percentile(50),
+            'p95': self.percentile(95),
+            'max': max(self.latencies) if self.latencies else None,
+        }
+
+    def __repr__(self) -> str:
+        return f"ConversationStats({self.conversation_id!r}, turns={self.turns}, errors={self.errors}, mean={self.mean})"
+
+
+class _ConversationBook:
+    """Per-conversation stats and turn numbering, shared by the sync and async pools."""
+
+    def __init__(self):
+        self._stats: Dict[str, ConversationStats] = {}
+        self._next_turn: Dict[str, int] = {}
+        self._book_lock = threading.Lock()
+
+    def _number_turn(self, conversation_id: str) -> int:
+        with self._book_lock:
+            turn = self._next_turn.get(conversation_id, 0)
+            self._next_turn[conversation_id] = turn + 1
+            if conversation_id not in self._stats:
+                self._stats[conversation_id] = ConversationStats(conversation_id)
+            return turn
+
+    def _record(self, conversation_id: str, latency: Optional[float]) -> None:
+        with self._book_lock:
+            stats = self._stats.get(conversation_id)
+            if stats is None:
+                # The conversation was ended while this turn was in flight
+                return
+            stats.turns += 1
+            if latency is None:
+                stats.errors += 1
+            else:
+                stats.latencies.append(latency)
+
+    @staticmethod
+    def new_conversation() -> str:
+        """A fresh ``conversation_uuid``."""
+        return str(uuid.uuid4())
+
+    def stats(self, conversation_id: str) -> Optional[ConversationStats]:
+        """Latency record of a conversation, or None if it has no turns."""
+        return self._stats.get(conversation_id)
+
+    def all_stats(self) -> Dict[str, ConversationStats]:
+        """Latency records of every conversation still held by the pool."""
+        with self._book_lock:
+            return dict(self._stats)
+
+    def end_conversation(self, conversation_id: str) -> Optional[ConversationStats]:
+        """
+        Forget a conversation, returning its final stats.
+
+        Long-running pools should end conversations they are done with so
+        their records do not accumulate. A later turn with the same ID starts
+        a new record numbered from 0.
+        """
+        with self._book_lock:
+            self._next_turn.pop(conversation_id, None)
+            return self._stats.pop(conversation_id, None)
+
+    def summary(self, q: Sequence[float] = (50, 95, 99), slowest: int = 5) -> Dict[str, Any]:
+        """
+        Latency over every turn of every conversation held by the pool.
+
+        Args:
+            q: Percentiles to compute, in [0, 100]
+            slowest: Number of conversations to list by highest mean latency
+
+        Returns:
+            Dict with conversations, turns, errors, mean, the requested
+            percentiles and the slowest conversations' stats
+        """
+        with self._book_lock:
+            records = list(self._stats.values())
+            latencies = [latency for stats in records for latency in stats.latencies]
+            ranked = sorted((stats for stats in records if stats.latencies), key=lambda s: s.mean, reverse=True)
+            return {
+                'conversations': len(records),
+                'turns': sum(stats.turns for stats in records),
+                'errors': sum(stats.errors for stats in records),
+                'mean': sum(latencies) / len(latencies) if latencies else None,
+                **{f'p{p:g}': percentile(latencies, p) if latencies else None for p in q},
+                'slowest': [stats.to_dict() for stats in ranked[:slowest]],
+            }
+
+
+def _answer(response: Any) -> Optional[str]:
+    return response.get('answer') if isinstance(response, dict) else None
+
+
+class ConversationPool(_ConversationBook):
+    """
+    Runs SDK chat conversations concurrently over one pooled client.
+
+    Turns of the same conversation are sent one after another, in the order
+    they were submitted, since each depends on the previous answer; turns of
+    different conversations run in parallel on up to ``max_in_flight``
+    threads sharing the client's connection pool. Any number of
+    conversations can be open at once: only the turns in flight hold a
+    thread or a connection.
+
+    Args:
+        agent_id: ID of the SDK agent to chat with
+        client: Client for the SDK API, with ``pool_maxsize`` of at least
+            ``max_in_flight`` (default: a RippletideClient for
+            $RIPPLETIDE_SDK_BASE_URL or https://agent.rippletide.com using
+            $RIPPLETIDE_API_KEY)
+        max_in_flight: Maximum turns in flight across all conversations (default: 32)
+    """
+
+    def __init__(self, agent_id: str, client: Optional[RippletideClient] = None, max_in_flight: int = 32):
+        if max_in_flight < 1:
+            raise ValueError("max_in_flight must be at least 1")
+        super().__init__()
+        self.owns_client = client is None
+        if client is None:
+            client = RippletideClient(
+                api_key=os.getenv('RIPPLETIDE_API_KEY'),
+                base_url=os.getenv('RIPPLETIDE_SDK_BASE_URL') or SDK_BASE_URL,
+                pool_maxsize=max_in_flight
+            )
+        self.agent_id = agent_id
+        self.client = client
+        self.max_in_flight = max_in_flight
+        self._endpoint = f'{SDK_PREFIX}/chat/{agent_id}'
+        self._executor = ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix='conversation')
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        # Turns waiting behind the one in flight, per conversation with a turn in flight
+        self._waiting: Dict[str, Deque[Tuple[str, Future, float]]] = {}
+        self._closed = False
+        self._cancelled = False
+
+    def send(self, message: str, conversation_id: Optional[str] = None) -> "Future[ChatTurn]":
+        """
+        Queue a turn and return at once.
+
+        Args:
+            message: User message
+            conversation_id: Conversation to continue (default: a new one)
+
+        Returns:
+            Future resolving to the ChatTurn, or to the exception the turn raised
+
+        Raises:
+            RuntimeError: If the pool is closed
+        """
+        conversation_id = conversation_id or self.new_conversation()
+        future: "Future[ChatTurn]" = Future()
+        queued_at = time.perf_counter()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("cannot send on a closed ConversationPool")
+            waiting = self._waiting.get(conversation_id)
+            if waiting is not None:
+                waiting.append((message, future, queued_at))
+                return future
+            self._waiting[conversation_id] = deque()
+            # Submitted under the lock so close() cannot shut the executor down in between
+            self._executor.submit(self._run, conversation_id, message, future, queued_at)
+        return future
+
+    def chat(self, message: str, conversation_id: Optional[str] = None) -> ChatTurn:
+        """
+        Send a turn and wait for the answer.
+
+        Args:
+            message: User message
+            conversation_id: Conversation to continue (default: a new one)
+
+        Returns:
+            ChatTurn with the agent's answer and the turn's latency
+        """
+        return self.send(message, conversation_id).result()
+
+    def _run(self, conversation_id: str, message: str, future: "Future[ChatTurn]", queued_at: float) -> None:
+        with self._lock:
+            if self._cancelled:
+                # Submitted just before close(wait=False); do not send it
+                future.cancel()
+        if future.set_running_or_notify_cancel():
+            start = time.perf_counter()
+            turn = self._number_turn(conversation_id)
+            try:
+                reply = self.client.request(
+                    'POST', self._endpoint, CHAT_ROUTE,
+                    json={'user_message': message, 'conversation_uuid': conversation_id}
+                )
+            except BaseException as e:
+                self._record(conversation_id, None)
+                future.set_exception(e)
+            else:
+                latency = time.perf_counter() - start
+                self._record(conversation_id, latency)
+                future.set_result(ChatTurn(
+                    conversation_id, turn, message, _answer(reply), latency, start - queued_at, reply
+                ))
+        with self._lock:
+            # The queue is gone if close(wait=False) cancelled it
+            waiting = self._waiting.get(conversation_id)
+            if not waiting:
+                self._waiting.pop(conversation_id, None)
+                if not self._waiting:
+                    self._idle.notify_all()
+                return
+            message, future, queued_at = waiting.popleft()
+            self._executor.submit(self._run, conversation_id, message, future, queued_at)
+
+    @property
+    def active(self) -> int:
+        """Conversations with a turn in flight or waiting."""
+        return len(self._waiting)
+
+    def close(self, wait: bool = True) -> None:
+        """
+        Stop the pool, closing the client if the pool created it.
+
+        Args:
+            wait: Wait for queued turns to finish; otherwise cancel those not yet
+                sent and return without waiting for the ones in flight
+        """
+        with self._lock:
+            self._closed = True
+            if wait:
+                # Finish every conversation first: each turn submits the next one
+                while self._waiting:
+                    self._idle.wait()
+            else:
+                self._cancelled = True
+                for waiting in self._waiting.values():
+                    for _, future, _ in waiting:
+                        future.cancel()
+                self._waiting.clear()
+        self._executor.shutdown(wait=wait)
+        if self.owns_client:
+            self.client.close()
+
+    def __enter__(self) -> "ConversationPool":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+
+class AsyncConversationPool(_ConversationBook):
+    """
+    Runs SDK chat conversations concurrently on one event loop.
+
+    The asyncio counterpart of :class:`ConversationPool`: turns of the same
+    conversation are sent in order, one at a time, and turns of different
+    conversations run in parallel, up to ``max_in_flight`` at once, over the
+    client's pooled connector. Thousands of conversations cost one small
+    record each rather than a thread.
+
+    Args:
+        agent_id: ID of the SDK agent to chat with
+        client: AsyncRippletideClient for the SDK API, with ``max_connections``
+            of at least ``max_in_flight`` (default: one for
+            $RIPPLETIDE_SDK_BASE_URL or https://agent.rippletide.com using
+            $RIPPLETIDE_API_KEY)
+        max_in_flight: Maximum turns in flight across all conversations (default: 100)
+    """
+
+    def __init__(self, agent_id: str, client: Optional["AsyncRippletideClient"] = None, max_in_flight: int = 100):
+        if max_in_flight < 1:
+            raise ValueError("max_in_flight must be at least 1")
+        super().__init__()
+        from .async_client import AsyncRippletideClient
+
+        self.owns_client = client is None
+        if client is None:
+            client = AsyncRippletideClient(
+                api_key=os.getenv('RIPPLETIDE_API_KEY'),
+                base_url=os.getenv('RIPPLETIDE_SDK_BASE_URL') or SDK_BASE_URL,
+                max_connections=max_in_flight
+            )
+        self.agent_id = agent_id
+        self.client = client
+        self.max_in_flight = max_in_flight
+        self._endpoint = f'{SDK_PREFIX}/chat/{agent_id}'
+        self._slots: Optional[asyncio.Semaphore] = None
+        # Per-conversation lock and the number of turns holding or waiting for it
+        self._conversations: Dict[str, Tuple[asyncio.Lock, int]] = {}
+
+    async def chat(self, message: str, conversation_id: Optional[str] = None) -> ChatTurn:
+        """
+        Send a turn once the conversation's previous turns are done, and wait for the answer.
+
+        Args:
+            message: User message
+            conversation_id: Conversation to continue (default: a new one)
+
+        Returns:
+            ChatTurn with the agent's answer and the turn's latency
+        """
+        conversation_id = conversation_id or self.new_conversation()
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_in_flight)
+        lock, users = self._conversations.get(conversation_id) or (asyncio.Lock(), 0)
+        self._conversations[conversation_id] = (lock, users + 1)
+        queued_at = time.perf_counter()
+        try:
+            async with lock, self._slots:
+                start = time.perf_counter()
+                turn = self._number_turn(conversation_id)
+                try:
+                    reply = await self.client.request(
+                        'POST', self._endpoint, CHAT_ROUTE,
+                        json={'user_message': message, 'conversation_uuid': conversation_id}
+                    )
+                except BaseException:
+                    self._record(conversation_id, None)
+                    raise
+                latency = time.perf_counter() - start
+                self._record(conversation_id, latency)
+                return ChatTurn(conversation_id, turn, message, _answer(reply), latency, start - queued_at, reply)
+        finally:
+            lock, users = self._conversations[conversation_id]
+            if users == 1:
+                del self._conversations[conversation_id]
+            else:
+                self._conversations[conversation_id] = (lock, users - 1)
+
+    @property
+    def active(self) -> int:
+        """Conversations with a turn in flight or waiting."""
+        return len(self._conversations)
+
+    async def close(self) -> None:
+        """Close the client if the pool created it."""
+        if self.owns_client:
+            await self.client.close()
+
+    async def __aenter__(self) -> "AsyncConversationPool":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.close()
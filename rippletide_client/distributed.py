@@ -0,0 +1,615 @@
+"""
+Multi-node evaluation: a coordinator that owns the prompt queue and workers
+that lease batches of prompts from it over HTTP.
+
+Start the coordinator on one host and any number of workers elsewhere, with
+the same shared secret in ``RIPPLETIDE_COORDINATOR_TOKEN`` on every node::
+
+    python -m rippletide_client.distributed coordinator --agent-id AGENT --host 0.0.0.0 --port 8765 -o report.json
+    python -m rippletide_client.distributed worker --coordinator http://coordinator-host:8765
+
+Protocol (JSON over HTTP, all POST except /status):
+
+    /lease      {"worker", "max_items"} -> {"lease_id", "agent_id", "items": [[index, item], ...],
+                "lease_timeout", "session_id"}, or {"items": [], "retry_after"} while every remaining
+                prompt is leased, or {"done": true} once the run is complete
+    /heartbeat  {"lease_id"} -> {"ok"}; extends the lease
+    /complete   {"lease_id", "results": [report rows]} -> {"accepted"}
+    /status     -> counts of pending, leased and completed prompts
+
+A lease that is neither completed nor extended within ``lease_timeout``
+seconds is expired and its unfinished prompts go back to the front of the
+queue, so a worker that dies only delays its batch. Workers without an API key
+evaluate in the coordinator's anonymous session, which owns the agent. A prompt whose evaluation
+errored goes to the back of the queue until it has been tried ``max_attempts``
+times; its last error is then kept as its result.
+"""
+import argparse
+import hmac
+import ipaddress
+import json
+import os
+import socket
+import sys
+import threading
+import time
+import uuid
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Deque, Dict, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+import requests
+
+from .batch import BatchResult, EvaluationItem, item_id
+from .client import RippletideClient
+from .codec import default_codec
+from .journal import RunJournal
+from .run import build_report, load_qanda, to_record
+
+TOKEN_HEADER = 'X-Coordinator-Token'
+
+
+def _is_loopback(host: str) -> bool:
+    """Whether listening on `host` only accepts connections from this machine."""
+    if host == 'localhost':
+        return True
+    try:
+        return ipaddress.ip_address(host.strip('[]')).is_loopback
+    except ValueError:
+        return False
+
+
+# Fields of each protocol request: name -> (accepted types, required)
+_REQUEST_FIELDS = {
+    '/lease': {'worker': ((str,), False), 'max_items': ((int,), False)},
+    '/heartbeat': {'lease_id': ((str,), True)},
+    '/complete': {'lease_id': ((str,), True), 'results': ((list,), True)},
+}
+_RESULT_FIELDS = {
+    'index': ((int,), True),
+    'id': ((str,), True),
+    'error': ((str,), False),
+    'result': ((dict,), False),
+    'latency': ((int, float), False),
+}
+
+
+def _invalid_fields(payload: Any, fields: Dict[str, Tuple[Tuple[type, ...], bool]]) -> Optional[str]:
+    """Describe why ``payload`` does not match ``fields``, or None if it does."""
+    if not isinstance(payload, dict):
+        return f'expected an object, got {type(payload).__name__}'
+    for name, (types, required) in fields.items():
+        value = payload.get(name)
+        if value is None:
+            if required:
+                return f'{name} is required'
+        elif not isinstance(value, types) or isinstance(value, bool):
+            return f'{name} must be {" or ".join(t.__name__ for t in types)}'
+    return None
+
+
+def _invalid_request(path: str, request: Any) -> Optional[str]:
+    """Describe why a protocol request body is malformed, or None if it is valid."""
+    error = _invalid_fields(request, _REQUEST_FIELDS[path])
+    if error is None and path == '/complete':
+        for n, record in enumerate(request['results']):
+            error = _invalid_fields(record, _RESULT_FIELDS)
+            if error is not None:
+                return f'results[{n}]: {error}'
+    return error
+
+
+class Lease(NamedTuple):
+    worker: str
+    indices: Tuple[int, ...]
+    deadline: float
+
+
+class Coordinator:
+    """
+    Owns the prompt queue and the results of a distributed run.
+
+    Args:
+        agent_id: ID of the agent being evaluated
+        items: Evaluation items (test prompt dicts, qanda entries, ...)
+        host: Interface to listen on (default: 127.0.0.1; use 0.0.0.0, with a
+            token, to accept workers on other hosts)
+        port: Port to listen on, 0 for any free port (default: 8765)
+        lease_timeout: Seconds a lease lasts without a heartbeat (default: 60)
+        max_lease_items: Upper bound on items handed out per lease (default: 100)
+        journal_path: Optional RunJournal file; prompts already in it are not
+            handed out and new successes are recorded to it
+        token: Shared secret workers must send; required unless host is a loopback address
+        max_attempts: Times a prompt is evaluated before an errored result is
+            accepted as final (default: 3)
+        session_id: Anonymous session owning the agent, sent to workers that
+            have no API key
+        linger: Seconds to keep answering "done" after the run completes, so
+            polling workers see it and exit (default: 3)
+    """
+
+    def __init__(
+        self,
+        agent_id: str,
+        items: Sequence[EvaluationItem],
+        host: str = '127.0.0.1',
+        port: int = 8765,
+        lease_timeout: float = 60.0,
+        max_lease_items: int = 100,
+        journal_path: Optional[str] = None,
+        token: Optional[str] = None,
+        max_attempts: int = 3,
+        session_id: Optional[str] = None,
+        linger: float = 3.0
+    ):
+        if token is None and not _is_loopback(host):
+            raise ValueError(
+                f"refusing to serve on {host} without a token: anyone who can reach it could "
+                "lease prompts and submit results"
+            )
+        if max_attempts < 1:
+            raise ValueError("max_attempts must be at least 1")
+        self.agent_id = agent_id
+        self.items = list(items)
+        self.lease_timeout = lease_timeout
+        self.max_lease_items = max_lease_items
+        self.token = token
+        self.max_attempts = max_attempts
+        self.session_id = session_id
+        self.linger = linger
+        self.codec = default_codec()
+
+        self._lock = threading.Lock()
+        self._finished = threading.Event()
+        self._records: Dict[int, Dict[str, Any]] = {}
+        self._leases: Dict[str, Lease] = {}
+        self._queue: Deque[int] = deque()
+        self._queued: Set[int] = set()
+        self._expired_leases = 0
+        self._attempts: Dict[int, int] = {}
+        self._retried_errors = 0
+        self._started_at: Optional[float] = None
+        self._thread: Optional[threading.Thread] = None
+
+        self.journal = RunJournal(journal_path) if journal_path is not None else None
+        self.resumed = 0
+        for index, item in enumerate(self.items):
+            entry = self.journal.get(agent_id, item_id(item)) if self.journal is not None else None
+            if entry is None:
+                self._queue.append(index)
+                self._queued.add(index)
+            else:
+                outcome = BatchResult(index, item, result=entry.result, latency=entry.latency)
+                self._records[index] = to_record(agent_id, outcome)
+                self.resumed += 1
+        if len(self._records) == len(self.items):
+            self._finished.set()
+
+        self.server = ThreadingHTTPServer((host, port), _handler_for(self))
+        self.server.daemon_threads = True
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        if host in ('0.0.0.0', ''):
+            host = socket.gethostname()
+        return f"http://{host}:{port}"
+
+    def start(self) -> "Coordinator":
+        """Start serving workers in a background thread."""
+        self._started_at = time.monotonic()
+        self._thread = threading.Thread(target=self.server.serve_forever, name='rippletide-coordinator', daemon=True)
+        self._thread.start()
+        return self
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until every prompt has a result; returns False on timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self._finished.is_set():
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return False
+            # Wake up periodically to expire leases even if no worker calls in
+            interval = min(self.lease_timeout / 4, 1.0)
+            self._finished.wait(interval if remaining is None else min(interval, remaining))
+            with self._lock:
+                self._expire_leases()
+        return True
+
+    def stop(self) -> None:
+        """Stop serving and close the journal."""
+        if self._thread is not None:
+            self.server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self.server.server_close()
+        if self.journal is not None:
+            self.journal.close()
+
+    def run(self) -> Dict[str, Any]:
+        """Serve until the run completes, linger, stop, and return the report."""
+        self.start()
+        try:
+            self.wait()
+            time.sleep(self.linger)
+        finally:
+            self.stop()
+        return self.report()
+
+    def __enter__(self) -> "Coordinator":
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.stop()
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'agent_id': self.agent_id,
+                'total': len(self.items),
+                'completed': len(self._records),
+                'pending': len(self._queue),
+                'leased': sum(len(lease.indices) for lease in self._leases.values()),
+                'leases': len(self._leases),
+                'expired_leases': self._expired_leases,
+                'retried_errors': self._retried_errors,
+                'done': self._finished.is_set(),
+            }
+
+    def report(self) -> Dict[str, Any]:
+        """Report of the results received so far (see :func:`run.build_report`)."""
+        with self._lock:
+            records = list(self._records.values())
+            workers = sorted({record.get('worker') for record in records if record.get('worker')})
+        duration = time.monotonic() - self._started_at if self._started_at is not None else None
+        return build_report(
+            self.agent_id,
+            records,
+            workers=workers,
+            resumed=self.resumed,
+            expired_leases=self._expired_leases,
+            retried_errors=self._retried_errors,
+            duration=duration
+        )
+
+    # Protocol handlers, called by the HTTP handler with the decoded request body
+
+    def lease(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        worker = str(request.get('worker') or 'unknown')
+        max_items = max(1, min(int(request.get('max_items') or self.max_lease_items), self.max_lease_items))
+        with self._lock:
+            self._expire_leases()
+            if self._finished.is_set():
+                return {'done': True}
+            indices = []
+            while self._queue and len(indices) < max_items:
+                index = self._queue.popleft()
+                self._queued.discard(index)
+                if index not in self._records:
+                    indices.append(index)
+            if not indices:
+                # Everything left is leased; poll again around the earliest expiry
+                next_expiry = min((lease.deadline for lease in self._leases.values()), default=time.monotonic())
+                return {'items': [], 'retry_after': max(0.1, min(next_expiry - time.monotonic(), 1.0))}
+            lease_id = uuid.uuid4().hex
+            self._leases[lease_id] = Lease(worker, tuple(indices), time.monotonic() + self.lease_timeout)
+        return {
+            'lease_id': lease_id,
+            'agent_id': self.agent_id,
+            'items': [[index, self.items[index]] for index in indices],
+            'lease_timeout': self.lease_timeout,
+            'session_id': self.session_id,
+        }
+
+    def heartbeat(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        with self._lock:
+            lease = self._leases.get(request.get('lease_id'))
+            if lease is None:
+                return {'ok': False}
+            self._leases[request['lease_id']] = lease._replace(deadline=time.monotonic() + self.lease_timeout)
+        return {'ok': True}
+
+    def complete(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        accepted = 0
+        with self._lock:
+            lease = self._leases.pop(request.get('lease_id'), None)
+            for record in request.get('results') or []:
+                index = record.get('index')
+                # Results of an expired lease are still welcome if nobody else finished them first
+                if not isinstance(index, int) or not 0 <= index < len(self.items) or index in self._records:
+                    continue
+                if record.get('error') is not None:
+                    attempts = self._attempts[index] = self._attempts.get(index, 0) + 1
+                    if attempts < self.max_attempts:
+                        # Retry after the rest of the queue rather than straight away
+                        self._retried_errors += 1
+                        if index not in self._queued:
+                            self._queue.append(index)
+                            self._queued.add(index)
+                        continue
+                self._records[index] = record
+                accepted += 1
+                if self.journal is not None and record.get('error') is None and record.get('result') is not None:
+                    self.journal.record(self.agent_id, record['id'], record['result'], record.get('latency'))
+            if lease is not None:
+                self._requeue(lease)
+            if len(self._records) == len(self.items):
+                self._finished.set()
+        return {'accepted': accepted}
+
+    def _requeue(self, lease: Lease) -> None:
+        # Put unfinished items at the front so they are retried first
+        for index in reversed(lease.indices):
+            if index not in self._records and index not in self._queued:
+                self._queue.appendleft(index)
+                self._queued.add(index)
+
+    def _expire_leases(self) -> None:
+        now = time.monotonic()
+        for lease_id, lease in list(self._leases.items()):
+            if lease.deadline <= now:
+                del self._leases[lease_id]
+                self._expired_leases += 1
+                self._requeue(lease)
+
+
+def _handler_for(coordinator: Coordinator):
+    routes = {
+        '/lease': coordinator.lease,
+        '/heartbeat': coordinator.heartbeat,
+        '/complete': coordinator.complete,
+    }
+    codec = coordinator.codec
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        # Send the body without waiting on the worker's delayed ACK
+        disable_nagle_algorithm = True
+
+        def log_message(self, format: str, *args: Any) -> None:
+            pass
+
+        def _reply(self, status: int, payload: Any) -> None:
+            body = codec.dumps(payload)
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _authorized(self) -> bool:
+            token = self.headers.get(TOKEN_HEADER) or ''
+            if coordinator.token is None or hmac.compare_digest(token.encode(), coordinator.token.encode()):
+                return True
+            self._reply(401, {'error': 'invalid coordinator token'})
+            return False
+
+        def do_GET(self) -> None:
+            if not self._authorized():
+                return
+            if self.path == '/status':
+                self._reply(200, coordinator.status())
+            else:
+                self._reply(404, {'error': f'unknown path {self.path}'})
+
+        def do_POST(self) -> None:
+            length = int(self.headers.get('Content-Length') or 0)
+            body = self.rfile.read(length)
+            if not self._authorized():
+                return
+            route = routes.get(self.path)
+            if route is None:
+                self._reply(404, {'error': f'unknown path {self.path}'})
+                return
+            try:
+                request = codec.loads(body) if body else {}
+            except ValueError as e:
+                self._reply(400, {'error': f'invalid JSON: {e}'})
+                return
+            error = _invalid_request(self.path, request)
+            if error is not None:
+                self._reply(400, {'error': error})
+                return
+            self._reply(200, route(request))
+
+    return Handler
+
+
+class Worker:
+    """
+    Leases batches from a coordinator and evaluates them with a pooled client.
+
+    Args:
+        coordinator_url: Base URL of the coordinator
+        client: Client used for evaluations (default: a new RippletideClient)
+        concurrency: Evaluations in flight (default: 10)
+        batch_size: Items requested per lease (default: 4 x concurrency)
+        name: Worker name reported to the coordinator (default: host:pid)
+        token: Shared secret expected by the coordinator
+        max_connect_failures: Consecutive failures to reach the coordinator
+            before giving up (default: 5)
+    """
+
+    def __init__(
+        self,
+        coordinator_url: str,
+        client: Optional[RippletideClient] = None,
+        concurrency: int = 10,
+        batch_size: Optional[int] = None,
+        name: Optional[str] = None,
+        token: Optional[str] = None,
+        max_connect_failures: int = 5
+    ):
+        self.coordinator_url = coordinator_url.rstrip('/')
+        self.client = client if client is not None else RippletideClient(pool_maxsize=concurrency)
+        self.concurrency = concurrency
+        self.batch_size = batch_size or concurrency * 4
+        self.name = name or f"{socket.gethostname()}:{os.getpid()}"
+        self.max_connect_failures = max_connect_failures
+        self.codec = default_codec()
+        self.session = requests.Session()
+        self.session.headers['Content-Type'] = 'application/json'
+        if token is not None:
+            self.session.headers[TOKEN_HEADER] = token
+        self.completed = 0
+
+    def _call(self, path: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        failures = 0
+        while True:
+            try:
+                response = self.session.post(
+                    f"{self.coordinator_url}{path}", data=self.codec.dumps(payload), timeout=(5, 30)
+                )
+                response.raise_for_status()
+                return self.codec.loads(response.content)
+            except requests.RequestException:
+                failures += 1
+                if failures >= self.max_connect_failures:
+                    raise
+                time.sleep(min(2 ** failures * 0.1, 5.0))
+
+    def _heartbeat(self, lease_id: str, interval: float, stop: threading.Event) -> None:
+        while not stop.wait(interval):
+            try:
+                self._call('/heartbeat', {'lease_id': lease_id})
+            except requests.RequestException:
+                pass
+
+    def _join_session(self, session_id: Optional[str]) -> None:
+        # Anonymous agents are only visible to the session that created them
+        client = self.client
+        if session_id and not client.api_key and client.session_id != session_id:
+            client.session_id = session_id
+            client.session.headers['X-Session-Id'] = session_id
+
+    def run_lease(self, lease: Dict[str, Any]) -> int:
+        """Evaluate one lease and report its results; returns the number of items."""
+        self._join_session(lease.get('session_id'))
+        agent_id = lease['agent_id']
+        indices = [index for index, _ in lease['items']]
+        items = [item for _, item in lease['items']]
+        stop = threading.Event()
+        heartbeat = threading.Thread(
+            target=self._heartbeat,
+            args=(lease['lease_id'], lease['lease_timeout'] / 3, stop),
+            daemon=True
+        )
+        heartbeat.start()
+        try:
+            records = []
+            for outcome in self.client.evaluate_many(agent_id, items, max_concurrency=self.concurrency, raw=True):
+                record = to_record(agent_id, outcome._replace(index=indices[outcome.index]))
+                record['worker'] = self.name
+                records.append(record)
+        finally:
+            stop.set()
+            heartbeat.join()
+        self._call('/complete', {'lease_id': lease['lease_id'], 'results': records})
+        self.completed += len(records)
+        return len(records)
+
+    def run(self) -> int:
+        """Lease and evaluate batches until the coordinator reports the run done."""
+        while True:
+            try:
+                lease = self._call('/lease', {'worker': self.name, 'max_items': self.batch_size})
+            except requests.RequestException:
+                if self.completed:
+                    # The coordinator finished and shut down after we last polled
+                    return self.completed
+                raise
+            if lease.get('done'):
+                return self.completed
+            if not lease.get('items'):
+                time.sleep(lease.get('retry_after', 1.0))
+                continue
+            self.run_lease(lease)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog='python -m rippletide_client.distributed',
+        description='Run an evaluation across several machines.'
+    )
+    parser.add_argument('--token', default=os.getenv('RIPPLETIDE_COORDINATOR_TOKEN'),
+                        help='shared secret between coordinator and workers (default: $RIPPLETIDE_COORDINATOR_TOKEN)')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    coordinator = commands.add_parser('coordinator', help='serve the prompt queue and collect results')
+    coordinator.add_argument('--agent-id', required=True, help='ID of the agent to evaluate')
+    coordinator.add_argument('--qanda', help='qanda.json file to evaluate instead of the agent\'s test prompts')
+    coordinator.add_argument('--host', default='127.0.0.1',
+                             help='interface to listen on; other than loopback requires --token (default: 127.0.0.1)')
+    coordinator.add_argument('--port', type=int, default=8765, help='port to listen on (default: 8765)')
+    coordinator.add_argument('--lease-timeout', type=float, default=60.0, help='seconds before an unrenewed lease is reassigned')
+    coordinator.add_argument('--max-attempts', type=int, default=3,
+                             help='evaluations of a prompt before its error is final (default: 3)')
+    coordinator.add_argument('--journal', help='RunJournal file used to resume an interrupted run')
+    coordinator.add_argument('--output', '-o', help='write the JSON report here (default: stdout)')
+    coordinator.add_argument('--api-key', default=os.getenv('RIPPLETIDE_API_KEY'), help='API key used to fetch test prompts')
+    coordinator.add_argument('--base-url', help='API base URL (default: $RIPPLETIDE_BASE_URL or the hosted backend)')
+    coordinator.add_argument('--session-id', help='anonymous session that owns the agent, when there is no API key')
+
+    worker = commands.add_parser('worker', help='lease prompts from a coordinator and evaluate them')
+    worker.add_argument('--coordinator', required=True, help='coordinator URL, e.g. http://host:8765')
+    worker.add_argument('--concurrency', type=int, default=10, help='evaluations in flight (default: 10)')
+    worker.add_argument('--batch-size', type=int, help='items per lease (default: 4 x concurrency)')
+    worker.add_argument('--api-key', default=os.getenv('RIPPLETIDE_API_KEY'), help='API key (default: $RIPPLETIDE_API_KEY)')
+    worker.add_argument('--base-url', help='API base URL (default: $RIPPLETIDE_BASE_URL or the hosted backend)')
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'coordinator':
+        if args.token is None and not _is_loopback(args.host):
+            parser.error(f'--token (or $RIPPLETIDE_COORDINATOR_TOKEN) is required to listen on {args.host}')
+        if args.max_attempts < 1:
+            parser.error('--max-attempts must be at least 1')
+
+    if args.command == 'worker':
+        client = RippletideClient(api_key=args.api_key, base_url=args.base_url, pool_maxsize=args.concurrency)
+        with client:
+            count = Worker(
+                args.coordinator, client, concurrency=args.concurrency, batch_size=args.batch_size, token=args.token
+            ).run()
+        print(f"Worker evaluated {count} prompts", file=sys.stderr)
+        return 0
+
+    with RippletideClient(api_key=args.api_key, base_url=args.base_url, session_id=args.session_id) as client:
+        if args.qanda:
+            try:
+                items = load_qanda(args.qanda)
+            except (OSError, ValueError) as e:
+                parser.error(f"cannot read {args.qanda}: {e}")
+        else:
+            items = client.get_test_prompts(args.agent_id, raw=True)
+
+    coordinator = Coordinator(
+        args.agent_id,
+        items,
+        host=args.host,
+        port=args.port,
+        lease_timeout=args.lease_timeout,
+        journal_path=args.journal,
+        token=args.token,
+        max_attempts=args.max_attempts,
+        session_id=client.session_id
+    )
+    print(f"Coordinating {len(items)} prompts on {coordinator.url}", file=sys.stderr)
+    report = coordinator.run()
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        sys.stdout.write('\n')
+    print(
+        f"Evaluated {report['total']} prompts on {len(report['workers'])} workers: "
+        f"{report['passed']} passed, {report['failed']} failed, {report['errors']} errors",
+        file=sys.stderr
+    )
+    return 1 if report['errors'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
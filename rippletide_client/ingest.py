@@ -0,0 +1,281 @@
+"""
+Bulk PDF ingestion helpers: file discovery, content hashing and a manifest of ingested files.
+"""
+import glob
+import hashlib
+import mmap
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple, Union
+
+from .codec import JSONCodec, default_codec
+from .journal import read_records
+
+# Files, directories (searched for *.pdf) and glob patterns accepted by ingest_pdfs
+PathsOrGlob = Union[str, Path, Iterable[Union[str, Path]]]
+
+# Block size used to hash files that cannot be memory-mapped
+HASH_BLOCK_SIZE = 1024 * 1024
+
+
+def file_digest(path: Union[str, Path]) -> str:
+    """
+    SHA-256 of a file's contents, as a hex string.
+
+    The file is memory-mapped and hashed in one call, which avoids copying it
+    through Python buffers and releases the GIL, so several files can be
+    hashed in parallel threads. Files that cannot be mapped are read in blocks.
+
+    Args:
+        path: File to hash
+
+    Returns:
+        Hex digest of the contents
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        try:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                digest.update(mapped)
+            return digest.hexdigest()
+        except (OSError, ValueError):
+            # Empty files and special files cannot be mapped
+            pass
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def resolve_pdf_paths(paths_or_glob: PathsOrGlob) -> List[Path]:
+    """
+    Expand files, directories and glob patterns into a list of files.
+
+    Args:
+        paths_or_glob: A path or glob pattern (``**`` matches subdirectories),
+            or an iterable of them; directories contribute the ``*.pdf`` files
+            directly inside them
+
+    Returns:
+        Matching files in a stable order, without duplicates
+
+    Raises:
+        FileNotFoundError: If a path that is not a pattern does not exist
+    """
+    entries = [paths_or_glob] if isinstance(paths_or_glob, (str, Path)) else list(paths_or_glob)
+    found: Dict[Path, None] = {}
+    for entry in entries:
+        text = str(entry)
+        if glob.has_magic(text):
+            matches = [Path(match) for match in sorted(glob.glob(text, recursive=True))]
+        elif Path(text).is_dir():
+            matches = sorted(p for p in Path(text).iterdir() if p.suffix.lower() == '.pdf')
+        elif Path(text).exists():
+            matches = [Path(text)]
+        else:
+            raise FileNotFoundError(f"No such file or directory: {text}")
+        for match in matches:
+            if match.is_file():
+                found.setdefault(match, None)
+    return list(found)
+
+
+class IngestResult(NamedTuple):
+    """
+    Outcome of one file in a bulk PDF ingestion.
+
+    Attributes:
+        index: Position of the file in the resolved file list
+        path: The file
+        digest: SHA-256 of its contents, or None if it could not be read
+        result: Upload response, or the recorded one for a skipped file; None if the upload failed
+        error: Exception raised while hashing or uploading, or None on success
+        skipped: Whether the file was not uploaded because the agent already has its contents
+        latency: Seconds spent hashing, pre-processing and uploading the file
+        size: File size in bytes
+        uploaded_size: Bytes of PDF actually uploaded, smaller than size when pre-processing shrank it
+    """
+    index: int
+    path: Path
+    digest: Optional[str] = None
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[BaseException] = None
+    skipped: bool = False
+    latency: Optional[float] = None
+    size: Optional[int] = None
+    uploaded_size: Optional[int] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    @property
+    def saved(self) -> int:
+        """Upload bytes saved by pre-processing."""
+        if self.size is None or self.uploaded_size is None:
+            return 0
+        return self.size - self.uploaded_size
+
+    @property
+    def qa_pairs(self) -> List[Dict[str, Any]]:
+        """Q&A pairs returned by the server for this file, if it returns them."""
+        return list((self.result or {}).get('qaPairs') or [])
+
+    @property
+    def pairs_stored(self) -> Optional[int]:
+        """Number of Q&A pairs the server reported extracting."""
+        knowledge = (self.result or {}).get('knowledge') or {}
+        if 'qaPairsStored' in knowledge:
+            return knowledge['qaPairsStored']
+        return len(self.qa_pairs) if self.result and 'qaPairs' in self.result else None
+
+
+class ManifestEntry(NamedTuple):
+    path: str
+    size: int
+    result: Optional[Dict[str, Any]]
+    ingested_at: float
+
+
+def default_manifest_path() -> Path:
+    """``$XDG_CACHE_HOME/rippletide/ingested.jsonl``, defaulting to ``~/.cache``."""
+    cache = os.getenv('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return Path(cache) / 'rippletide' / 'ingested.jsonl'
+
+
+class IngestManifest:
+    """
+    JSONL record of the files each agent has ingested, keyed by content hash.
+
+    Renamed or moved copies of a file are recognised by their hash, and a
+    changed file is ingested again. Records are appended and flushed as each
+    upload succeeds, so an interrupted ingestion resumes where it stopped; a
+    torn final line is discarded on open and corrupted lines are skipped.
+
+    Args:
+        path: Manifest file; created if it does not exist (default: ``default_manifest_path()``)
+        json_codec: JSON codec for records (default: orjson or msgspec if installed, else json)
+    """
+
+    def __init__(self, path: Optional[Union[str, Path]] = None, json_codec: Optional[JSONCodec] = None):
+        self.path = Path(path) if path is not None else default_manifest_path()
+        self.json_codec = json_codec if json_codec is not None else default_codec()
+        self._entries: Dict[Tuple[str, str], ManifestEntry] = {}
+        self._lock = threading.Lock()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._load()
+        self._file = open(self.path, 'ab')
+
+    def _load(self) -> None:
+        required = ('agent', 'sha256', 'path', 'size', 'ingested_at')
+        for record in read_records(self.path, self.json_codec, required):
+            self._entries[(record['agent'], record['sha256'])] = ManifestEntry(
+                record['path'], record['size'], record.get('result'), record['ingested_at']
+            )
+
+    def get(self, agent_id: str, digest: str) -> Optional[ManifestEntry]:
+        """Return the record of a file the agent has already ingested, or None."""
+        return self._entries.get((agent_id, digest))
+
+    def record(
+        self,
+        agent_id: str,
+        digest: str,
+        path: Union[str, Path],
+        size: int,
+        result: Optional[Dict[str, Any]] = None
+    ) -> None:
+        """
+        Append a successfully ingested file.
+
+        Args:
+            agent_id: ID of the agent the file was uploaded to
+            digest: SHA-256 of the file (see ``file_digest``)
+            path: Where the file was read from
+            size: File size in bytes
+            result: Upload response
+        """
+        entry = ManifestEntry(str(path), size, result, time.time())
+        line = self.json_codec.dumps({
+            'agent': agent_id,
+            'sha256': digest,
+            'path': entry.path,
+            'size': size,
+            'result': result,
+            'ingested_at': entry.ingested_at,
+        }) + b'\n'
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+            self._entries[(agent_id, digest)] = entry
+
+    def close(self) -> None:
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+
+    def __enter__(self) -> "IngestManifest":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class UploadClaims:
+    """
+    Content hashes being uploaded in the current run, so duplicate files upload once.
+
+    Later copies of a file wait for the copy that claimed its hash: they are
+    skipped with its result if the upload succeeds, and one of them claims
+    the hash and uploads it if it fails.
+
+    Args:
+        event_factory: Creates the event waiters block on, ``threading.Event``
+            for worker threads or ``asyncio.Event`` for tasks on one loop
+    """
+
+    def __init__(self, event_factory: Callable[[], Any] = threading.Event):
+        self._event_factory = event_factory
+        self._claims: Dict[str, Tuple[int, Any]] = {}
+        self._uploaded: Dict[str, Optional[Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+
+    def claim(self, digest: str, index: int) -> Optional[Any]:
+        """
+        Claim `digest` for the file at `index`.
+
+        Returns:
+            None if the caller now owns the upload, otherwise an event that is
+            set once the current owner finishes; call ``uploaded`` after it
+            is set, and claim again if the upload failed
+        """
+        with self._lock:
+            claimant = self._claims.get(digest)
+            if claimant is None:
+                self._claims[digest] = (index, self._event_factory())
+                return None
+            return claimant[1]
+
+    def uploaded(self, digest: str) -> Tuple[bool, Optional[Dict[str, Any]]]:
+        """Whether `digest` was uploaded in this run, and the upload response."""
+        with self._lock:
+            return digest in self._uploaded, self._uploaded.get(digest)
+
+    def settle(self, digest: str, index: int, result: Optional[Dict[str, Any]]) -> None:
+        """Record the owner's successful upload and wake the copies waiting for it."""
+        with self._lock:
+            self._uploaded[digest] = result
+            self._claims[digest][1].set()
+
+    def release(self, digest: str, index: int) -> None:
+        # A failed upload lets a waiting copy of the same file try again
+        with self._lock:
+            claimant = self._claims.get(digest)
+            if claimant is not None and claimant[0] == index:
+                del self._claims[digest]
+                claimant[1].set()
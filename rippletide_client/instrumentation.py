@@ -0,0 +1,308 @@
+"""
+Per-request instrumentation hooks and an in-memory histogram collector.
+"""
+import bisect
+import math
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+# Request duration buckets in seconds, from fast cached reads to slow evaluations
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+# Timings a request can report, in the order they happen
+PHASES = ('dns', 'connect', 'tls', 'server', 'transfer', 'decode')
+
+
+class RequestInfo:
+    """
+    One HTTP attempt, as seen by instrumentation hooks.
+
+    The same object is passed to ``on_request_start`` and then to either
+    ``on_response`` or ``on_error``, filled in as the attempt progresses.
+
+    Attributes:
+        method: HTTP method
+        route: Endpoint template, e.g. ``/api/agents/{agent_id}/evaluate``
+        endpoint: Endpoint actually requested
+        retries: Retries before this attempt (0 for the first)
+        bytes_out: Request body size, when known
+        bytes_in: Response body size, when known
+        status: Response status, or None if no response was received
+        error: Exception raised by the attempt, for ``on_error``
+        will_retry: Whether the client is going to retry after this attempt
+        timings: Seconds spent per phase. 'dns', 'connect' and 'tls' are only
+            present when a new connection was opened; 'server' runs until the
+            response headers arrive; 'transfer' is reading the body (plus the
+            HTTP library's own overhead); 'decode' is only present when a JSON
+            body was decoded; 'total' covers the whole attempt
+        started_at: ``time.time()`` when the attempt started
+    """
+
+    __slots__ = (
+        'method', 'route', 'endpoint', 'retries', 'bytes_out', 'bytes_in', 'status', 'error',
+        'will_retry', 'timings', 'started_at', '_start'
+    )
+
+    def __init__(self, method: str, route: str, endpoint: str, retries: int = 0, bytes_out: Optional[int] = None):
+        self.method = method
+        self.route = route
+        self.endpoint = endpoint
+        self.retries = retries
+        self.bytes_out = bytes_out
+        self.bytes_in: Optional[int] = None
+        self.status: Optional[int] = None
+        self.error: Optional[BaseException] = None
+        self.will_retry = False
+        self.timings: Dict[str, float] = {}
+        self.started_at = time.time()
+        self._start = time.perf_counter()
+
+    def elapsed(self) -> float:
+        """Seconds since the attempt started."""
+        return time.perf_counter() - self._start
+
+    def __repr__(self) -> str:
+        return (
+            f"RequestInfo({self.method} {self.route} status={self.status} retries={self.retries} "
+            f"timings={ {k: round(v, 6) for k, v in self.timings.items()} })"
+        )
+
+
+class InstrumentationHook:
+    """
+    Receives per-request events from a client.
+
+    Subclass and override any of the callbacks, then pass instances as the
+    client's ``hooks``. Callbacks run on the thread or event loop making the
+    request, so they should be quick; exceptions they raise propagate to the
+    caller.
+    """
+
+    def on_request_start(self, info: RequestInfo) -> None:
+        """Called before each attempt is sent."""
+
+    def on_response(self, info: RequestInfo) -> None:
+        """Called when an attempt received a response, whatever its status."""
+
+    def on_error(self, info: RequestInfo) -> None:
+        """Called when an attempt failed without a response (connection error, timeout)."""
+
+
+def body_size(data: Any) -> Optional[int]:
+    """Size of a request body if it can be known without reading it."""
+    if data is None:
+        return 0
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        return len(data)
+    if isinstance(data, str):
+        return len(data.encode('utf-8'))
+    length = getattr(data, 'len', None)
+    return length if isinstance(length, int) else None
+
+
+class Histogram:
+    """
+    Cumulative-bucket histogram, as exposed by Prometheus.
+
+    Args:
+        buckets: Sorted upper bounds of the buckets; +Inf is implied
+    """
+
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        Estimate a quantile by linear interpolation within its bucket.
+
+        Args:
+            q: Quantile in [0, 1]
+
+        Returns:
+            Estimated value, the largest finite bound if it falls in the +Inf
+            bucket, or None if nothing was observed
+        """
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                if i == len(self.buckets):
+                    return self.buckets[-1]
+                lower = self.buckets[i - 1] if i else 0.0
+                return lower + (self.buckets[i] - lower) * (rank - seen) / count
+            seen += count
+        return self.buckets[-1]
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _labels(**labels: Any) -> str:
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + '}'
+
+
+def _number(value: float) -> str:
+    if math.isinf(value):
+        return '+Inf'
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class HistogramCollector(InstrumentationHook):
+    """
+    In-memory metrics of every request, grouped by endpoint template.
+
+    Keeps a duration histogram per (method, route, status), a histogram per
+    (route, phase) for the DNS/connect/TLS/server/transfer/decode timings, and
+    byte, retry and error counters. Read them with :meth:`summary` to find
+    slow endpoints, or serve :meth:`to_prometheus` from a metrics endpoint.
+
+    Args:
+        buckets: Histogram bucket upper bounds in seconds (default: 5ms to 120s)
+        namespace: Prefix of the exported metric names (default: rippletide_client)
+    """
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS, namespace: str = 'rippletide_client'):
+        self.buckets = tuple(sorted(buckets))
+        self.namespace = namespace
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        """Forget everything collected so far."""
+        with self._lock:
+            self._durations: Dict[Tuple[str, str, str], Histogram] = {}
+            self._phases: Dict[Tuple[str, str], Histogram] = {}
+            self._bytes: Dict[Tuple[str, str], int] = {}
+            self._retries: Dict[str, int] = {}
+            self._errors: Dict[Tuple[str, str], int] = {}
+
+    def _record(self, info: RequestInfo, status: str) -> None:
+        total = info.timings.get('total', info.elapsed())
+        with self._lock:
+            key = (info.method, info.route, status)
+            histogram = self._durations.get(key)
+            if histogram is None:
+                histogram = self._durations[key] = Histogram(self.buckets)
+            histogram.observe(total)
+            for phase in PHASES:
+                value = info.timings.get(phase)
+                if value is None:
+                    continue
+                histogram = self._phases.get((info.route, phase))
+                if histogram is None:
+                    histogram = self._phases[(info.route, phase)] = Histogram(self.buckets)
+                histogram.observe(value)
+            for direction, size in (('out', info.bytes_out), ('in', info.bytes_in)):
+                if size:
+                    self._bytes[(info.route, direction)] = self._bytes.get((info.route, direction), 0) + size
+            if info.retries:
+                self._retries[info.route] = self._retries.get(info.route, 0) + 1
+
+    def on_response(self, info: RequestInfo) -> None:
+        self._record(info, str(info.status))
+
+    def on_error(self, info: RequestInfo) -> None:
+        self._record(info, 'error')
+        with self._lock:
+            key = (info.route, type(info.error).__name__)
+            self._errors[key] = self._errors.get(key, 0) + 1
+
+    def summary(self, q: Sequence[float] = (0.5, 0.95, 0.99)) -> List[Dict[str, Any]]:
+        """
+        Per-route request counts, estimated latency quantiles and mean phase times.
+
+        Args:
+            q: Quantiles to estimate, in [0, 1]
+
+        Returns:
+            One dict per (method, route), slowest (by the highest quantile) first
+        """
+        with self._lock:
+            routes: Dict[Tuple[str, str], Histogram] = {}
+            statuses: Dict[Tuple[str, str], Dict[str, int]] = {}
+            for (method, route, status), histogram in self._durations.items():
+                merged = routes.get((method, route))
+                if merged is None:
+                    merged = routes[(method, route)] = Histogram(self.buckets)
+                merged.counts = [a + b for a, b in zip(merged.counts, histogram.counts)]
+                merged.sum += histogram.sum
+                merged.count += histogram.count
+                statuses.setdefault((method, route), {})[status] = histogram.count
+            phases = {key: (h.sum / h.count) for key, h in self._phases.items() if h.count}
+            rows = []
+            for (method, route), histogram in routes.items():
+                rows.append({
+                    'method': method,
+                    'route': route,
+                    'count': histogram.count,
+                    'statuses': statuses[(method, route)],
+                    'mean': histogram.sum / histogram.count,
+                    **{f'p{quantile * 100:g}': histogram.quantile(quantile) for quantile in q},
+                    'phases': {phase: phases[(route, phase)] for phase in PHASES if (route, phase) in phases},
+                    'retries': self._retries.get(route, 0),
+                })
+        key = f'p{max(q) * 100:g}' if q else 'mean'
+        return sorted(rows, key=lambda row: row[key] or 0, reverse=True)
+
+    def to_prometheus(self) -> str:
+        """Render the metrics in the Prometheus text exposition format."""
+        ns = self.namespace
+        lines: List[str] = []
+
+        def histogram_lines(name: str, histogram: Histogram, **labels: Any) -> None:
+            cumulative = 0
+            for bound, count in zip(histogram.buckets + (math.inf,), histogram.counts):
+                cumulative += count
+                lines.append(f'{name}_bucket{_labels(**labels, le=_number(bound))} {cumulative}')
+            lines.append(f'{name}_sum{_labels(**labels)} {_number(histogram.sum)}')
+            lines.append(f'{name}_count{_labels(**labels)} {histogram.count}')
+
+        with self._lock:
+            lines += [
+                f'# HELP {ns}_request_duration_seconds Duration of HTTP attempts by endpoint template.',
+                f'# TYPE {ns}_request_duration_seconds histogram',
+            ]
+            for (method, route, status), histogram in sorted(self._durations.items()):
+                histogram_lines(f'{ns}_request_duration_seconds', histogram, method=method, route=route, status=status)
+            lines += [
+                f'# HELP {ns}_request_phase_seconds Time spent per phase of HTTP attempts.',
+                f'# TYPE {ns}_request_phase_seconds histogram',
+            ]
+            for (route, phase), histogram in sorted(self._phases.items()):
+                histogram_lines(f'{ns}_request_phase_seconds', histogram, route=route, phase=phase)
+            lines += [
+                f'# HELP {ns}_request_bytes_total Request and response body bytes.',
+                f'# TYPE {ns}_request_bytes_total counter',
+            ]
+            lines += [
+                f'{ns}_request_bytes_total{_labels(route=route, direction=direction)} {size}'
+                for (route, direction), size in sorted(self._bytes.items())
+            ]
+            lines += [
+                f'# HELP {ns}_retries_total Retried HTTP attempts.',
+                f'# TYPE {ns}_retries_total counter',
+            ]
+            lines += [f'{ns}_retries_total{_labels(route=route)} {count}' for route, count in sorted(self._retries.items())]
+            lines += [
+                f'# HELP {ns}_errors_total HTTP attempts that failed without a response.',
+                f'# TYPE {ns}_errors_total counter',
+            ]
+            lines += [
+                f'{ns}_errors_total{_labels(route=route, error=error)} {count}'
+                for (route, error), count in sorted(self._errors.items())
+            ]
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,163 @@
+"""
+Append-only journal of completed evaluations, so interrupted runs can resume.
+"""
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, NamedTuple, Optional, Tuple, Union
+
+from .codec import JSONCodec, default_codec
+from .models import Model
+
+logger = logging.getLogger(__name__)
+
+
+def read_records(path: Path, json_codec: JSONCodec, required: Tuple[str, ...] = ()) -> Iterator[Dict[str, Any]]:
+    """
+    Yield the records of an append-only JSONL file and repair it for appending.
+
+    A final line without a newline was torn by an interrupted write and is
+    truncated so new records start on a clean line. Any other line that does
+    not decode to an object with the `required` keys is skipped with a
+    warning; the records after it are still loaded.
+
+    Args:
+        path: JSONL file; nothing is yielded if it does not exist
+        json_codec: Codec used to decode each line
+        required: Keys every record must have
+    """
+    if not path.exists():
+        return
+    with open(path, 'rb+') as f:
+        end = 0
+        for number, line in enumerate(f, 1):
+            if not line.endswith(b'\n'):
+                f.truncate(end)
+                return
+            end += len(line)
+            try:
+                record = json_codec.loads(line)
+            except ValueError:
+                record = None
+            if not isinstance(record, dict) or any(key not in record for key in required):
+                logger.warning("Skipping malformed record on line %d of %s", number, path)
+                continue
+            yield record
+
+
+class JournalEntry(NamedTuple):
+    result: Dict[str, Any]
+    latency: Optional[float]
+
+
+class RunJournal:
+    """
+    JSONL journal recording each completed (agent, prompt id, result).
+
+    Every record is written and flushed to the OS immediately, so it survives
+    the process crashing; ``fsync`` is issued at most once per
+    ``fsync_interval`` seconds, bounding what a power loss or kernel crash can
+    lose. On open, existing records are loaded, a torn final line from an
+    interrupted write is discarded and corrupted lines are skipped.
+
+    Pass the journal to ``evaluate_many`` to skip prompts already completed
+    by a previous run.
+
+    Args:
+        path: Journal file; created if it does not exist
+        fsync_interval: Seconds between fsyncs; 0 syncs every record and None
+            leaves syncing to the OS (default: 1.0)
+        json_codec: JSON codec for records (default: orjson or msgspec if installed, else json)
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        fsync_interval: Optional[float] = 1.0,
+        json_codec: Optional[JSONCodec] = None
+    ):
+        self.path = Path(path)
+        self.fsync_interval = fsync_interval
+        self.json_codec = json_codec if json_codec is not None else default_codec()
+        self._entries: Dict[Tuple[str, str], JournalEntry] = {}
+        self._lock = threading.Lock()
+        self._dirty = False
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._load()
+        self._file = open(self.path, 'ab')
+        self._last_sync = time.monotonic()
+
+    def _load(self) -> None:
+        for record in read_records(self.path, self.json_codec, ('agent', 'id', 'result')):
+            self._entries[(record['agent'], record['id'])] = JournalEntry(
+                record['result'], record.get('latency')
+            )
+
+    def get(self, agent_id: str, prompt_id: str) -> Optional[JournalEntry]:
+        """Return the recorded result for a prompt, or None if it has not completed."""
+        return self._entries.get((agent_id, prompt_id))
+
+    def record(
+        self,
+        agent_id: str,
+        prompt_id: str,
+        result: Union[Model, Dict[str, Any]],
+        latency: Optional[float] = None
+    ) -> None:
+        """
+        Append a completed evaluation.
+
+        Args:
+            agent_id: ID of the evaluated agent
+            prompt_id: Stable identifier of the prompt (see ``batch.item_id``)
+            result: Evaluation report
+            latency: Duration of the call in seconds
+        """
+        if isinstance(result, Model):
+            result = result.to_dict()
+        line = self.json_codec.dumps({
+            'agent': agent_id,
+            'id': prompt_id,
+            'result': result,
+            'latency': latency,
+            'completed_at': time.time(),
+        }) + b'\n'
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+            self._entries[(agent_id, prompt_id)] = JournalEntry(result, latency)
+            self._dirty = True
+            interval = self.fsync_interval
+            if interval is not None and time.monotonic() - self._last_sync >= interval:
+                self._sync()
+
+    def _sync(self) -> None:
+        os.fsync(self._file.fileno())
+        self._last_sync = time.monotonic()
+        self._dirty = False
+
+    def sync(self) -> None:
+        """Force recorded entries to disk."""
+        with self._lock:
+            if self._dirty and not self._file.closed:
+                self._sync()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file.closed:
+                return
+            if self._dirty:
+                self._sync()
+            self._file.close()
+
+    def __enter__(self) -> "RunJournal":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self._entries)
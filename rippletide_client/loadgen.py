@@ -0,0 +1,606 @@
+"""
+Load generator: synthetic concurrent chat traffic against an agent.
+
+Simulates users holding multi-turn conversations, drawn from a qanda.json,
+with think time between turns. Load is either a fixed number of concurrent
+users (each starts a new conversation when one ends) or a target request
+rate (conversations arrive at random, at the rate that produces it).
+Traffic ramps up during a warm-up phase whose requests are not counted.
+The result is a latency histogram and a per-interval timeline of
+throughput, latency and errors::
+
+    python -m rippletide_client.loadgen --mock --users 200 --duration 60 --warmup 10
+    python -m rippletide_client.loadgen --agent-id ID --target sdk-chat --rps 50 \\
+        --qanda cli/qanda.json --think-time lognormal:2,10 -o run.json
+
+``--mock`` runs against the local mock backend (see ``mock_server``).
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Set, Tuple, Union
+
+try:
+    import aiohttp
+except ImportError:  # pragma: no cover - optional dependency
+    aiohttp = None
+
+from .concurrency import percentile
+from .instrumentation import Histogram
+from .mock_server import Latency, LatencySpec
+from .retry import RetryPolicy
+
+TARGETS = ('chat', 'sdk-chat')
+
+# Latency histogram bucket upper bounds in seconds
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Sends one turn: (conversation_id, message) -> response
+SendTurn = Callable[[str, str], Awaitable[Any]]
+
+
+class ConversationScripts:
+    """
+    Source of scripted conversations.
+
+    Either fixed scripts, each a list of user messages sent in order, or a
+    pool of questions from which each conversation draws a random number of
+    distinct turns.
+
+    Args:
+        questions: Pool of user messages to draw conversations from
+        scripts: Fixed conversations; used instead of the pool when given
+        turns: (min, max) turns of a conversation drawn from the pool (default: (1, 5))
+    """
+
+    def __init__(
+        self,
+        questions: Sequence[str] = (),
+        scripts: Sequence[Sequence[str]] = (),
+        turns: Tuple[int, int] = (1, 5)
+    ):
+        if not questions and not scripts:
+            raise ValueError("no questions or scripts to draw conversations from")
+        if not 1 <= turns[0] <= turns[1]:
+            raise ValueError("turns must satisfy 1 <= min <= max")
+        self.questions = list(questions)
+        self.scripts = [list(script) for script in scripts if script]
+        self.turns = turns
+
+    @classmethod
+    def from_file(cls, path: Union[str, Path], turns: Tuple[int, int] = (1, 5)) -> "ConversationScripts":
+        """
+        Load conversations from a qanda.json file.
+
+        A list of ``{"question", "answer"}`` entries is used as the question
+        pool. Entries that are lists of questions (or of such entries), or
+        ``{"turns": [...]}`` objects, are fixed scripts; a file must use one
+        form or the other.
+
+        Args:
+            path: JSON file
+            turns: (min, max) turns of a conversation drawn from the pool
+
+        Raises:
+            ValueError: If the file holds no usable conversations or mixes both forms
+        """
+        with open(path, 'r', encoding='utf-8') as f:
+            entries = json.load(f)
+        if isinstance(entries, dict):
+            entries = entries.get('conversations') or entries.get('q_and_as') or []
+
+        def text(entry: Any) -> str:
+            return entry if isinstance(entry, str) else entry.get('question') or entry.get('prompt')
+
+        questions, scripts = [], []
+        for entry in entries:
+            if isinstance(entry, dict) and 'turns' in entry:
+                entry = entry['turns']
+            if isinstance(entry, list):
+                scripts.append([text(turn) for turn in entry])
+            else:
+                questions.append(text(entry))
+        if questions and scripts:
+            raise ValueError(f"{path} mixes single questions and scripted conversations")
+        if any(message is None for message in questions + [m for script in scripts for m in script]):
+            raise ValueError(f"{path} has an entry without a 'question'")
+        return cls(questions, scripts, turns)
+
+    @property
+    def mean_turns(self) -> float:
+        if self.scripts:
+            return sum(len(script) for script in self.scripts) / len(self.scripts)
+        low, high = self.turns[0], min(self.turns[1], len(self.questions))
+        return (low + max(low, high)) / 2
+
+    def draw(self, rng: random.Random) -> List[str]:
+        """Pick the messages of one conversation."""
+        if self.scripts:
+            return list(rng.choice(self.scripts))
+        count = rng.randint(*self.turns)
+        if count <= len(self.questions):
+            return rng.sample(self.questions, count)
+        return [rng.choice(self.questions) for _ in range(count)]
+
+
+class LoadProfile:
+    """
+    Shape of a load test.
+
+    Set exactly one of ``users`` (closed model: that many users loop through
+    conversations back to back) or ``rps`` (open model: conversations arrive
+    as a Poisson process at ``rps / mean turns`` per second, so turns are
+    sent at ``rps`` on average however slow the agent is).
+
+    Args:
+        users: Concurrent simulated users
+        rps: Target requests (turns) per second
+        duration: Seconds of measured load after the warm-up (default: 60)
+        warmup: Seconds of ramp-up before measuring; users start evenly spread
+            over it, or the arrival rate grows linearly to rps (default: 10)
+        think_time: Pause between a user's turns and conversations (default: lognormal, median 1s, p99 5s)
+        max_users: In rps mode, most conversations open at once; arrivals beyond
+            it are counted as 'dropped' errors (default: 10000)
+        interval: Seconds per timeline row (default: 1)
+        seed: Seed for think times and conversation draws (default: 0)
+    """
+
+    def __init__(
+        self,
+        users: Optional[int] = None,
+        rps: Optional[float] = None,
+        duration: float = 60.0,
+        warmup: float = 10.0,
+        think_time: LatencySpec = 'lognormal:1,5',
+        max_users: int = 10_000,
+        interval: float = 1.0,
+        seed: int = 0
+    ):
+        if (users is None) == (rps is None):
+            raise ValueError("set exactly one of users or rps")
+        if users is not None and users < 1:
+            raise ValueError("users must be at least 1")
+        if rps is not None and rps <= 0:
+            raise ValueError("rps must be positive")
+        if duration <= 0 or warmup < 0 or interval <= 0:
+            raise ValueError("duration and interval must be positive and warmup non-negative")
+        self.users = users
+        self.rps = rps
+        self.duration = duration
+        self.warmup = warmup
+        self.think_time = Latency.parse(think_time)
+        self.max_users = max_users
+        self.interval = interval
+        self.seed = seed
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {**vars(self), 'think_time': f"{self.think_time.kind}:{','.join(map(str, self.think_time.params))}"}
+
+
+def error_kind(error: BaseException) -> str:
+    """Short label of a failed turn: the HTTP status, or the exception type."""
+    if isinstance(error, _Dropped):
+        return 'dropped'
+    status = getattr(error, 'status', None) or getattr(getattr(error, 'response', None), 'status_code', None)
+    if isinstance(status, int):
+        return str(status)
+    if isinstance(error, asyncio.TimeoutError):
+        return 'Timeout'
+    return type(error).__name__
+
+
+class _Interval:
+    __slots__ = ('requests', 'errors', 'retries', 'latencies', 'started', 'active')
+
+    def __init__(self):
+        self.requests = 0
+        self.errors: Dict[str, int] = {}
+        self.retries = 0
+        self.latencies: List[float] = []
+        self.started = 0
+        self.active = 0
+
+
+class LoadReport:
+    """
+    Results of a load test.
+
+    Attributes:
+        profile: The LoadProfile that was run
+        latencies: Seconds taken by each successful measured turn
+        histogram: Histogram of those latencies
+        errors: Failed measured turns by error kind
+        retries: Retried measured attempts by failure kind, when the client retries
+            (pass ``on_retry`` as the client's ``RetryPolicy(on_retry=...)``)
+        timeline: One dict per interval, warm-up included
+    """
+
+    def __init__(self, profile: LoadProfile, buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.profile = profile
+        self.latencies: List[float] = []
+        self.histogram = Histogram(buckets)
+        self.errors: Dict[str, int] = {}
+        self.retries: Dict[str, int] = {}
+        self.timeline: List[Dict[str, Any]] = []
+        self._intervals: Dict[int, _Interval] = {}
+        self._start = 0.0
+        self._clock: Callable[[], float] = time.monotonic
+
+    def _interval(self, now: float) -> _Interval:
+        index = int((now - self._start) / self.profile.interval)
+        interval = self._intervals.get(index)
+        if interval is None:
+            interval = self._intervals[index] = _Interval()
+        return interval
+
+    def _record(self, started_at: float, latency: float, error: Optional[BaseException]) -> None:
+        now = started_at + latency
+        interval = self._interval(now)
+        interval.requests += 1
+        measured = started_at - self._start >= self.profile.warmup
+        if error is not None:
+            kind = error_kind(error)
+            interval.errors[kind] = interval.errors.get(kind, 0) + 1
+            if measured:
+                self.errors[kind] = self.errors.get(kind, 0) + 1
+            return
+        interval.latencies.append(latency)
+        if measured:
+            self.latencies.append(latency)
+            self.histogram.observe(latency)
+
+    def on_retry(self, method: str, endpoint: str, attempt: int, delay: float, reason: str) -> None:
+        """Count a retried attempt; matches ``RetryPolicy``'s ``on_retry`` callback."""
+        now = self._clock()
+        self._interval(now).retries += 1
+        if now - self._start >= self.profile.warmup:
+            self.retries[reason] = self.retries.get(reason, 0) + 1
+
+    def _close_interval(self, index: int, active: int) -> Dict[str, Any]:
+        interval = self._intervals.pop(index, None) or _Interval()
+        latencies = interval.latencies
+        errors = sum(interval.errors.values())
+        row = {
+            'time': round(index * self.profile.interval, 6),
+            'warmup': index * self.profile.interval < self.profile.warmup,
+            'active': active,
+            'started': interval.started,
+            'requests': interval.requests,
+            'rps': interval.requests / self.profile.interval,
+            'errors': errors,
+            'error_rate': errors / interval.requests if interval.requests else 0.0,
+            'error_kinds': interval.errors,
+            'retries': interval.retries,
+            'p50': percentile(latencies, 50) if latencies else None,
+            'p95': percentile(latencies, 95) if latencies else None,
+        }
+        self.timeline.append(row)
+        return row
+
+    def summary(self) -> Dict[str, Any]:
+        """Totals and latency percentiles of the measured (post warm-up) turns."""
+        latencies = self.latencies
+        errors = sum(self.errors.values())
+        requests = len(latencies) + errors
+        return {
+            'requests': requests,
+            'errors': errors,
+            'error_rate': errors / requests if requests else 0.0,
+            'retries': sum(self.retries.values()),
+            'rps': requests / self.profile.duration,
+            'mean': sum(latencies) / len(latencies) if latencies else None,
+            **{f'p{q}': percentile(latencies, q) if latencies else None for q in (50, 90, 95, 99)},
+            'max': max(latencies) if latencies else None,
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        histogram = self.histogram
+        return {
+            'profile': self.profile.to_dict(),
+            'summary': self.summary(),
+            'errors': self.errors,
+            'retries': self.retries,
+            'histogram': [
+                {'le': bound, 'count': count}
+                for bound, count in zip(list(histogram.buckets) + ['+Inf'], histogram.counts)
+            ],
+            'timeline': self.timeline,
+        }
+
+    def format_text(self, width: int = 40) -> str:
+        """Human-readable summary, latency histogram and timeline."""
+        summary = self.summary()
+
+        def ms(value: Optional[float]) -> str:
+            return f"{value * 1000:.1f}ms" if value is not None else '-'
+
+        lines = [
+            f"requests {summary['requests']}  errors {summary['errors']} ({summary['error_rate']:.2%})  "
+            f"throughput {summary['rps']:.1f}/s",
+            f"latency mean {ms(summary['mean'])}  p50 {ms(summary['p50'])}  p90 {ms(summary['p90'])}  "
+            f"p95 {ms(summary['p95'])}  p99 {ms(summary['p99'])}  max {ms(summary['max'])}",
+        ]
+        if self.errors:
+            lines.append('errors ' + '  '.join(f'{kind}: {count}' for kind, count in sorted(self.errors.items())))
+        if self.retries:
+            lines.append('retries ' + '  '.join(f'{kind}: {count}' for kind, count in sorted(self.retries.items())))
+        lines += ['', 'latency histogram']
+        counts = self.histogram.counts
+        peak = max(counts) or 1
+        lower = 0.0
+        for bound, count in zip(list(self.histogram.buckets) + [None], counts):
+            label = f"{ms(lower)} - {ms(bound)}" if bound is not None else f"> {ms(lower)}"
+            if count:
+                lines.append(f"  {label:>19} {count:>8} {'#' * max(1, round(count / peak * width))}")
+            lower = bound if bound is not None else lower
+        lines += ['', f"{'time':>7} {'active':>6} {'rps':>8} {'p50':>9} {'p95':>9} {'errors':>7} {'rate':>7} {'retries':>7}"]
+        for row in self.timeline:
+            lines.append(
+                f"{row['time']:>6.0f}s {row['active']:>6} {row['rps']:>8.1f} {ms(row['p50']):>9} {ms(row['p95']):>9} "
+                f"{row['errors']:>7} {row['error_rate']:>7.1%} {row['retries']:>7}{'  warm-up' if row['warmup'] else ''}"
+            )
+        return '\n'.join(lines)
+
+
+async def run_load(
+    send: SendTurn,
+    scripts: ConversationScripts,
+    profile: LoadProfile,
+    progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+    report: Optional[LoadReport] = None
+) -> LoadReport:
+    """
+    Run a load test.
+
+    Args:
+        send: Coroutine function sending one turn, called as ``send(conversation_id, message)``
+            (see ``chat_target`` and ``sdk_chat_target``)
+        scripts: Conversations to play
+        profile: Load shape and duration
+        progress: Optional callback called with each timeline row as its interval ends
+        report: LoadReport to fill in, e.g. one whose ``on_retry`` the client's
+            retry policy already reports to (default: a new one)
+
+    Returns:
+        LoadReport; turns still in flight when the test ends are not counted
+    """
+    loop = asyncio.get_running_loop()
+    rng = random.Random(profile.seed)
+    report = report if report is not None else LoadReport(profile)
+    report._clock = loop.time
+    start = report._start = loop.time()
+    end = start + profile.warmup + profile.duration
+    conversations: Set[asyncio.Task] = set()
+    active = 0
+
+    async def converse(delay: float = 0.0, repeat: bool = False) -> None:
+        nonlocal active
+        if delay:
+            await asyncio.sleep(delay)
+        active += 1
+        try:
+            await play(repeat)
+        finally:
+            active -= 1
+
+    async def play(repeat: bool) -> None:
+        while loop.time() < end:
+            conversation_id = str(uuid.uuid4())
+            report._interval(loop.time()).started += 1
+            for message in scripts.draw(rng):
+                if loop.time() >= end:
+                    return
+                started_at = loop.time()
+                try:
+                    await send(conversation_id, message)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    report._record(started_at, loop.time() - started_at, e)
+                else:
+                    report._record(started_at, loop.time() - started_at, None)
+                await asyncio.sleep(profile.think_time.sample(rng))
+            if not repeat:
+                return
+
+    def spawn(delay: float = 0.0, repeat: bool = False) -> None:
+        task = loop.create_task(converse(delay, repeat))
+        conversations.add(task)
+        task.add_done_callback(conversations.discard)
+
+    async def arrivals() -> None:
+        base_rate = profile.rps / scripts.mean_turns
+        while True:
+            now = loop.time()
+            elapsed = now - start
+            # Ramp from a tenth of the rate to all of it over the warm-up
+            ramp = min(1.0, 0.1 + 0.9 * elapsed / profile.warmup) if profile.warmup else 1.0
+            await asyncio.sleep(rng.expovariate(base_rate * ramp))
+            if loop.time() >= end:
+                return
+            if len(conversations) >= profile.max_users:
+                report._record(loop.time(), 0.0, _Dropped())
+            else:
+                spawn()
+
+    async def ticker() -> None:
+        index = 0
+        while True:
+            await asyncio.sleep(max(0.0, start + (index + 1) * profile.interval - loop.time()))
+            row = report._close_interval(index, active)
+            if progress is not None:
+                progress(row)
+            index += 1
+
+    if profile.users is not None:
+        for user in range(profile.users):
+            spawn(profile.warmup * user / profile.users, repeat=True)
+        driver = None
+    else:
+        driver = loop.create_task(arrivals())
+    timeline = loop.create_task(ticker())
+    try:
+        await asyncio.sleep(end - loop.time())
+        # Let the intervals up to the end close, then stop whatever is still in flight
+        await asyncio.sleep(0)
+    finally:
+        for task in list(conversations) + [driver, timeline]:
+            if task is not None:
+                task.cancel()
+        await asyncio.gather(*conversations, *(t for t in (driver, timeline) if t is not None), return_exceptions=True)
+    intervals = int(round((profile.warmup + profile.duration) / profile.interval))
+    while len(report.timeline) < intervals:
+        row = report._close_interval(len(report.timeline), 0)
+        if progress is not None:
+            progress(row)
+    return report
+
+
+class _Dropped(Exception):
+    """An rps-mode arrival skipped because max_users conversations were already open."""
+
+
+def chat_target(client: "AsyncRippletideClient", agent_id: str) -> SendTurn:
+    """Send turns with ``AsyncRippletideClient.chat``; the evaluation chat API has no conversation ID."""
+    async def send(conversation_id: str, message: str) -> Any:
+        return await client.chat(agent_id, message, raw=True)
+    return send
+
+
+def sdk_chat_target(pool: "AsyncConversationPool") -> SendTurn:
+    """Send turns as SDK chat conversations through an ``AsyncConversationPool``."""
+    async def send(conversation_id: str, message: str) -> Any:
+        return await pool.chat(message, conversation_id)
+    return send
+
+
+async def _run_against(
+    base_url: Optional[str],
+    target: str,
+    agent_id: str,
+    scripts: ConversationScripts,
+    profile: LoadProfile,
+    api_key: Optional[str],
+    connections: int,
+    retries: int,
+    progress: Optional[Callable[[Dict[str, Any]], None]]
+) -> LoadReport:
+    from .async_client import AsyncRippletideClient
+    from .conversations import AsyncConversationPool
+    from .knowledge import SDK_BASE_URL
+
+    if target == 'sdk-chat':
+        base_url = base_url or os.getenv('RIPPLETIDE_SDK_BASE_URL') or SDK_BASE_URL
+    report = LoadReport(profile)
+    # The client's default policy would hide throttling and failures behind
+    # retries and count their backoff as latency; retries made are reported
+    policy = RetryPolicy(max_retries=retries, on_retry=report.on_retry)
+    async with AsyncRippletideClient(
+        api_key=api_key, base_url=base_url, max_connections=connections, retry_policy=policy
+    ) as client:
+        if target == 'sdk-chat':
+            send = sdk_chat_target(AsyncConversationPool(agent_id, client, max_in_flight=connections))
+        else:
+            send = chat_target(client, agent_id)
+        return await run_load(send, scripts, profile, progress, report)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog='python -m rippletide_client.loadgen',
+        description='Generate synthetic concurrent chat traffic against an agent.'
+    )
+    load = parser.add_mutually_exclusive_group(required=True)
+    load.add_argument('--users', type=int, help='concurrent simulated users')
+    load.add_argument('--rps', type=float, help='target requests per second')
+    parser.add_argument('--agent-id', help='agent to load (required unless --mock)')
+    parser.add_argument('--target', choices=TARGETS, default='chat',
+                        help='chat: evaluation API chat; sdk-chat: SDK conversations (default: chat)')
+    parser.add_argument('--qanda', help='qanda.json of questions or scripted conversations (default: generated questions with --mock)')
+    parser.add_argument('--turns', default='1,5', help='min,max turns per conversation drawn from questions (default: 1,5)')
+    parser.add_argument('--duration', type=float, default=60.0, help='seconds of measured load (default: 60)')
+    parser.add_argument('--warmup', type=float, default=10.0, help='seconds of unmeasured ramp-up (default: 10)')
+    parser.add_argument('--think-time', default='lognormal:1,5',
+                        help='pause between turns, e.g. 0, exponential:2, uniform:1,3 (default: lognormal:1,5)')
+    parser.add_argument('--max-users', type=int, default=10_000, help='with --rps, most conversations open at once (default: 10000)')
+    parser.add_argument('--connections', type=int, help='pooled connections (default: --users, or 1000 with --rps)')
+    parser.add_argument('--retries', type=int, default=0,
+                        help='retries of a throttled (429) or unconnected turn, each reported in the timeline; '
+                             'a turn\'s latency then includes its backoff (default: 0)')
+    parser.add_argument('--interval', type=float, default=1.0, help='seconds per timeline row (default: 1)')
+    parser.add_argument('--seed', type=int, default=0, help='seed for think times and conversations (default: 0)')
+    parser.add_argument('--output', '-o', help='write the JSON report here')
+    parser.add_argument('--quiet', '-q', action='store_true', help='do not print timeline rows as they complete')
+    backend = parser.add_mutually_exclusive_group()
+    backend.add_argument('--base-url', help='backend URL (default: the hosted API for --target)')
+    backend.add_argument('--mock', action='store_true', help='start the local mock backend and load it')
+    parser.add_argument('--mock-latency', default='lognormal:0.05,0.4',
+                        help='with --mock, server latency spec (default: lognormal:0.05,0.4)')
+    parser.add_argument('--mock-error-rate', type=float, default=0.0, help='with --mock, fraction of 5xx answers')
+    args = parser.parse_args(argv)
+
+    if aiohttp is None:
+        parser.error("the load generator requires aiohttp. Install it with `pip install aiohttp`.")
+    if not args.agent_id and not args.mock:
+        parser.error('--agent-id is required unless --mock is given')
+    try:
+        low, _, high = args.turns.partition(',')
+        turns = (int(low), int(high or low))
+        if args.qanda:
+            scripts = ConversationScripts.from_file(args.qanda, turns)
+        elif args.mock:
+            scripts = ConversationScripts([f'Load test question {n}?' for n in range(100)], turns=turns)
+        else:
+            parser.error('--qanda is required unless --mock is given')
+        profile = LoadProfile(
+            users=args.users, rps=args.rps, duration=args.duration, warmup=args.warmup,
+            think_time=args.think_time, max_users=args.max_users, interval=args.interval, seed=args.seed
+        )
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+    if args.retries < 0:
+        parser.error('--retries must be non-negative')
+    connections = args.connections or args.users or 1000
+    agent_id = args.agent_id or 'loadgen-agent'
+
+    def show(row: Dict[str, Any]) -> None:
+        if not args.quiet:
+            p95 = f"{row['p95'] * 1000:.1f}ms" if row['p95'] is not None else '-'
+            print(
+                f"{row['time']:>6.0f}s active {row['active']:>5} rps {row['rps']:>7.1f} p95 {p95:>9} "
+                f"errors {row['error_rate']:>6.1%}{'  warm-up' if row['warmup'] else ''}",
+                file=sys.stderr
+            )
+
+    def run(base_url: Optional[str]) -> LoadReport:
+        return asyncio.run(_run_against(
+            base_url, args.target, agent_id, scripts, profile, os.getenv('RIPPLETIDE_API_KEY'), connections, args.retries, show
+        ))
+
+    if args.mock:
+        from .benchmark import mock_backend
+
+        try:
+            Latency.parse(args.mock_latency)
+        except ValueError as e:
+            parser.error(f"invalid --mock-latency: {e}")
+        with mock_backend(args.mock_latency, args.seed, error_rate=args.mock_error_rate) as url:
+            report = run(url)
+    else:
+        report = run(args.base_url)
+
+    print(report.format_text(), file=sys.stderr)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report.to_dict(), f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
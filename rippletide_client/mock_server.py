@@ -0,0 +1,828 @@
+"""
+Local stand-in for the Rippletide backends, for offline benchmarking and testing.
+
+Serves the evaluation API (``docs/openapi-eval.json``) and the SDK API
+(``docs/openapi.json``) from memory on localhost, with configurable server
+latency, injected errors and 429 responses::
+
+    python -m rippletide_client.mock_server --port 8000 --latency lognormal:0.05,0.4 --rate-limit-rate 0.02
+
+    RIPPLETIDE_BASE_URL=http://127.0.0.1:8000 python -m rippletide_client.run --agent-id bench --workers 4
+
+Any agent ID is accepted and created on first use, with ``test_prompts``
+generated test prompts, so runs can point at the mock without setup.
+Evaluation labels are derived from a hash of the question and the seed, so
+the same prompt set always produces the same report.
+"""
+import argparse
+import hashlib
+import math
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Mapping, NamedTuple, Optional, Sequence, Tuple, Union
+from urllib.parse import parse_qsl, urlsplit
+
+from .codec import default_codec
+from .rate_limit import TokenBucket
+
+# Routes whose request body is counted and discarded rather than decoded
+UPLOAD_ROUTES = frozenset({'/api/agents/{id}/upload-pdf'})
+
+# Bytes of uploaded document per generated Q&A pair
+BYTES_PER_QA_PAIR = 16 * 1024
+
+
+class Latency:
+    """
+    Distribution of simulated server time per request, in seconds.
+
+    Args:
+        kind: 'constant', 'uniform', 'lognormal' or 'exponential'
+        params: (seconds,) for constant, (low, high) for uniform,
+            (median, p99) for lognormal and (mean,) for exponential
+    """
+
+    KINDS = {'constant': 1, 'uniform': 2, 'lognormal': 2, 'exponential': 1}
+
+    def __init__(self, kind: str, *params: float):
+        if kind not in self.KINDS:
+            raise ValueError(f"unknown latency distribution {kind!r}; expected one of {', '.join(self.KINDS)}")
+        if len(params) != self.KINDS[kind]:
+            raise ValueError(f"{kind} latency takes {self.KINDS[kind]} parameter(s), got {len(params)}")
+        if any(p < 0 for p in params):
+            raise ValueError("latency parameters must not be negative")
+        if kind == 'lognormal' and not 0 < params[0] <= params[1]:
+            raise ValueError("lognormal latency needs 0 < median <= p99")
+        self.kind = kind
+        self.params = params
+
+    @classmethod
+    def parse(cls, spec: Union[str, float, "Latency"]) -> "Latency":
+        """
+        Build a Latency from ``"kind:a,b"``, a number of seconds, or a Latency.
+
+        Examples: ``"0.05"``, ``"constant:0.05"``, ``"uniform:0.01,0.1"``, ``"lognormal:0.05,0.4"``,
+        ``"exponential:2"``.
+        """
+        if isinstance(spec, Latency):
+            return spec
+        if isinstance(spec, (int, float)):
+            return cls('constant', float(spec))
+        kind, _, params = spec.partition(':')
+        if not params:
+            return cls('constant', float(kind))
+        return cls(kind, *(float(p) for p in params.split(',')))
+
+    def sample(self, rng: random.Random) -> float:
+        if self.kind == 'constant':
+            return self.params[0]
+        if self.kind == 'uniform':
+            return rng.uniform(*self.params)
+        if self.kind == 'exponential':
+            return rng.expovariate(1 / self.params[0]) if self.params[0] > 0 else 0.0
+        median, p99 = self.params
+        # z(0.99) = 2.326; ln(p99 / median) = 2.326 * sigma
+        return rng.lognormvariate(math.log(median), math.log(p99 / median) / 2.326)
+
+    def __repr__(self) -> str:
+        return f"Latency({self.kind!r}, {', '.join(map(repr, self.params))})"
+
+
+LatencySpec = Union[str, float, Latency]
+
+
+class _Request(NamedTuple):
+    method: str
+    route: str
+    params: Dict[str, str]
+    query: Dict[str, str]
+    headers: Any
+    body: Any
+
+
+class _Reply(NamedTuple):
+    status: int
+    body: Any = None
+    headers: Optional[Dict[str, str]] = None
+    # Server-sent event payloads, streamed instead of a body
+    events: Optional[List[Any]] = None
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _compile(template: str) -> "re.Pattern":
+    return re.compile('^' + re.sub(r'\{(\w+)\}', r'(?P<\1>[^/]+)', template) + '$')
+
+
+class MockRippletideServer:
+    """
+    In-memory Rippletide backend on a local port.
+
+    Each request is first checked against the fault settings: over
+    ``max_rps``, or with probability ``rate_limit_rate``, it is answered at
+    once with 429 and a Retry-After header. Otherwise it is held for a
+    latency sampled from ``latency`` (or its ``route_latency`` entry) and,
+    with probability ``error_rate``, answered with one of ``error_statuses``.
+    Random draws come from one RNG seeded with ``seed``.
+
+    Args:
+        host: Interface to listen on (default: 127.0.0.1)
+        port: Port to listen on, 0 for any free port (default: 0)
+        latency: Server time per request (default: none)
+        route_latency: Per-route overrides keyed by path template, e.g.
+            ``{"/api/agents/{id}/evaluate": "lognormal:0.2,1.5"}``
+        error_rate: Fraction of requests answered with a server error (default: 0)
+        error_statuses: Statuses injected errors are drawn from (default: 500, 502, 503)
+        rate_limit_rate: Fraction of requests answered with 429 (default: 0)
+        max_rps: Requests per second served before answering 429, or None for no limit
+        retry_after: Retry-After seconds sent with 429 responses (default: 1)
+        test_prompts: Test prompts generated for each new evaluation agent (default: 20)
+        prompt_size: Characters in each generated expected answer (default: 200)
+        pass_rate: Fraction of questions evaluated as correct (default: 0.8)
+        stream_interval: Seconds between chunks of a streamed chat answer (default: 0.01)
+        api_key: Require this x-api-key header, or None to accept any request
+        seed: Seed for latency, fault and content generation (default: 0)
+    """
+
+    def __init__(
+        self,
+        host: str = '127.0.0.1',
+        port: int = 0,
+        latency: LatencySpec = 0.0,
+        route_latency: Optional[Mapping[str, LatencySpec]] = None,
+        error_rate: float = 0.0,
+        error_statuses: Sequence[int] = (500, 502, 503),
+        rate_limit_rate: float = 0.0,
+        max_rps: Optional[float] = None,
+        retry_after: float = 1.0,
+        test_prompts: int = 20,
+        prompt_size: int = 200,
+        pass_rate: float = 0.8,
+        stream_interval: float = 0.01,
+        api_key: Optional[str] = None,
+        seed: int = 0
+    ):
+        if not 0 <= error_rate <= 1 or not 0 <= rate_limit_rate <= 1 or not 0 <= pass_rate <= 1:
+            raise ValueError("error_rate, rate_limit_rate and pass_rate must be between 0 and 1")
+        self.latency = Latency.parse(latency)
+        self.route_latency = {route: Latency.parse(spec) for route, spec in (route_latency or {}).items()}
+        self.error_rate = error_rate
+        self.error_statuses = tuple(error_statuses)
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.test_prompts = test_prompts
+        self.prompt_size = prompt_size
+        self.pass_rate = pass_rate
+        self.stream_interval = stream_interval
+        self.api_key = api_key
+        self.seed = seed
+        self.codec = default_codec()
+
+        self._rng = random.Random(seed)
+        self._bucket = TokenBucket(max_rps) if max_rps is not None else None
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+        # Evaluation API
+        self.agents: Dict[str, Dict[str, Any]] = {}
+        # Anonymous agents are only visible to the session that created them
+        self._owners: Dict[str, str] = {}
+        self.prompts: Dict[str, List[Dict[str, Any]]] = {}
+        self._prompt_versions: Dict[str, int] = {}
+        self._prompt_bodies: Dict[str, Tuple[int, bytes]] = {}
+        self._next_prompt_id = 1
+        # SDK API
+        self.sdk_agents: Dict[str, Dict[str, Any]] = {}
+        self.q_and_as: Dict[str, Dict[str, Any]] = {}
+        self.tags: Dict[str, Dict[str, Any]] = {}
+        self.guardrails: Dict[str, Dict[str, Any]] = {}
+        self.actions: Dict[str, Dict[str, Any]] = {}
+        # Kept apart from the records, which the API returns without them
+        self.q_and_a_tags: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self.state_predicates: Dict[str, Any] = {}
+
+        self.requests: Dict[str, int] = {}
+        self.injected = {'rate_limited': 0, 'errors': 0}
+
+        routes: List[Tuple[str, str, Callable[[_Request], _Reply]]] = [
+            ('GET', '/health', lambda r: _Reply(200, {'status': 'ok', 'message': 'Mock Rippletide backend'})),
+            ('GET', '/api/agents', lambda r: _Reply(200, list(self.agents.values()))),
+            ('POST', '/api/agents', self._create_agent),
+            ('POST', '/api/agents/anonymous', self._create_agent),
+            ('GET', '/api/agents/{id}', lambda r: _Reply(200, self._agent(r.params['id']))),
+            ('DELETE', '/api/agents/{id}', self._delete_agent),
+            ('GET', '/api/agents/{id}/test-prompts', self._get_test_prompts),
+            ('POST', '/api/agents/{id}/test-prompts', self._add_test_prompts),
+            ('POST', '/api/agents/{id}/upload-pdf', self._upload_pdf),
+            ('POST', '/api/agents/{id}/evaluate', self._evaluate),
+            ('POST', '/api/agents/{agentId}/chat', self._chat),
+            ('GET', '/api/sdk/agent', lambda r: _Reply(200, list(self.sdk_agents.values()))),
+            ('POST', '/api/sdk/agent', self._create_sdk_agent),
+            ('GET', '/api/sdk/agent/{agent_id}', lambda r: _Reply(200, self._sdk_agent(r.params['agent_id']))),
+            ('PUT', '/api/sdk/agent/{agent_id}', self._update_sdk_agent),
+            ('DELETE', '/api/sdk/agent/{agent_id}', self._delete_sdk_agent),
+            ('PUT', '/api/sdk/state-predicate/{agent_id}', self._put_state_predicate),
+            ('GET', '/api/sdk/tag', lambda r: _Reply(200, {'tags': list(self.tags.values())})),
+            ('POST', '/api/sdk/tag', self._create_tag),
+            ('POST', '/api/sdk/q-and-a-tag', self._link_tag),
+            ('POST', '/api/sdk/chat/{agent_uuid}', self._sdk_chat),
+        ]
+        for kind, store, key, fields in (
+            ('q-and-a', self.q_and_as, 'q_and_as', ('question', 'answer')),
+            ('guardrail', self.guardrails, 'guardrails', ('type', 'instruction')),
+            ('action', self.actions, 'actions', ('name', 'description', 'what_to_do')),
+        ):
+            routes += [
+                ('POST', f'/api/sdk/{kind}', self._creator(store, fields)),
+                ('GET', f'/api/sdk/{kind}/agent/{{agent_id}}', self._lister(store, key)),
+                ('GET', f'/api/sdk/{kind}/{{id}}', self._getter(store)),
+                ('PUT', f'/api/sdk/{kind}/{{id}}', self._updater(store, fields)),
+                ('DELETE', f'/api/sdk/{kind}/{{id}}', self._deleter(store)),
+            ]
+        self._routes = [(method, template, _compile(template), handler) for method, template, handler in routes]
+
+        self.server = _Server((host, port), _handler_for(self), bind_and_activate=False)
+        self.server.daemon_threads = True
+        # Benchmarks open many connections at once; the default backlog of 5 resets them
+        self.server.request_queue_size = 1024
+        try:
+            self.server.server_bind()
+            self.server.server_activate()
+        except OSError:
+            self.server.server_close()
+            raise
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "MockRippletideServer":
+        """Start serving in a background thread."""
+        self._thread = threading.Thread(target=self.server.serve_forever, name='rippletide-mock', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            self.server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self.server.server_close()
+
+    def __enter__(self) -> "MockRippletideServer":
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.stop()
+
+    def stats(self) -> Dict[str, Any]:
+        """Requests served per route template and faults injected so far."""
+        with self._lock:
+            return {'requests': dict(self.requests), 'injected': dict(self.injected)}
+
+    def add_agent(
+        self,
+        agent_id: Optional[str] = None,
+        test_prompts: Optional[int] = None,
+        session_id: Optional[str] = None,
+        **fields
+    ) -> Dict[str, Any]:
+        """
+        Create an evaluation agent with generated test prompts.
+
+        Args:
+            agent_id: ID of the agent (default: a new UUID)
+            test_prompts: Number of test prompts to generate (default: the server's ``test_prompts``)
+            session_id: Create it as an anonymous agent of this session; requests
+                from other sessions without an API key then get 404
+            **fields: Agent fields to set (name, seed, numNodes, ...)
+
+        Returns:
+            The agent record
+        """
+        with self._lock:
+            agent = self._new_agent(agent_id or str(uuid.uuid4()), fields, test_prompts)
+            if session_id is not None:
+                self._owners[agent['id']] = session_id
+            return agent
+
+    # Fault injection and dispatch
+
+    def _route(self, method: str, path: str) -> Tuple[Optional[str], Dict[str, str], Optional[Callable]]:
+        other = None
+        for route_method, template, pattern, handler in self._routes:
+            match = pattern.match(path)
+            if match is None:
+                continue
+            if route_method == method:
+                return template, match.groupdict(), handler
+            other = template
+        # A path served for other methods gets a 405, anything else a 404
+        return other, {}, (self._not_allowed if other is not None else None)
+
+    def _fault(self, route: str) -> Tuple[Optional[_Reply], float]:
+        """Decide how a request is answered: a 429, or a delay and maybe an injected error."""
+        with self._lock:
+            self.requests[route] = self.requests.get(route, 0) + 1
+            limited = self._bucket is not None and not self._bucket.try_take()
+            if limited or (self.rate_limit_rate and self._rng.random() < self.rate_limit_rate):
+                self.injected['rate_limited'] += 1
+                return _Reply(
+                    429,
+                    {'error': 'Too Many Requests', 'message': 'Rate limit exceeded'},
+                    {'Retry-After': f'{self.retry_after:g}'}
+                ), 0.0
+            delay = self.route_latency.get(route, self.latency).sample(self._rng)
+            if self.error_rate and self._rng.random() < self.error_rate:
+                self.injected['errors'] += 1
+                status = self._rng.choice(self.error_statuses)
+                return _Reply(status, {'error': 'Injected failure', 'message': f'Mock server error {status}'}), delay
+        return None, delay
+
+    def _hidden(self, request: _Request) -> bool:
+        """Whether the request targets another session's anonymous agent."""
+        agent_id = request.params.get('id') or request.params.get('agentId')
+        if agent_id is None or not request.route.startswith('/api/agents/') or request.headers.get('x-api-key'):
+            return False
+        with self._lock:
+            owner = self._owners.get(agent_id)
+        return owner is not None and owner != request.headers.get('X-Session-Id')
+
+    def _not_allowed(self, request: _Request) -> _Reply:
+        return _Reply(405, {'error': 'Method Not Allowed', 'message': f'{request.method} is not supported here'})
+
+    def _unit(self, *parts: Any) -> float:
+        """Deterministic value in [0, 1) for the given parts and the server seed."""
+        digest = hashlib.sha256(repr((self.seed,) + parts).encode('utf-8')).digest()
+        return int.from_bytes(digest[:8], 'big') / 2 ** 64
+
+    # Evaluation API
+
+    def _new_agent(self, agent_id: str, fields: Mapping[str, Any], test_prompts: Optional[int] = None) -> Dict[str, Any]:
+        now = _now()
+        agent = {
+            'id': agent_id,
+            'name': fields.get('name', f'agent-{agent_id[:8]}'),
+            'seed': fields.get('seed', 0),
+            'numNodes': fields.get('numNodes', 100),
+            'publicUrl': fields.get('publicUrl'),
+            'advancedPayload': fields.get('advancedPayload'),
+            'label': fields.get('label', 'eval'),
+            'parentAgentId': fields.get('parentAgentId'),
+            'created_at': now,
+            'updated_at': now,
+        }
+        self.agents[agent_id] = agent
+        count = self.test_prompts if test_prompts is None else test_prompts
+        self.prompts[agent_id] = []
+        self._append_prompts(agent_id, [
+            {'prompt': f'Question {i} for {agent["name"]}?', 'expectedAnswer': self._filler(agent_id, i)}
+            for i in range(count)
+        ])
+        return agent
+
+    def _filler(self, agent_id: str, i: int) -> str:
+        words = ('policy', 'refund', 'account', 'delivery', 'coverage', 'premium', 'claim', 'support')
+        rng = random.Random(f'{self.seed}:{agent_id}:{i}')
+        text = f'Answer {i}:'
+        while len(text) < self.prompt_size:
+            text += ' ' + rng.choice(words)
+        return text[:self.prompt_size]
+
+    def _append_prompts(self, agent_id: str, entries: List[Mapping[str, Any]]) -> List[Dict[str, Any]]:
+        now = _now()
+        added = []
+        for entry in entries:
+            added.append({
+                'id': self._next_prompt_id,
+                'prompt': entry.get('prompt') or entry.get('question'),
+                'expectedAnswer': entry.get('expectedAnswer') or entry.get('answer'),
+                'testAnswer': None,
+                'created_at': now,
+                'updated_at': now,
+            })
+            self._next_prompt_id += 1
+        self.prompts[agent_id].extend(added)
+        self._prompt_versions[agent_id] = self._prompt_versions.get(agent_id, 0) + 1
+        return added
+
+    def _agent(self, agent_id: str) -> Dict[str, Any]:
+        with self._lock:
+            agent = self.agents.get(agent_id)
+            return agent if agent is not None else self._new_agent(agent_id, {})
+
+    def _create_agent(self, request: _Request) -> _Reply:
+        body = request.body or {}
+        if not body.get('name'):
+            return _Reply(400, {'error': 'Bad Request', 'message': 'name is required'})
+        with self._lock:
+            agent = self._new_agent(str(uuid.uuid4()), body)
+            session_id = request.headers.get('X-Session-Id')
+            if request.route == '/api/agents/anonymous' and session_id:
+                self._owners[agent['id']] = session_id
+            return _Reply(201, agent)
+
+    def _delete_agent(self, request: _Request) -> _Reply:
+        with self._lock:
+            self._owners.pop(request.params['id'], None)
+            if self.agents.pop(request.params['id'], None) is None:
+                return _Reply(404, {'error': 'Not Found', 'message': 'Agent not found'})
+            self.prompts.pop(request.params['id'], None)
+            self._prompt_bodies.pop(request.params['id'], None)
+        return _Reply(204)
+
+    def _get_test_prompts(self, request: _Request) -> _Reply:
+        agent_id = request.params['id']
+        self._agent(agent_id)
+        with self._lock:
+            version = self._prompt_versions[agent_id]
+            etag = f'"{agent_id}-{version}"'
+            if request.headers.get('If-None-Match') == etag:
+                return _Reply(304, headers={'ETag': etag})
+            cached = self._prompt_bodies.get(agent_id)
+            if cached is None or cached[0] != version:
+                # Encode once per version so large prompt sets don't make the mock the bottleneck
+                cached = (version, self.codec.dumps(self.prompts[agent_id]))
+                self._prompt_bodies[agent_id] = cached
+        return _Reply(200, cached[1], {'ETag': etag})
+
+    def _add_test_prompts(self, request: _Request) -> _Reply:
+        entries = request.body if isinstance(request.body, list) else [request.body or {}]
+        self._agent(request.params['id'])
+        with self._lock:
+            added = self._append_prompts(request.params['id'], entries)
+        return _Reply(201, added if isinstance(request.body, list) else added[0])
+
+    def _upload_pdf(self, request: _Request) -> _Reply:
+        size = request.body
+        if not size:
+            return _Reply(400, {'error': 'Bad Request', 'message': 'No file uploaded'})
+        pairs = max(1, size // BYTES_PER_QA_PAIR)
+        agent_id = request.params['id']
+        self._agent(agent_id)
+        with self._lock:
+            start = len(self.prompts[agent_id])
+            self._append_prompts(agent_id, [
+                {'prompt': f'Extracted question {start + i}?', 'expectedAnswer': self._filler(agent_id, start + i)}
+                for i in range(pairs)
+            ])
+        return _Reply(200, {
+            'success': True,
+            'message': f'Extracted {pairs} Q&A pairs',
+            'knowledge': {'qaPairsStored': pairs, 'usedDefaultFallback': False},
+        })
+
+    def _evaluate(self, request: _Request) -> _Reply:
+        body = request.body or {}
+        question = body.get('question')
+        if not question:
+            return _Reply(400, {'error': 'Bad Request', 'message': 'question is required'})
+        agent_id = request.params['id']
+        self._agent(agent_id)
+        passed = self._unit('evaluate', agent_id, question) < self.pass_rate
+        facts = [
+            {'fact': f'Fact {n} of the expected answer', 'label': 'FactIsPresent' if passed else 'FactIsAbsent'}
+            for n in range(1, 2 + int(self._unit('facts', question) * 3))
+        ]
+        return _Reply(200, {
+            'label': 'correct' if passed else 'incorrect',
+            'justification': f"The answer {'matches' if passed else 'does not match'} the expected answer.",
+            'facts': facts,
+        })
+
+    def _answer(self, agent_id: str, message: str) -> str:
+        with self._lock:
+            for prompt in self.prompts.get(agent_id, ()):
+                if prompt['prompt'] == message:
+                    return prompt['expectedAnswer']
+        return f'Mock answer to: {message}'
+
+    def _chat(self, request: _Request) -> _Reply:
+        message = (request.body or {}).get('message')
+        if not message:
+            return _Reply(400, {'error': 'Bad Request', 'message': 'message is required'})
+        agent_id = request.params['agentId']
+        self._agent(agent_id)
+        answer = self._answer(agent_id, message)
+        if 'text/event-stream' in (request.headers.get('Accept') or ''):
+            words = answer.split(' ')
+            return _Reply(200, events=[{'delta': word + (' ' if n < len(words) - 1 else '')} for n, word in enumerate(words)])
+        session_id = request.headers.get('X-Session-Id') or str(uuid.uuid4())
+        return _Reply(201, {'agentId': agent_id, 'sessionId': session_id, 'message': answer})
+
+    # SDK API
+
+    def _sdk_agent(self, agent_id: str) -> Dict[str, Any]:
+        with self._lock:
+            agent = self.sdk_agents.get(agent_id)
+            if agent is None:
+                now = _now()
+                agent = self.sdk_agents[agent_id] = {
+                    'id': agent_id, 'name': f'agent-{agent_id[:8]}', 'prompt': '',
+                    'short_description': None,
+                    'created_at': now, 'updated_at': now,
+                }
+            return agent
+
+    def _create_sdk_agent(self, request: _Request) -> _Reply:
+        body = request.body or {}
+        if not body.get('name'):
+            return _Reply(422, {'detail': 'name is required'})
+        agent = self._sdk_agent(str(uuid.uuid4()))
+        with self._lock:
+            agent.update(name=body['name'], prompt=body.get('prompt', ''))
+        return _Reply(201, agent)
+
+    def _update_sdk_agent(self, request: _Request) -> _Reply:
+        agent = self._sdk_agent(request.params['agent_id'])
+        with self._lock:
+            agent.update({k: v for k, v in (request.body or {}).items() if k != 'id'}, updated_at=_now())
+        return _Reply(200, agent)
+
+    def _delete_sdk_agent(self, request: _Request) -> _Reply:
+        with self._lock:
+            if self.sdk_agents.pop(request.params['agent_id'], None) is None:
+                return _Reply(404, {'detail': 'Agent not found'})
+        return _Reply(204)
+
+    def _put_state_predicate(self, request: _Request) -> _Reply:
+        agent_id = request.params['agent_id']
+        self._sdk_agent(agent_id)
+        state_predicate = (request.body or {}).get('state_predicate')
+        with self._lock:
+            self.state_predicates[agent_id] = state_predicate
+        return _Reply(200, {'state_predicate': state_predicate})
+
+    def _create_tag(self, request: _Request) -> _Reply:
+        body = request.body or {}
+        if not body.get('name'):
+            return _Reply(422, {'detail': 'name is required'})
+        now = _now()
+        tag = {
+            'id': str(uuid.uuid4()), 'name': body['name'], 'description': body.get('description'),
+            'created_at': now, 'updated_at': now,
+        }
+        with self._lock:
+            self.tags[tag['id']] = tag
+        return _Reply(201, tag)
+
+    def _link_tag(self, request: _Request) -> _Reply:
+        body = request.body or {}
+        with self._lock:
+            q_and_a_id, tag_id = body.get('q_and_a_id'), body.get('tag_id')
+            if q_and_a_id not in self.q_and_as or tag_id not in self.tags:
+                return _Reply(404, {'detail': 'Q&A or tag not found'})
+            link = self.q_and_a_tags.get((q_and_a_id, tag_id))
+            if link is None:
+                now = _now()
+                link = self.q_and_a_tags[q_and_a_id, tag_id] = {
+                    'id': str(uuid.uuid4()), 'q_and_a_id': q_and_a_id, 'tag_id': tag_id,
+                    'created_at': now, 'updated_at': now,
+                }
+        return _Reply(201, link)
+
+    def _creator(self, store: Dict[str, Dict[str, Any]], fields: Sequence[str]) -> Callable[[_Request], _Reply]:
+        def create(request: _Request) -> _Reply:
+            body = request.body or {}
+            if not body.get('agent_id'):
+                return _Reply(422, {'detail': 'agent_id is required'})
+            now = _now()
+            record = {field: body.get(field) for field in fields}
+            record.update(agent_id=body['agent_id'], id=str(uuid.uuid4()), created_at=now, updated_at=now)
+            with self._lock:
+                store[record['id']] = record
+            return _Reply(201, record)
+        return create
+
+    def _lister(self, store: Dict[str, Dict[str, Any]], key: str) -> Callable[[_Request], _Reply]:
+        def list_for_agent(request: _Request) -> _Reply:
+            agent_id = request.params['agent_id']
+            with self._lock:
+                return _Reply(200, {key: [record for record in store.values() if record['agent_id'] == agent_id]})
+        return list_for_agent
+
+    def _getter(self, store: Dict[str, Dict[str, Any]]) -> Callable[[_Request], _Reply]:
+        def get(request: _Request) -> _Reply:
+            record = store.get(request.params['id'])
+            return _Reply(200, record) if record is not None else _Reply(404, {'detail': 'Not found'})
+        return get
+
+    def _updater(self, store: Dict[str, Dict[str, Any]], fields: Sequence[str]) -> Callable[[_Request], _Reply]:
+        def update(request: _Request) -> _Reply:
+            with self._lock:
+                record = store.get(request.params['id'])
+                if record is None:
+                    return _Reply(404, {'detail': 'Not found'})
+                record.update({k: v for k, v in (request.body or {}).items() if k in fields}, updated_at=_now())
+            return _Reply(200, record)
+        return update
+
+    def _deleter(self, store: Dict[str, Dict[str, Any]]) -> Callable[[_Request], _Reply]:
+        def delete(request: _Request) -> _Reply:
+            with self._lock:
+                if store.pop(request.params['id'], None) is None:
+                    return _Reply(404, {'detail': 'Not found'})
+            return _Reply(204)
+        return delete
+
+    def _sdk_chat(self, request: _Request) -> _Reply:
+        body = request.body or {}
+        message = body.get('user_message')
+        if not message or not body.get('conversation_uuid'):
+            return _Reply(422, {'detail': 'user_message and conversation_uuid are required'})
+        agent_id = request.params['agent_uuid']
+        with self._lock:
+            answer = next(
+                (qa['answer'] for qa in self.q_and_as.values() if qa['agent_id'] == agent_id and qa['question'] == message),
+                f'Mock answer to: {message}'
+            )
+        return _Reply(200, {'answer': answer})
+
+
+class _Server(ThreadingHTTPServer):
+    def handle_error(self, request, client_address) -> None:
+        # Clients closing keep-alive connections or cancelling streams are routine
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+def _handler_for(mock: MockRippletideServer):
+    codec = mock.codec
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        # Headers and body go out in separate writes; without TCP_NODELAY the
+        # body waits on the client's delayed ACK and every response gains ~40ms
+        disable_nagle_algorithm = True
+
+        def log_message(self, format: str, *args: Any) -> None:
+            pass
+
+        def _read_body(self, keep: bool) -> Union[bytes, int]:
+            """Read the request body, or only count its bytes when ``keep`` is False."""
+            parts: List[bytes] = []
+            size = 0
+            if 'chunked' in (self.headers.get('Transfer-Encoding') or '').lower():
+                while True:
+                    length = int(self.rfile.readline().split(b';')[0].strip() or b'0', 16)
+                    if length == 0:
+                        # Skip trailers up to the blank line ending the body
+                        while self.rfile.readline() not in (b'\r\n', b'\n', b''):
+                            pass
+                        break
+                    chunk = self.rfile.read(length)
+                    self.rfile.readline()
+                    size += len(chunk)
+                    if keep:
+                        parts.append(chunk)
+            else:
+                remaining = int(self.headers.get('Content-Length') or 0)
+                while remaining > 0:
+                    chunk = self.rfile.read(min(remaining, 1 << 16))
+                    if not chunk:
+                        break
+                    remaining -= len(chunk)
+                    size += len(chunk)
+                    if keep:
+                        parts.append(chunk)
+            return b''.join(parts) if keep else size
+
+        def _send(self, reply: _Reply) -> None:
+            if reply.events is not None:
+                self._stream(reply)
+                return
+            if reply.body is None:
+                body = b''
+            elif isinstance(reply.body, bytes):
+                body = reply.body
+            else:
+                body = codec.dumps(reply.body)
+            self.send_response(reply.status)
+            if body:
+                self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            for name, value in (reply.headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _stream(self, reply: _Reply) -> None:
+            self.send_response(reply.status)
+            self.send_header('Content-Type', 'text/event-stream')
+            self.send_header('Cache-Control', 'no-cache')
+            self.send_header('Transfer-Encoding', 'chunked')
+            self.end_headers()
+            events = [b'data: ' + codec.dumps(event) + b'\n\n' for event in reply.events] + [b'data: [DONE]\n\n']
+            try:
+                for n, event in enumerate(events):
+                    if n and mock.stream_interval:
+                        time.sleep(mock.stream_interval)
+                    self.wfile.write(b'%x\r\n%s\r\n' % (len(event), event))
+                    self.wfile.flush()
+                self.wfile.write(b'0\r\n\r\n')
+            except (BrokenPipeError, ConnectionResetError):
+                # The client cancelled the stream
+                self.close_connection = True
+
+        def _handle(self) -> None:
+            url = urlsplit(self.path)
+            route, params, handler = mock._route(self.command, url.path)
+            body = self._read_body(keep=route not in UPLOAD_ROUTES)
+            if mock.api_key is not None and self.headers.get('x-api-key') != mock.api_key:
+                self._send(_Reply(401, {'error': 'Unauthorized', 'message': 'Invalid or missing API key'}))
+                return
+            if handler is None:
+                self._send(_Reply(404, {'error': 'Not Found', 'message': f'No route for {url.path}'}))
+                return
+            if isinstance(body, bytes):
+                try:
+                    body = codec.loads(body) if body else None
+                except ValueError as e:
+                    self._send(_Reply(400, {'error': 'Bad Request', 'message': f'Invalid JSON: {e}'}))
+                    return
+            reply, delay = mock._fault(route)
+            if delay > 0:
+                time.sleep(delay)
+            if reply is None:
+                request = _Request(self.command, route, params, dict(parse_qsl(url.query)), self.headers, body)
+                if mock._hidden(request):
+                    reply = _Reply(404, {'error': 'Not Found', 'message': 'Agent not found'})
+                else:
+                    reply = handler(request)
+            self._send(reply)
+
+        do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = _handle
+
+    return Handler
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog='python -m rippletide_client.mock_server',
+        description='Serve an in-memory Rippletide backend for offline benchmarking.'
+    )
+    parser.add_argument('--host', default='127.0.0.1', help='interface to listen on (default: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=8000, help='port to listen on (default: 8000)')
+    parser.add_argument('--latency', default='0',
+                        help='server time per request: SECONDS, constant:S, uniform:LOW,HIGH or lognormal:MEDIAN,P99')
+    parser.add_argument('--route-latency', action='append', default=[], metavar='TEMPLATE=SPEC',
+                        help='latency for one route, e.g. /api/agents/{id}/evaluate=lognormal:0.2,1.5 (repeatable)')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fraction of requests answered with 5xx')
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0, help='fraction of requests answered with 429')
+    parser.add_argument('--max-rps', type=float, help='requests per second served before answering 429')
+    parser.add_argument('--retry-after', type=float, default=1.0, help='Retry-After seconds sent with 429 (default: 1)')
+    parser.add_argument('--test-prompts', type=int, default=20, help='test prompts generated per agent (default: 20)')
+    parser.add_argument('--prompt-size', type=int, default=200, help='characters per generated expected answer (default: 200)')
+    parser.add_argument('--pass-rate', type=float, default=0.8, help='fraction of questions evaluated as correct (default: 0.8)')
+    parser.add_argument('--api-key', help='require this x-api-key (default: accept any request)')
+    parser.add_argument('--seed', type=int, default=0, help='seed for latency, faults and generated content (default: 0)')
+    args = parser.parse_args(argv)
+
+    route_latency = {}
+    for entry in args.route_latency:
+        template, sep, spec = entry.partition('=')
+        if not sep:
+            parser.error(f"--route-latency expects TEMPLATE=SPEC, got {entry!r}")
+        route_latency[template] = spec
+
+    try:
+        mock = MockRippletideServer(
+            host=args.host,
+            port=args.port,
+            latency=args.latency,
+            route_latency=route_latency,
+            error_rate=args.error_rate,
+            rate_limit_rate=args.rate_limit_rate,
+            max_rps=args.max_rps,
+            retry_after=args.retry_after,
+            test_prompts=args.test_prompts,
+            prompt_size=args.prompt_size,
+            pass_rate=args.pass_rate,
+            api_key=args.api_key,
+            seed=args.seed
+        )
+    except ValueError as e:
+        parser.error(str(e))
+    print(f"Mock Rippletide backend on {mock.url} (use RIPPLETIDE_BASE_URL={mock.url})", file=sys.stderr)
+    try:
+        mock.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        mock.server.server_close()
+        stats = mock.stats()
+        print(f"Served {sum(stats['requests'].values())} requests, injected {stats['injected']}", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,198 @@
+"""
+Compact typed response models.
+
+Each model stores its fields in ``__slots__`` instead of a per-instance dict,
+which matters when hundreds of thousands of reports are held in memory.
+Models keep dict-style access by wire name (``report['label']``,
+``prompt['expectedAnswer']``) so code written against the raw JSON keeps
+working, and ``to_dict()`` round-trips unknown fields.
+"""
+import sys
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+
+class Model:
+    """
+    Base class for response models.
+
+    Subclasses declare ``FIELDS`` as (attribute, wire key) pairs and list the
+    same attributes, plus ``extra``, in ``__slots__``. Fields missing from the
+    payload are None; keys not in ``FIELDS`` are kept in ``extra``. As with
+    the dict, a field sent as null is still a key (``report['justification']``
+    returns None) while a missing one raises KeyError.
+    """
+
+    __slots__ = ('extra', '_present')
+    FIELDS: Tuple[Tuple[str, str], ...] = ()
+    _WIRE_KEYS: frozenset = frozenset()
+    _ATTRS: Dict[str, str] = {}
+    _BITS: Dict[str, int] = {}
+    # Fields whose values come from a small vocabulary and are worth interning
+    INTERNED: Tuple[str, ...] = ()
+
+    def __init_subclass__(cls, **kwargs: Any):
+        super().__init_subclass__(**kwargs)
+        # Lookup tables for from_dict and dict-style access
+        cls._WIRE_KEYS = frozenset(key for _, key in cls.FIELDS)
+        cls._ATTRS = {**{attr: attr for attr, _ in cls.FIELDS}, **{key: attr for attr, key in cls.FIELDS}}
+        cls._BITS = {attr: 1 << bit for bit, (attr, _) in enumerate(cls.FIELDS)}
+
+    def __init__(self, **kwargs: Any):
+        # Bit i is set when FIELDS[i] was given, even as None
+        self._present = 0
+        for bit, (attr, _) in enumerate(self.FIELDS):
+            if attr in kwargs:
+                self._present |= 1 << bit
+            setattr(self, attr, kwargs.pop(attr, None))
+        self.extra: Optional[Dict[str, Any]] = kwargs.pop('extra', None)
+        if kwargs:
+            raise TypeError(f"Unexpected fields for {type(self).__name__}: {sorted(kwargs)}")
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]):
+        """Build a model from a decoded JSON object."""
+        obj = cls.__new__(cls)
+        present = 0
+        for bit, (attr, key) in enumerate(cls.FIELDS):
+            if key in data:
+                present |= 1 << bit
+            value = data.get(key)
+            if attr in cls.INTERNED and isinstance(value, str):
+                value = sys.intern(value)
+            setattr(obj, attr, cls._convert(attr, value))
+        extra = {k: v for k, v in data.items() if k not in cls._WIRE_KEYS}
+        obj.extra = extra or None
+        obj._present = present
+        return obj
+
+    @classmethod
+    def from_list(cls, items: List[Dict[str, Any]]) -> list:
+        return [cls.from_dict(item) for item in items]
+
+    @classmethod
+    def _convert(cls, attr: str, value: Any) -> Any:
+        return value
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert back to the wire representation."""
+        data = dict(self.extra) if self.extra else {}
+        for attr, key in self.FIELDS:
+            if not self._has(attr):
+                continue
+            value = getattr(self, attr)
+            if isinstance(value, Model):
+                value = value.to_dict()
+            elif isinstance(value, tuple):
+                value = [item.to_dict() if isinstance(item, Model) else item for item in value]
+            data[key] = value
+        return data
+
+    def _has(self, attr: str) -> bool:
+        """Whether the field was in the payload or has been set since."""
+        if self._present & self._BITS[attr]:
+            return True
+        # Missing fields hold None, or () for lists of models
+        value = getattr(self, attr)
+        return value is not None and value != ()
+
+    def __getitem__(self, key: str) -> Any:
+        attr = self._ATTRS.get(key)
+        if attr is not None:
+            if self._has(attr):
+                return getattr(self, attr)
+        elif self.extra and key in self.extra:
+            return self.extra[key]
+        raise KeyError(key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __contains__(self, key: str) -> bool:
+        attr = self._ATTRS.get(key)
+        if attr is not None:
+            return self._has(attr)
+        return bool(self.extra) and key in self.extra
+
+    def keys(self) -> Iterator[str]:
+        return iter(self.to_dict())
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, Model):
+            return type(self) is type(other) and self.to_dict() == other.to_dict()
+        if isinstance(other, dict):
+            return self.to_dict() == other
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        fields = ', '.join(f"{attr}={getattr(self, attr)!r}" for attr, _ in self.FIELDS)
+        return f"{type(self).__name__}({fields})"
+
+
+class Fact(Model):
+    """One fact checked during an evaluation."""
+
+    __slots__ = ('fact', 'label')
+    FIELDS = (('fact', 'fact'), ('label', 'label'))
+    INTERNED = ('label',)
+
+
+class EvaluationReport(Model):
+    """Result of ``evaluate``: overall label, justification and the facts checked."""
+
+    __slots__ = ('label', 'justification', 'facts')
+    FIELDS = (('label', 'label'), ('justification', 'justification'), ('facts', 'facts'))
+    INTERNED = ('label',)
+
+    @classmethod
+    def _convert(cls, attr: str, value: Any) -> Any:
+        if attr == 'facts':
+            return tuple(Fact.from_dict(fact) for fact in value) if value else ()
+        return value
+
+
+class TestPrompt(Model):
+    """A test question with its expected answer."""
+
+    __slots__ = ('id', 'prompt', 'expected_answer', 'test_answer', 'created_at', 'updated_at')
+    FIELDS = (
+        ('id', 'id'),
+        ('prompt', 'prompt'),
+        ('expected_answer', 'expectedAnswer'),
+        ('test_answer', 'testAnswer'),
+        ('created_at', 'created_at'),
+        ('updated_at', 'updated_at'),
+    )
+
+
+class ChatReply(Model):
+    """Answer returned by ``chat``."""
+
+    __slots__ = ('message', 'session_id', 'agent_id')
+    FIELDS = (('message', 'message'), ('session_id', 'sessionId'), ('agent_id', 'agentId'))
+
+
+class Agent(Model):
+    """An agent as returned by ``create_agent``."""
+
+    __slots__ = (
+        'id', 'name', 'seed', 'num_nodes', 'public_url', 'advanced_payload',
+        'label', 'parent_agent_id', 'created_at', 'updated_at'
+    )
+    FIELDS = (
+        ('id', 'id'),
+        ('name', 'name'),
+        ('seed', 'seed'),
+        ('num_nodes', 'numNodes'),
+        ('public_url', 'publicUrl'),
+        ('advanced_payload', 'advancedPayload'),
+        ('label', 'label'),
+        ('parent_agent_id', 'parentAgentId'),
+        ('created_at', 'created_at'),
+        ('updated_at', 'updated_at'),
+    )
+    INTERNED = ('label',)
@@ -0,0 +1,223 @@
+"""
+Streaming multipart/form-data encoding for large uploads.
+"""
+import asyncio
+import mmap
+import os
+import uuid
+from pathlib import Path
+from typing import AsyncIterator, BinaryIO, Callable, Iterator, List, Optional, Sequence, Tuple, Union
+
+# Bytes read from a source and handed to the socket at a time
+DEFAULT_CHUNK_SIZE = 256 * 1024
+
+# A file part is (filename, path or seekable binary file, content type)
+FileSource = Union[str, Path, BinaryIO]
+FieldValue = Union[str, bytes, Tuple[str, FileSource, str]]
+
+ProgressCallback = Callable[[int, int], None]
+
+
+def _quote(value: str) -> str:
+    # HTML5 form encoding of names and filenames in Content-Disposition
+    return value.replace('"', '%22').replace('\r', '%0D').replace('\n', '%0A')
+
+
+class _Bytes:
+    __slots__ = ('data', 'size')
+
+    def __init__(self, data: bytes):
+        self.data = memoryview(data)
+        self.size = len(data)
+
+    def readinto(self, offset: int, view: memoryview) -> int:
+        n = min(len(view), self.size - offset)
+        view[:n] = self.data[offset:offset + n]
+        return n
+
+    def close(self) -> None:
+        pass
+
+
+class _File:
+    """``size`` bytes of a seekable file from ``start``, memory-mapped when possible."""
+
+    __slots__ = ('file', 'start', 'size', 'owned', 'map', 'view', '_next')
+
+    def __init__(self, source: FileSource, use_mmap: bool):
+        self.map: Optional[mmap.mmap] = None
+        self.view: Optional[memoryview] = None
+        self._next: Optional[int] = None
+        self.owned = isinstance(source, (str, Path))
+        self.file = open(source, 'rb') if self.owned else source
+        if not (hasattr(self.file, 'seek') and hasattr(self.file, 'tell')):
+            raise ValueError("file objects must be seekable to be streamed")
+        try:
+            self.start = self.file.tell()
+            self.size = self.file.seek(0, os.SEEK_END) - self.start
+            self.file.seek(self.start)
+        except (OSError, ValueError) as e:
+            self.close()
+            raise ValueError(f"file objects must be seekable to be streamed: {e}") from e
+        if use_mmap and self.size > 0:
+            try:
+                fileno = self.file.fileno()
+            except (AttributeError, OSError, ValueError):
+                fileno = None
+            if fileno is not None:
+                try:
+                    # Maps the whole file; pages are read by the kernel as they are sent
+                    self.map = mmap.mmap(fileno, 0, access=mmap.ACCESS_READ)
+                    self.view = memoryview(self.map)
+                except (OSError, ValueError):
+                    self.map = None
+
+    def readinto(self, offset: int, view: memoryview) -> int:
+        n = min(len(view), self.size - offset)
+        if self.view is not None:
+            view[:n] = self.view[self.start + offset:self.start + offset + n]
+            return n
+        if self._next != offset:
+            self.file.seek(self.start + offset)
+        read = self.file.readinto(view[:n]) or 0
+        self._next = offset + read
+        return read
+
+    def close(self) -> None:
+        if self.view is not None:
+            self.view.release()
+            self.view = None
+        if self.map is not None:
+            self.map.close()
+            self.map = None
+        if self.owned:
+            self.file.close()
+
+
+class MultipartEncoder:
+    """
+    multipart/form-data body that is streamed rather than built in memory.
+
+    Iterating yields the body in ``chunk_size`` pieces assembled in one
+    reusable buffer, so memory stays flat however large the files are. File
+    parts are memory-mapped when they are paths or real files. Pass the
+    encoder as ``data`` with ``content_type`` as the Content-Type header;
+    ``len``, ``tell`` and ``seek`` let requests set Content-Length and let the
+    client rewind it to retry.
+
+    Args:
+        fields: (name, value) pairs; a value is a str or bytes for a plain field,
+            or (filename, path or seekable binary file, content type) for a file
+        boundary: Multipart boundary (default: random)
+        chunk_size: Bytes per chunk (default: 256 KiB)
+        progress: Optional callback called with (bytes sent, total bytes) after each chunk
+        use_mmap: Memory-map file parts where possible (default: True)
+
+    Raises:
+        ValueError: If a file object is not seekable
+    """
+
+    def __init__(
+        self,
+        fields: Sequence[Tuple[str, FieldValue]],
+        boundary: Optional[str] = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        progress: Optional[ProgressCallback] = None,
+        use_mmap: bool = True
+    ):
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be at least 1")
+        self.boundary = boundary or uuid.uuid4().hex
+        self.chunk_size = chunk_size
+        self.progress = progress
+        self._segments: List[Union[_Bytes, _File]] = []
+        self._position = 0
+        try:
+            for name, value in fields:
+                self._add(name, value, use_mmap)
+            self._segments.append(_Bytes(f'--{self.boundary}--\r\n'.encode('ascii')))
+        except BaseException:
+            self.close()
+            raise
+        self.len = sum(segment.size for segment in self._segments)
+
+    def _add(self, name: str, value: FieldValue, use_mmap: bool) -> None:
+        header = f'--{self.boundary}\r\nContent-Disposition: form-data; name="{_quote(name)}"'
+        if isinstance(value, tuple):
+            filename, source, content_type = value
+            header += f'; filename="{_quote(filename)}"\r\nContent-Type: {content_type}\r\n\r\n'
+            self._segments.append(_Bytes(header.encode('utf-8')))
+            self._segments.append(_File(source, use_mmap))
+            self._segments.append(_Bytes(b'\r\n'))
+        else:
+            data = value.encode('utf-8') if isinstance(value, str) else bytes(value)
+            self._segments.append(_Bytes((header + '\r\n\r\n').encode('utf-8') + data + b'\r\n'))
+
+    @property
+    def content_type(self) -> str:
+        return f'multipart/form-data; boundary={self.boundary}'
+
+    def tell(self) -> int:
+        """Bytes of the body already consumed."""
+        return self._position
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        """Move to a position in the body; the next iteration starts there."""
+        base = {os.SEEK_SET: 0, os.SEEK_CUR: self._position, os.SEEK_END: self.len}[whence]
+        self._position = min(max(0, base + offset), self.len)
+        return self._position
+
+    def __iter__(self) -> Iterator[bytes]:
+        buffer = bytearray(self.chunk_size)
+        view = memoryview(buffer)
+        filled = 0
+        index, offset = 0, self._position
+        while index < len(self._segments) and offset >= self._segments[index].size:
+            offset -= self._segments[index].size
+            index += 1
+        while index < len(self._segments):
+            segment = self._segments[index]
+            n = segment.readinto(offset, view[filled:])
+            if n == 0 and offset < segment.size:
+                raise IOError("file ended before its size when it was added to the upload")
+            filled += n
+            offset += n
+            if offset >= segment.size:
+                index += 1
+                offset = 0
+            if filled == self.chunk_size or (index == len(self._segments) and filled):
+                # Hand out a copy so the buffer can be refilled while it is sent
+                chunk = bytes(view[:filled])
+                filled = 0
+                yield chunk
+                self._position += len(chunk)
+                if self.progress is not None:
+                    self.progress(self._position, self.len)
+
+    async def aiter(self) -> AsyncIterator[bytes]:
+        """Iterate from the current position, reading chunks in the default executor."""
+        loop = asyncio.get_running_loop()
+        chunks = iter(self)
+        while True:
+            chunk = await loop.run_in_executor(None, next, chunks, None)
+            if chunk is None:
+                return
+            yield chunk
+
+    def read_all(self) -> bytes:
+        """The whole body from the current position; for tests and small payloads."""
+        return b''.join(self)
+
+    def close(self) -> None:
+        """Close the files opened by path and release memory maps."""
+        for segment in self._segments:
+            segment.close()
+
+    def __enter__(self) -> "MultipartEncoder":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def __repr__(self) -> str:
+        return f"MultipartEncoder(len={self.len}, position={self._position}, chunk_size={self.chunk_size})"
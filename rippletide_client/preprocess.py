@@ -0,0 +1,268 @@
+"""
+Local PDF pre-processing that shrinks documents before they are uploaded.
+"""
+import os
+import tempfile
+import textwrap
+import zlib
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Iterable, List, Optional, Set, Union
+
+# pypdf is optional and only needed once a PDF is pre-processed, so it is
+# imported on first use rather than with the package
+pypdf = None
+
+PREPROCESS_MODES = ('strip', 'text')
+
+# Embedded font programs; the font dictionaries, widths and ToUnicode maps
+# that text extraction relies on are kept
+FONT_FILE_KEYS = ('/FontFile', '/FontFile2', '/FontFile3')
+
+# Layout of the pages written by text mode (US Letter, 10pt Helvetica)
+TEXT_PAGE_WIDTH, TEXT_PAGE_HEIGHT = 612, 792
+TEXT_MARGIN = 50
+TEXT_FONT_SIZE = 10
+TEXT_LEADING = 12
+TEXT_LINE_CHARS = 100
+TEXT_PAGE_LINES = (TEXT_PAGE_HEIGHT - 2 * TEXT_MARGIN) // TEXT_LEADING
+
+
+def check_preprocess_mode(mode: str) -> None:
+    """
+    Fail early if PDFs cannot be pre-processed in `mode`.
+
+    Raises:
+        ImportError: If pypdf is not installed
+        ValueError: If mode is unknown
+    """
+    global pypdf
+    if pypdf is None:
+        try:
+            import pypdf
+        except ImportError:  # pragma: no cover - optional dependency
+            raise ImportError("PDF pre-processing requires pypdf. Install it with `pip install pypdf`.") from None
+    if mode not in PREPROCESS_MODES:
+        raise ValueError(f"Unknown pre-processing mode {mode!r}; expected one of {', '.join(PREPROCESS_MODES)}")
+
+
+class PreprocessedPDF:
+    """
+    A pre-processed copy of a PDF, held in a temporary file until closed.
+
+    Attributes:
+        file: The processed PDF, positioned at its start
+        name: File name of the original, to upload the copy under
+        mode: Pre-processing mode that produced it
+        original_size: Size of the original in bytes
+        size: Size of the processed copy in bytes
+        pages: Number of pages processed
+    """
+
+    def __init__(self, file: BinaryIO, name: str, mode: str, original_size: int, pages: int):
+        self.file = file
+        self.name = name
+        self.mode = mode
+        self.original_size = original_size
+        self.size = file.seek(0, os.SEEK_END)
+        self.pages = pages
+        file.seek(0)
+
+    @property
+    def saved(self) -> int:
+        """Bytes saved compared with the original (negative if the copy is larger)."""
+        return self.original_size - self.size
+
+    @property
+    def ratio(self) -> float:
+        """Size of the copy as a fraction of the original."""
+        return self.size / self.original_size if self.original_size else 1.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'mode': self.mode,
+            'pages': self.pages,
+            'original_size': self.original_size,
+            'size': self.size,
+            'saved': self.saved,
+        }
+
+    def close(self) -> None:
+        self.file.close()
+
+    def __enter__(self) -> "PreprocessedPDF":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def __repr__(self) -> str:
+        return (
+            f"PreprocessedPDF({self.name!r}, mode={self.mode!r}, original_size={self.original_size}, "
+            f"size={self.size}, saved={self.saved})"
+        )
+
+
+def _strip_font_files(resources: Any, seen: Set[int]) -> None:
+    resources = resources.get_object() if resources is not None else None
+    if not resources or id(resources) in seen:
+        return
+    seen.add(id(resources))
+    for font in (resources.get('/Font') or {}).values():
+        font = font.get_object()
+        descriptors = [font.get('/FontDescriptor')]
+        descriptors += [d.get_object().get('/FontDescriptor') for d in font.get('/DescendantFonts') or []]
+        for descriptor in descriptors:
+            if descriptor is None:
+                continue
+            descriptor = descriptor.get_object()
+            for key in FONT_FILE_KEYS:
+                if key in descriptor:
+                    del descriptor[key]
+    # Form XObjects carry resources of their own
+    for xobject in (resources.get('/XObject') or {}).values():
+        xobject = xobject.get_object()
+        if xobject.get('/Subtype') == '/Form':
+            _strip_font_files(xobject.get('/Resources'), seen)
+
+
+def _strip(reader: "pypdf.PdfReader", output: BinaryIO, images: bool, fonts: bool) -> int:
+    writer = pypdf.PdfWriter(clone_from=reader)
+    if images:
+        writer.remove_images()
+    if fonts:
+        seen: Set[int] = set()
+        for page in writer.pages:
+            _strip_font_files(page.get('/Resources'), seen)
+    for page in writer.pages:
+        page.compress_content_streams()
+    # Removed images and font programs are left as unreferenced objects otherwise
+    writer.compress_identical_objects(remove_identicals=True, remove_orphans=True)
+    writer.write(output)
+    return len(writer.pages)
+
+
+def _escape_text(line: str) -> bytes:
+    data = line.encode('cp1252', errors='replace')
+    return data.replace(b'\\', b'\\\\').replace(b'(', b'\\(').replace(b')', b'\\)')
+
+
+def _text_pages(texts: Iterable[str]) -> Iterable[List[str]]:
+    """Wrap each source page's text and split it into output pages of TEXT_PAGE_LINES lines."""
+    for text in texts:
+        lines: List[str] = []
+        for paragraph in text.replace('\r', '').replace('\t', '    ').split('\n'):
+            lines += textwrap.wrap(paragraph, TEXT_LINE_CHARS) or ['']
+        for start in range(0, max(1, len(lines)), TEXT_PAGE_LINES):
+            yield lines[start:start + TEXT_PAGE_LINES]
+
+
+def write_text_pdf(texts: Iterable[str], output: BinaryIO) -> int:
+    """
+    Write plain text as a minimal PDF with a standard, non-embedded font.
+
+    Pages are written as they are produced, so memory use is bounded by one
+    page. Characters outside Windows-1252 are replaced with '?'.
+
+    Args:
+        texts: Text of each source page; long pages continue on extra pages
+        output: Binary stream to write the PDF to
+
+    Returns:
+        Number of pages written
+    """
+    offsets = {}
+    position = output.tell()
+
+    def write_object(number: int, body: bytes) -> None:
+        nonlocal position
+        offsets[number] = position
+        data = b'%d 0 obj\n' % number + body + b'\nendobj\n'
+        output.write(data)
+        position += len(data)
+
+    header = b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n'
+    output.write(header)
+    position += len(header)
+    # 1 is the catalog and 2 the page tree, written last once the pages are known
+    write_object(1, b'<< /Type /Catalog /Pages 2 0 R >>')
+    write_object(3, b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>')
+    kids = []
+    number = 4
+    for lines in _text_pages(texts):
+        content = b'BT /F1 %d Tf %d TL %d %d Td\n' % (
+            TEXT_FONT_SIZE, TEXT_LEADING, TEXT_MARGIN, TEXT_PAGE_HEIGHT - TEXT_MARGIN
+        )
+        content += b''.join(b'(' + _escape_text(line) + b') Tj T*\n' for line in lines) + b'ET'
+        stream = zlib.compress(content)
+        write_object(number, b'<< /Length %d /Filter /FlateDecode >>\nstream\n' % len(stream) + stream + b'\nendstream')
+        write_object(number + 1, (
+            b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %d %d] '
+            b'/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>'
+        ) % (TEXT_PAGE_WIDTH, TEXT_PAGE_HEIGHT, number))
+        kids.append(number + 1)
+        number += 2
+    write_object(2, b'<< /Type /Pages /Kids [%s] /Count %d >>' % (
+        b' '.join(b'%d 0 R' % kid for kid in kids), len(kids)
+    ))
+    xref = position
+    output.write(b'xref\n0 %d\n0000000000 65535 f \n' % number)
+    output.write(b''.join(b'%010d 00000 n \n' % offsets[n] for n in range(1, number)))
+    output.write(b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (number, xref))
+    return len(kids)
+
+
+def preprocess_pdf(
+    source: Union[str, Path, BinaryIO],
+    mode: str = 'strip',
+    images: bool = True,
+    fonts: bool = True,
+    name: Optional[str] = None
+) -> PreprocessedPDF:
+    """
+    Shrink a PDF for question extraction, which only needs its text.
+
+    ``'strip'`` removes images and embedded font programs, keeping the page
+    content, fonts' character maps and layout; text extraction is unchanged.
+    ``'text'`` extracts the text of each page and writes it as a plain,
+    compact text-only PDF; it is smaller still but loses layout and tables,
+    replaces characters outside Windows-1252, and yields empty pages for
+    scanned documents. Strip mode holds the document's objects in memory while
+    it rewrites them; text mode works a page at a time. The copy is written to
+    a temporary file.
+
+    Args:
+        source: Path to the PDF or seekable binary file
+        mode: 'strip' or 'text' (default: 'strip')
+        images: In strip mode, remove images (default: True)
+        fonts: In strip mode, remove embedded font programs (default: True)
+        name: File name to report for the copy (default: the source's name, or 'document.pdf')
+
+    Returns:
+        PreprocessedPDF; close it (or use it as a context manager) to delete the copy
+
+    Raises:
+        ImportError: If pypdf is not installed
+        ValueError: If mode is unknown
+        pypdf.errors.PdfReadError: If the source is not a readable PDF
+    """
+    check_preprocess_mode(mode)
+    if isinstance(source, (str, Path)):
+        with open(source, 'rb') as f:
+            return preprocess_pdf(f, mode, images, fonts, name or Path(source).name)
+    start = source.tell()
+    original_size = source.seek(0, os.SEEK_END) - start
+    source.seek(start)
+
+    # Given a stream, pypdf reads objects as they are needed instead of loading the file
+    reader = pypdf.PdfReader(source)
+    output = tempfile.TemporaryFile(suffix='.pdf')
+    try:
+        if mode == 'strip':
+            pages = _strip(reader, output, images, fonts)
+        else:
+            write_text_pdf((page.extract_text() or '' for page in reader.pages), output)
+            pages = len(reader.pages)
+    except BaseException:
+        output.close()
+        raise
+    return PreprocessedPDF(output, name or 'document.pdf', mode, original_size, pages)
@@ -0,0 +1,214 @@
+"""
+Client-side rate limiting shared by threads and asyncio tasks.
+"""
+import asyncio
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from typing import AsyncIterator, Deque, Dict, Iterator, Optional, Tuple, Union
+
+# Per-endpoint limits are either a rate or a (rate, burst) pair
+EndpointLimit = Union[float, Tuple[float, int]]
+
+# A thread blocked in acquire() waits on an Event; a task in acquire_async() on a Future of its loop
+_Waiter = Union[threading.Event, Tuple[asyncio.AbstractEventLoop, asyncio.Future]]
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket.
+
+    Callers reserve a token and are told how long to wait for it, rather than
+    blocking while holding the lock, so the same bucket can pace threads
+    (``time.sleep``) and coroutines (``asyncio.sleep``).
+
+    Args:
+        rate: Tokens added per second
+        burst: Maximum number of tokens that can accumulate (default: max(1, rate))
+    """
+
+    def __init__(self, rate: float, burst: Optional[int] = None):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1, int(rate))
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self) -> float:
+        """Take one token, returning the number of seconds to wait before using it."""
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens -= 1
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    def try_take(self) -> bool:
+        """Take one token if one is available now, without going into debt."""
+        with self._lock:
+            self._refill(time.monotonic())
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+    def pause(self, seconds: float) -> None:
+        """Stop handing out tokens for the next `seconds`, e.g. after a 429."""
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens = min(self._tokens, -seconds * self.rate)
+
+
+class RateLimiter:
+    """
+    Limits request rate and concurrency across every client that shares it.
+
+    A global token bucket caps requests per second, optional per-endpoint
+    buckets cap individual routes (keyed by endpoint template, e.g.
+    ``'/api/agents/{agent_id}/evaluate'``), and a slot counter caps requests
+    in flight. One instance can be shared by a ``RippletideClient`` used from
+    many threads and an ``AsyncRippletideClient`` at the same time; threads
+    and tasks waiting for a slot get one in the order they asked.
+
+    Args:
+        requests_per_second: Global request rate, or None for no global rate limit
+        burst: Global bucket size (default: max(1, requests_per_second))
+        max_in_flight: Maximum concurrent requests, or None for no limit
+        per_endpoint: Mapping of endpoint template to rate or (rate, burst)
+    """
+
+    def __init__(
+        self,
+        requests_per_second: Optional[float] = None,
+        burst: Optional[int] = None,
+        max_in_flight: Optional[int] = None,
+        per_endpoint: Optional[Dict[str, EndpointLimit]] = None
+    ):
+        if max_in_flight is not None and max_in_flight < 1:
+            raise ValueError("max_in_flight must be at least 1")
+        self.bucket = TokenBucket(requests_per_second, burst) if requests_per_second else None
+        self.endpoint_buckets: Dict[str, TokenBucket] = {}
+        for route, limit in (per_endpoint or {}).items():
+            rate, route_burst = limit if isinstance(limit, tuple) else (limit, None)
+            self.endpoint_buckets[route] = TokenBucket(rate, route_burst)
+        self.max_in_flight = max_in_flight
+
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        # Threads and tasks waiting for a slot, oldest first; release() hands its slot to the first
+        self._waiters: Deque[_Waiter] = deque()
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def _reserve(self, route: str) -> float:
+        delay = 0.0
+        if self.bucket is not None:
+            delay = self.bucket.reserve()
+        endpoint_bucket = self.endpoint_buckets.get(route)
+        if endpoint_bucket is not None:
+            delay = max(delay, endpoint_bucket.reserve())
+        return delay
+
+    def acquire(self, route: str) -> None:
+        """Block the calling thread until a request to `route` may be sent."""
+        delay = self._reserve(route)
+        if delay > 0:
+            time.sleep(delay)
+        if self.max_in_flight is None:
+            return
+        with self._lock:
+            # Free slots go to earlier waiters first
+            if self._in_flight < self.max_in_flight and not self._waiters:
+                self._in_flight += 1
+                return
+            waiter = threading.Event()
+            self._waiters.append(waiter)
+        # release() hands its slot directly to this waiter
+        waiter.wait()
+
+    async def acquire_async(self, route: str) -> None:
+        """Wait, without blocking the event loop, until a request to `route` may be sent."""
+        delay = self._reserve(route)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if self.max_in_flight is None:
+            return
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self._in_flight < self.max_in_flight and not self._waiters:
+                self._in_flight += 1
+                return
+            waiter = loop.create_future()
+            self._waiters.append((loop, waiter))
+        # release() hands its slot directly to this waiter
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # The slot arrived just as we were cancelled
+                self.release(route)
+            raise
+
+    def release(self, route: str) -> None:
+        """Mark a request to `route` as finished, freeing its in-flight slot."""
+        if self.max_in_flight is None:
+            return
+        with self._lock:
+            while self._waiters:
+                waiter = self._waiters.popleft()
+                if isinstance(waiter, threading.Event):
+                    waiter.set()
+                    return
+                loop, future = waiter
+                try:
+                    loop.call_soon_threadsafe(self._hand_over, future, route)
+                    return
+                except RuntimeError:
+                    # The waiter's loop is closed; try the next one
+                    continue
+            self._in_flight -= 1
+
+    def _hand_over(self, waiter: asyncio.Future, route: str) -> None:
+        if waiter.done():
+            # The waiting task was cancelled; pass the slot on
+            self.release(route)
+        else:
+            waiter.set_result(None)
+
+    def throttle(self, route: str, seconds: float) -> None:
+        """
+        Pause the buckets serving `route` after the server pushed back.
+
+        Every caller sharing the limiter slows down together instead of each
+        one discovering the 429 independently.
+        """
+        if seconds <= 0:
+            return
+        endpoint_bucket = self.endpoint_buckets.get(route)
+        if endpoint_bucket is not None:
+            endpoint_bucket.pause(seconds)
+        elif self.bucket is not None:
+            self.bucket.pause(seconds)
+
+    @contextmanager
+    def limit(self, route: str) -> Iterator[None]:
+        self.acquire(route)
+        try:
+            yield
+        finally:
+            self.release(route)
+
+    @asynccontextmanager
+    async def limit_async(self, route: str) -> AsyncIterator[None]:
+        await self.acquire_async(route)
+        try:
+            yield
+        finally:
+            self.release(route)
@@ -0,0 +1,438 @@
+"""
+Columnar storage and aggregation of large batches of evaluation results.
+"""
+import csv
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Union
+
+from .batch import BatchResult, normalize_item
+
+# numpy and pyarrow are optional and slow to import, so they are imported on
+# first use rather than with the package
+np = None
+pyarrow = None
+
+# Labels counted as a pass unless the result set is given its own. The
+# evaluate endpoint is not described in docs/openapi-eval.json; 'correct' is
+# the report label the service (and the mock backend) gives a passing answer.
+# Fact labels such as 'FactIsPresent' grade single facts, never a report.
+DEFAULT_PASSING_LABELS = frozenset({'correct'})
+
+CSV_COLUMNS = ('index', 'tag', 'question', 'label', 'passed', 'latency', 'justification', 'error')
+
+
+class StringTable:
+    """
+    Stores each distinct string once and refers to it by an integer code.
+
+    Code -1 stands for None.
+    """
+
+    def __init__(self):
+        self._codes: Dict[str, int] = {}
+        self.values: List[str] = []
+
+    def code(self, value: Optional[str]) -> int:
+        if value is None:
+            return -1
+        code = self._codes.get(value)
+        if code is None:
+            code = self._codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def lookup(self, value: str) -> int:
+        """Return the code of an existing string, or -1 if it was never stored."""
+        return self._codes.get(value, -1)
+
+    def __getitem__(self, code: int) -> Optional[str]:
+        return None if code < 0 else self.values[code]
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+
+def _import_numpy() -> None:
+    global np
+    if np is None:
+        try:
+            import numpy
+        except ImportError:  # pragma: no cover - optional dependency
+            raise ImportError("EvaluationResultSet requires numpy. Install it with `pip install numpy`.") from None
+        np = numpy
+
+
+def _import_pyarrow() -> None:
+    global pyarrow
+    if pyarrow is None:
+        try:
+            import pyarrow as module
+            import pyarrow.parquet
+        except ImportError:  # pragma: no cover - optional dependency
+            raise ImportError(
+                "Arrow and Parquet export require pyarrow. Install it with `pip install pyarrow`."
+            ) from None
+        pyarrow = module
+
+
+class EvaluationResultSet:
+    """
+    Column-oriented store of evaluation results.
+
+    Latencies, label codes, pass flags and tag codes are kept in NumPy
+    arrays, and questions, justifications and error messages are stored once
+    each in a shared string table, so a run of 100k+ results costs a few
+    megabytes and aggregates without touching Python objects per row.
+
+    Args:
+        passing_labels: Report labels counted as a pass (default: 'correct')
+        capacity: Number of rows to preallocate; the arrays double when full (default: 1024)
+
+    Raises:
+        ImportError: If numpy is not installed
+    """
+
+    def __init__(
+        self,
+        passing_labels: Iterable[str] = DEFAULT_PASSING_LABELS,
+        capacity: int = 1024
+    ):
+        _import_numpy()
+        self.passing_labels = frozenset(passing_labels)
+        self.labels = StringTable()
+        self.tags = StringTable()
+        self.strings = StringTable()
+        self._size = 0
+        capacity = max(capacity, 1)
+        self._index = np.empty(capacity, dtype=np.int64)
+        self._latency = np.empty(capacity, dtype=np.float64)
+        self._label = np.empty(capacity, dtype=np.int32)
+        self._passed = np.empty(capacity, dtype=np.bool_)
+        self._tag = np.empty(capacity, dtype=np.int32)
+        self._question = np.empty(capacity, dtype=np.int32)
+        self._justification = np.empty(capacity, dtype=np.int32)
+        self._error = np.empty(capacity, dtype=np.int32)
+
+    @classmethod
+    def from_batch(
+        cls,
+        results: Iterable[BatchResult],
+        tag: Optional[Callable[[Any], Optional[str]]] = None,
+        **kwargs
+    ) -> "EvaluationResultSet":
+        """
+        Build a result set from the output of ``evaluate_many``.
+
+        Args:
+            results: BatchResult objects
+            tag: Function mapping an input item to its tag (default: the item's 'tag' key, if any)
+            **kwargs: Passed to the constructor
+
+        Returns:
+            EvaluationResultSet holding one row per result
+        """
+        result_set = cls(**kwargs)
+        result_set.extend(results, tag=tag)
+        return result_set
+
+    _COLUMNS = ('_index', '_latency', '_label', '_passed', '_tag', '_question', '_justification', '_error')
+
+    def _grow(self) -> None:
+        capacity = len(self._latency) * 2
+        for name in self._COLUMNS:
+            old = getattr(self, name)
+            new = np.empty(capacity, dtype=old.dtype)
+            new[:self._size] = old[:self._size]
+            setattr(self, name, new)
+
+    def add(
+        self,
+        question: Optional[str],
+        label: Optional[str] = None,
+        latency: Optional[float] = None,
+        justification: Optional[str] = None,
+        tag: Optional[str] = None,
+        error: Optional[str] = None,
+        index: Optional[int] = None
+    ) -> None:
+        """
+        Append one result.
+
+        Args:
+            question: Question that was evaluated, or None if the item had none
+            label: Evaluation label, or None if the call failed
+            latency: Duration of the call in seconds
+            justification: Evaluation justification
+            tag: Group used by :meth:`by_tag`
+            error: Error message if the call failed
+            index: Position of the item in the input (default: the row number)
+        """
+        if self._size == len(self._latency):
+            self._grow()
+        row = self._size
+        self._index[row] = row if index is None else index
+        self._latency[row] = np.nan if latency is None else latency
+        self._label[row] = self.labels.code(label)
+        self._passed[row] = error is None and label in self.passing_labels
+        self._tag[row] = self.tags.code(tag)
+        self._question[row] = self.strings.code(question)
+        self._justification[row] = self.strings.code(justification)
+        self._error[row] = self.strings.code(error)
+        self._size += 1
+
+    def add_result(self, result: BatchResult, tag: Optional[Callable[[Any], Optional[str]]] = None) -> None:
+        """Append one BatchResult from ``evaluate_many``."""
+        try:
+            question, _ = normalize_item(result.item)
+        except ValueError:
+            # evaluate_many reports malformed items as failed results
+            question = None
+        if tag is not None:
+            item_tag = tag(result.item)
+        else:
+            item_tag = result.item.get('tag') if hasattr(result.item, 'get') else None
+        report = result.result
+        self.add(
+            question,
+            label=report.get('label') if report is not None else None,
+            latency=result.latency,
+            justification=report.get('justification') if report is not None else None,
+            tag=item_tag,
+            error=None if result.error is None else f"{type(result.error).__name__}: {result.error}",
+            index=result.index
+        )
+
+    def extend(self, results: Iterable[BatchResult], tag: Optional[Callable[[Any], Optional[str]]] = None) -> None:
+        for result in results:
+            self.add_result(result, tag=tag)
+
+    def __len__(self) -> int:
+        return self._size
+
+    # Column views. These are read-only views of the first len(self) rows and
+    # stay valid (but stop tracking new rows) when the store grows.
+
+    def _view(self, name: str) -> "np.ndarray":
+        view = getattr(self, name)[:self._size]
+        view.flags.writeable = False
+        return view
+
+    @property
+    def latencies(self) -> "np.ndarray":
+        """Latency of each call in seconds (NaN if unknown)."""
+        return self._view('_latency')
+
+    @property
+    def label_codes(self) -> "np.ndarray":
+        """Label of each row as a code into ``labels`` (-1 for failed calls)."""
+        return self._view('_label')
+
+    @property
+    def passed(self) -> "np.ndarray":
+        """Pass flag of each row."""
+        return self._view('_passed')
+
+    @property
+    def tag_codes(self) -> "np.ndarray":
+        """Tag of each row as a code into ``tags`` (-1 if untagged)."""
+        return self._view('_tag')
+
+    @property
+    def errors(self) -> "np.ndarray":
+        """Whether each row's call failed."""
+        return self._view('_error') >= 0
+
+    def _mask(self, tag: Optional[str]) -> Union[slice, "np.ndarray"]:
+        if tag is None:
+            return slice(None)
+        code = self.tags.lookup(tag)
+        if code < 0:
+            # Unknown tag; code -1 would select the untagged rows
+            return np.zeros(self._size, dtype=np.bool_)
+        return self.tag_codes == code
+
+    def pass_rate(self, tag: Optional[str] = None) -> float:
+        """
+        Fraction of rows that passed.
+
+        Args:
+            tag: Only consider rows with this tag (default: all rows)
+
+        Returns:
+            Pass rate between 0 and 1, or NaN if there are no rows
+        """
+        passed = self.passed[self._mask(tag)]
+        return float(passed.mean()) if len(passed) else float('nan')
+
+    def label_counts(self) -> Dict[Optional[str], int]:
+        """Number of rows per label; failed calls are counted under None."""
+        counts = np.bincount(self.label_codes + 1, minlength=len(self.labels) + 1)
+        result = {label: int(counts[code + 1]) for code, label in enumerate(self.labels.values)}
+        if counts[0]:
+            result[None] = int(counts[0])
+        return result
+
+    def percentiles(
+        self,
+        q: Sequence[float] = (50, 90, 95, 99),
+        tag: Optional[str] = None
+    ) -> Dict[float, float]:
+        """
+        Latency percentiles in seconds, ignoring rows without a latency.
+
+        Args:
+            q: Percentiles to compute, between 0 and 100
+            tag: Only consider rows with this tag (default: all rows)
+
+        Returns:
+            Mapping of percentile to latency (NaN if there are no latencies)
+        """
+        latencies = self.latencies[self._mask(tag)]
+        latencies = latencies[~np.isnan(latencies)]
+        if not len(latencies):
+            return {p: float('nan') for p in q}
+        return dict(zip(q, (float(v) for v in np.percentile(latencies, q))))
+
+    def by_tag(self, q: Sequence[float] = (50, 95)) -> Dict[Optional[str], Dict[str, Any]]:
+        """
+        Per-tag breakdown of the run.
+
+        Args:
+            q: Latency percentiles to include for each tag
+
+        Returns:
+            Mapping of tag (None for untagged rows) to a dict with ``count``,
+            ``passed``, ``errors``, ``pass_rate`` and ``latency`` percentiles
+        """
+        codes = self.tag_codes + 1
+        size = len(self.tags) + 1
+        counts = np.bincount(codes, minlength=size)
+        passed = np.bincount(codes, weights=self.passed, minlength=size)
+        errors = np.bincount(codes, weights=self.errors, minlength=size)
+
+        # Sort once by tag so each group's latencies are a contiguous slice
+        order = np.argsort(codes, kind='stable')
+        bounds = np.concatenate(([0], np.cumsum(counts)))
+        latencies = self.latencies[order]
+
+        breakdown: Dict[Optional[str], Dict[str, Any]] = {}
+        for code in np.flatnonzero(counts):
+            group = latencies[bounds[code]:bounds[code + 1]]
+            group = group[~np.isnan(group)]
+            count = int(counts[code])
+            breakdown[self.tags[code - 1]] = {
+                'count': count,
+                'passed': int(passed[code]),
+                'errors': int(errors[code]),
+                'pass_rate': float(passed[code]) / count,
+                'latency': (
+                    dict(zip(q, (float(v) for v in np.percentile(group, q))))
+                    if len(group) else {p: float('nan') for p in q}
+                ),
+            }
+        return breakdown
+
+    def summary(self) -> Dict[str, Any]:
+        """Overall counts, pass rate, label counts and latency percentiles."""
+        return {
+            'count': len(self),
+            'passed': int(self.passed.sum()),
+            'errors': int(self.errors.sum()),
+            'pass_rate': self.pass_rate(),
+            'labels': self.label_counts(),
+            'latency': self.percentiles(),
+        }
+
+    def row(self, i: int) -> Dict[str, Any]:
+        """Return one row as a dict (for inspection; aggregate with the column methods)."""
+        if not -self._size <= i < self._size:
+            raise IndexError(i)
+        i %= self._size
+        latency = float(self._latency[i])
+        return {
+            'index': int(self._index[i]),
+            'tag': self.tags[self._tag[i]],
+            'question': self.strings[self._question[i]],
+            'label': self.labels[self._label[i]],
+            'passed': bool(self._passed[i]),
+            'latency': None if latency != latency else latency,
+            'justification': self.strings[self._justification[i]],
+            'error': self.strings[self._error[i]],
+        }
+
+    def to_csv(self, path: Union[str, Path], chunk_size: int = 10_000) -> None:
+        """
+        Write the result set to a CSV file, one row per result.
+
+        Args:
+            path: Destination file
+            chunk_size: Rows converted and written at a time (default: 10000)
+        """
+        strings = self.strings.values + ['']
+        labels = self.labels.values + ['']
+        tags = self.tags.values + ['']
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(CSV_COLUMNS)
+            for start in range(0, self._size, chunk_size):
+                stop = min(start + chunk_size, self._size)
+                # Code -1 indexes the trailing '' in each lookup list
+                latencies = self._latency[start:stop]
+                writer.writerows(zip(
+                    self._index[start:stop].tolist(),
+                    [tags[c] for c in self._tag[start:stop].tolist()],
+                    [strings[c] for c in self._question[start:stop].tolist()],
+                    [labels[c] for c in self._label[start:stop].tolist()],
+                    self._passed[start:stop].astype(np.int8).tolist(),
+                    ['' if v != v else repr(v) for v in latencies.tolist()],
+                    [strings[c] for c in self._justification[start:stop].tolist()],
+                    [strings[c] for c in self._error[start:stop].tolist()],
+                ))
+
+    def to_arrow(self) -> "pyarrow.Table":
+        """
+        Return the result set as a ``pyarrow.Table``.
+
+        String columns are dictionary-encoded straight from the string
+        tables, so no per-row Python objects are created.
+
+        Raises:
+            ImportError: If pyarrow is not installed
+        """
+        _import_pyarrow()
+
+        def encoded(codes: "np.ndarray", table: StringTable) -> "pyarrow.DictionaryArray":
+            codes = codes[:self._size]
+            return pyarrow.DictionaryArray.from_arrays(
+                pyarrow.array(codes, mask=codes < 0),
+                pyarrow.array(table.values, type=pyarrow.string())
+            )
+
+        latencies = self.latencies
+        return pyarrow.table({
+            'index': pyarrow.array(self._index[:self._size]),
+            'tag': encoded(self._tag, self.tags),
+            'question': encoded(self._question, self.strings),
+            'label': encoded(self._label, self.labels),
+            'passed': pyarrow.array(self.passed),
+            'latency': pyarrow.array(latencies, mask=np.isnan(latencies)),
+            'justification': encoded(self._justification, self.strings),
+            'error': encoded(self._error, self.strings),
+        })
+
+    def to_parquet(self, path: Union[str, Path], **kwargs) -> None:
+        """
+        Write the result set to a Parquet file.
+
+        Args:
+            path: Destination file
+            **kwargs: Passed to ``pyarrow.parquet.write_table`` (e.g. compression='zstd')
+
+        Raises:
+            ImportError: If pyarrow is not installed
+        """
+        table = self.to_arrow()
+        pyarrow.parquet.write_table(table, str(path), **kwargs)
+
+    def __repr__(self) -> str:
+        return f"EvaluationResultSet(rows={len(self)}, pass_rate={self.pass_rate():.3f})"
@@ -0,0 +1,145 @@
+"""
+Retry policy with capped exponential backoff and jitter.
+"""
+import random
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Collection, Iterable, List, Optional, Tuple
+
+# Called as on_retry(method, endpoint, attempt, delay, reason) before sleeping
+RetryCallback = Callable[[str, str, int, float, str], None]
+
+
+class RetryPolicy:
+    """
+    Decides whether a failed request should be retried and how long to wait.
+
+    Idempotent methods are retried on transient statuses and connection
+    errors. POST is only retried when ``retry_post`` is set, except for 429
+    responses and failed connection attempts, which guarantee the request was
+    never processed and are therefore always safe to repeat.
+
+    Args:
+        max_retries: Maximum number of retries after the first attempt (default: 3)
+        backoff_factor: Base delay in seconds; attempt n waits up to backoff_factor * 2**n (default: 0.5)
+        max_backoff: Upper bound on the computed delay in seconds (default: 30)
+        status_forcelist: Response statuses that are considered transient
+        retry_post: Also retry POST requests on transient failures (default: False)
+        respect_retry_after: Honour the server's Retry-After header (default: True)
+        max_retry_after: Upper bound on a Retry-After delay in seconds (default: 120)
+        jitter: Randomise delays ("full jitter") so concurrent callers spread out (default: True)
+        on_retry: Optional callback invoked before each retry
+    """
+
+    IDEMPOTENT_METHODS = frozenset({'GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'})
+    DEFAULT_STATUS_FORCELIST = frozenset({429, 500, 502, 503, 504})
+    # Statuses that mean the server did not act on the request
+    ALWAYS_SAFE_STATUSES = frozenset({429})
+
+    def __init__(
+        self,
+        max_retries: int = 3,
+        backoff_factor: float = 0.5,
+        max_backoff: float = 30.0,
+        status_forcelist: Collection[int] = DEFAULT_STATUS_FORCELIST,
+        retry_post: bool = False,
+        respect_retry_after: bool = True,
+        max_retry_after: float = 120.0,
+        jitter: bool = True,
+        on_retry: Optional[RetryCallback] = None
+    ):
+        if max_retries < 0:
+            raise ValueError("max_retries must be non-negative")
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.status_forcelist = frozenset(status_forcelist)
+        self.retry_post = retry_post
+        self.respect_retry_after = respect_retry_after
+        self.max_retry_after = max_retry_after
+        self.jitter = jitter
+        self.on_retry = on_retry
+
+    def is_retryable_method(self, method: str) -> bool:
+        method = method.upper()
+        return method in self.IDEMPOTENT_METHODS or (self.retry_post and method == 'POST')
+
+    def should_retry_status(self, method: str, status: int, retries: int) -> bool:
+        """Whether a response with this status should be retried after `retries` retries."""
+        if retries >= self.max_retries or status not in self.status_forcelist:
+            return False
+        return status in self.ALWAYS_SAFE_STATUSES or self.is_retryable_method(method)
+
+    def should_retry_error(self, method: str, retries: int, connect_failed: bool = False) -> bool:
+        """
+        Whether a transport error should be retried after `retries` retries.
+
+        Args:
+            method: HTTP method of the failed request
+            retries: Number of retries already made
+            connect_failed: The connection was never established, so the request was not sent
+        """
+        if retries >= self.max_retries:
+            return False
+        return connect_failed or self.is_retryable_method(method)
+
+    def get_backoff(self, retries: int, retry_after: Optional[float] = None) -> float:
+        """
+        Delay before the next attempt.
+
+        Args:
+            retries: Number of retries already made (0 before the first retry)
+            retry_after: Delay requested by the server, if any
+
+        Returns:
+            Seconds to wait
+        """
+        delay = min(self.max_backoff, self.backoff_factor * (2 ** retries))
+        if self.jitter:
+            delay = random.uniform(0, delay)
+        if self.respect_retry_after and retry_after is not None:
+            delay = max(delay, min(retry_after, self.max_retry_after))
+        return delay
+
+    @staticmethod
+    def parse_retry_after(value: Optional[str]) -> Optional[float]:
+        """Parse a Retry-After header given either as seconds or as an HTTP date."""
+        if not value:
+            return None
+        value = value.strip()
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            retry_at = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        return max(0.0, retry_at.timestamp() - time.time())
+
+    def notify(self, method: str, endpoint: str, attempt: int, delay: float, reason: str) -> None:
+        if self.on_retry is not None:
+            self.on_retry(method, endpoint, attempt, delay, reason)
+
+
+def snapshot_streams(kwargs: dict) -> List[Tuple[Any, int]]:
+    """Record the positions of seekable file objects in request kwargs so a retry can rewind them."""
+    streams: Iterable[Any] = []
+    files = kwargs.get('files')
+    if isinstance(files, dict):
+        streams = [value[1] if isinstance(value, tuple) else value for value in files.values()]
+    elif kwargs.get('data') is not None and hasattr(kwargs['data'], 'seek'):
+        streams = [kwargs['data']]
+    positions = []
+    for stream in streams:
+        if hasattr(stream, 'seek') and hasattr(stream, 'tell'):
+            try:
+                positions.append((stream, stream.tell()))
+            except (OSError, ValueError):
+                pass
+    return positions
+
+
+def rewind_streams(positions: List[Tuple[Any, int]]) -> None:
+    for stream, position in positions:
+        stream.seek(position)
@@ -0,0 +1,383 @@
+"""
+Sharded evaluation runner.
+
+Splits a prompt set across worker processes, each with its own pooled
+client, and merges their results into one JSON report::
+
+    python -m rippletide_client.run --agent-id AGENT --workers 8 --concurrency 16
+    python -m rippletide_client.run --agent-id AGENT --qanda cli/templates/customer_service/qanda.json
+"""
+import argparse
+import json
+import math
+import os
+import sys
+import time
+import uuid
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import requests
+
+from .batch import BatchResult, EvaluationItem, item_id, normalize_item
+from .client import RippletideClient
+from .concurrency import percentile
+from .journal import RunJournal
+from .results import DEFAULT_PASSING_LABELS
+
+# Per-process state set up by _init_worker
+_worker_client: Optional[RippletideClient] = None
+_worker_journal: Optional[RunJournal] = None
+
+
+def load_qanda(path: str) -> List[Dict[str, Any]]:
+    """
+    Load a qanda.json file, a list of ``{"question": ..., "answer": ...}`` entries.
+
+    Args:
+        path: Path to the file
+
+    Returns:
+        List of evaluation items
+
+    Raises:
+        ValueError: If the file is not a list of question entries
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    if not isinstance(data, list):
+        raise ValueError(f"{path} must contain a JSON list of question/answer entries")
+    for entry in data:
+        # Fail fast rather than in every worker
+        normalize_item(entry)
+    return data
+
+
+def to_record(
+    agent_id: str,
+    outcome: BatchResult,
+    passing_labels: Sequence[str] = DEFAULT_PASSING_LABELS
+) -> Dict[str, Any]:
+    """Flatten a BatchResult into a JSON-serialisable report row."""
+    question, expected_answer = normalize_item(outcome.item)
+    result = outcome.result
+    if result is not None and not isinstance(result, dict):
+        result = result.to_dict()
+    label = result.get('label') if result is not None else None
+    return {
+        'index': outcome.index,
+        'id': item_id(outcome.item),
+        'agent_id': agent_id,
+        'question': question,
+        'expected_answer': expected_answer,
+        'label': label,
+        'passed': outcome.ok and label in passing_labels,
+        'latency': outcome.latency,
+        'error': None if outcome.ok else f"{type(outcome.error).__name__}: {outcome.error}",
+        'result': result,
+    }
+
+
+def failed_record(agent_id: str, index: int, item: EvaluationItem, error: str) -> Dict[str, Any]:
+    """Report row for an item whose worker failed before evaluating it."""
+    question, expected_answer = normalize_item(item)
+    return {
+        'index': index,
+        'id': item_id(item),
+        'agent_id': agent_id,
+        'question': question,
+        'expected_answer': expected_answer,
+        'label': None,
+        'passed': False,
+        'latency': None,
+        'error': error,
+        'result': None,
+    }
+
+
+def build_report(agent_id: str, records: List[Dict[str, Any]], **extra) -> Dict[str, Any]:
+    """
+    Merge report rows into a run report.
+
+    Args:
+        agent_id: ID of the evaluated agent
+        records: Report rows, in any order
+        **extra: Additional top-level fields (workers, duration, ...)
+
+    Returns:
+        Report with totals, label counts, latency percentiles and rows sorted by index
+    """
+    records = sorted(records, key=lambda record: record['index'])
+    labels: Dict[str, int] = {}
+    for record in records:
+        if record['label'] is not None:
+            labels[record['label']] = labels.get(record['label'], 0) + 1
+    latencies = [record['latency'] for record in records if record['latency'] is not None]
+    total = len(records)
+    passed = sum(1 for record in records if record['passed'])
+    errors = sum(1 for record in records if record['error'] is not None)
+    return {
+        'agent_id': agent_id,
+        'total': total,
+        'passed': passed,
+        'failed': total - passed - errors,
+        'errors': errors,
+        'pass_rate': passed / total if total else None,
+        'labels': labels,
+        'latency': {
+            f'p{q}': percentile(latencies, q) if latencies else None for q in (50, 90, 95, 99)
+        },
+        **extra,
+        'results': records,
+    }
+
+
+def _init_worker(
+    api_key: Optional[str],
+    base_url: Optional[str],
+    session_id: Optional[str],
+    concurrency: int,
+    journal_dir: Optional[str]
+) -> None:
+    global _worker_client, _worker_journal
+    _worker_client = RippletideClient(
+        api_key=api_key, base_url=base_url, session_id=session_id, pool_maxsize=concurrency
+    )
+    if journal_dir is not None:
+        # One file per process so workers never interleave writes
+        _worker_journal = RunJournal(Path(journal_dir) / f'worker-{os.getpid()}.jsonl')
+
+
+def _evaluate_shard(
+    agent_id: str,
+    shard: List[Tuple[int, EvaluationItem]],
+    concurrency: int
+) -> List[Dict[str, Any]]:
+    indices = [index for index, _ in shard]
+    outcomes = _worker_client.evaluate_many(
+        agent_id,
+        [item for _, item in shard],
+        max_concurrency=concurrency,
+        raw=True,
+        journal=_worker_journal
+    )
+    records = []
+    for outcome in outcomes:
+        # Map the shard-local index back to the position in the full prompt set
+        records.append(to_record(agent_id, outcome._replace(index=indices[outcome.index])))
+    if _worker_journal is not None:
+        _worker_journal.sync()
+    return records
+
+
+def _journaled(journal_dir: Optional[str], agent_id: str, items: List[Tuple[int, EvaluationItem]]):
+    """Split items into report rows recovered from earlier runs' journals and items still to run."""
+    if journal_dir is None:
+        return [], items
+    journals = [RunJournal(path, fsync_interval=None) for path in sorted(Path(journal_dir).glob('*.jsonl'))]
+    done, todo = [], []
+    try:
+        for index, item in items:
+            prompt_id = item_id(item)
+            entry = next((e for e in (j.get(agent_id, prompt_id) for j in journals) if e is not None), None)
+            if entry is None:
+                todo.append((index, item))
+            else:
+                outcome = BatchResult(index, item, result=entry.result, latency=entry.latency)
+                done.append(to_record(agent_id, outcome))
+    finally:
+        for journal in journals:
+            journal.close()
+    return done, todo
+
+
+def run_sharded(
+    agent_id: str,
+    items: List[EvaluationItem],
+    workers: int = os.cpu_count() or 1,
+    concurrency: int = 10,
+    shard_size: Optional[int] = None,
+    api_key: Optional[str] = None,
+    base_url: Optional[str] = None,
+    session_id: Optional[str] = None,
+    journal_dir: Optional[str] = None,
+    max_shard_attempts: int = 2,
+    progress: bool = False
+) -> Dict[str, Any]:
+    """
+    Evaluate items across a pool of worker processes and merge the results.
+
+    Items are cut into shards that workers pick up as they free up. Each
+    worker runs one shard at a time, so when a shard fails or kills its
+    worker process only that shard is charged an attempt; the worker is
+    replaced and the shard is retried after the others, up to
+    ``max_shard_attempts`` times. After that its items are reported as
+    errors rather than failing the whole run.
+
+    Args:
+        agent_id: ID of the agent
+        items: Evaluation items (test prompt dicts, qanda entries, ...)
+        workers: Number of worker processes (default: CPU count)
+        concurrency: Evaluations in flight per worker (default: 10)
+        shard_size: Items per shard (default: about four shards per worker)
+        api_key: API key for the workers' clients
+        base_url: Base URL for the workers' clients
+        session_id: Session shared by the workers' clients when there is no
+            API key (default: a new random session)
+        journal_dir: Directory of run journals; completed items found there
+            are not re-evaluated, and workers journal new results into it
+        max_shard_attempts: Times a shard is run before its items are given up on (default: 2)
+        progress: Print shard progress to stderr
+
+    Returns:
+        Run report (see :func:`build_report`)
+    """
+    start = time.monotonic()
+    if journal_dir is not None:
+        Path(journal_dir).mkdir(parents=True, exist_ok=True)
+    records, todo = _journaled(journal_dir, agent_id, list(enumerate(items)))
+    resumed = len(records)
+
+    if shard_size is None:
+        shard_size = max(1, math.ceil(len(todo) / (workers * 4)))
+    shards = [todo[i:i + shard_size] for i in range(0, len(todo), shard_size)]
+    attempts = [0] * len(shards)
+    shard_errors: Dict[int, str] = {}
+    remaining = list(range(len(shards)))
+    if not api_key and session_id is None:
+        # Anonymous workers must share one session to see the same agents
+        session_id = str(uuid.uuid4())
+    initargs = (api_key, base_url, session_id, concurrency, journal_dir)
+
+    def new_worker() -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(max_workers=1, initializer=_init_worker, initargs=initargs)
+
+    while remaining:
+        retry = []
+        queue = iter(remaining)
+        # One single-process pool per worker, so a crash breaks only the shard it was running
+        pools = [new_worker() for _ in range(min(workers, len(remaining)))]
+        running: Dict[Future, Tuple[int, int]] = {}
+
+        def submit(slot: int) -> None:
+            for n in queue:
+                running[pools[slot].submit(_evaluate_shard, agent_id, shards[n], concurrency)] = (n, slot)
+                return
+
+        try:
+            for slot in range(len(pools)):
+                submit(slot)
+            while running:
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    n, slot = running.pop(future)
+                    attempts[n] += 1
+                    try:
+                        records.extend(future.result())
+                    except Exception as e:
+                        if isinstance(e, BrokenProcessPool):
+                            pools[slot].shutdown()
+                            pools[slot] = new_worker()
+                        shard_errors[n] = f"Worker failed: {type(e).__name__}: {e}"
+                        if progress:
+                            print(f"shard {n} failed (attempt {attempts[n]}): {e}", file=sys.stderr)
+                        if attempts[n] < max_shard_attempts:
+                            retry.append(n)
+                        else:
+                            records.extend(failed_record(agent_id, i, item, shard_errors[n]) for i, item in shards[n])
+                    else:
+                        shard_errors.pop(n, None)
+                        if progress:
+                            print(f"shard {n} done ({len(shards[n])} items)", file=sys.stderr)
+                    submit(slot)
+        finally:
+            for pool in pools:
+                pool.shutdown()
+        if retry and journal_dir is not None:
+            # Items the failed shards finished before dying were journaled
+            for n in retry:
+                done, shards[n] = _journaled(journal_dir, agent_id, shards[n])
+                records.extend(done)
+        remaining = [n for n in retry if shards[n]]
+
+    return build_report(
+        agent_id,
+        records,
+        workers=workers,
+        concurrency=concurrency,
+        shards=len(shards),
+        failed_shards=sorted(shard_errors),
+        resumed=resumed,
+        duration=time.monotonic() - start
+    )
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog='python -m rippletide_client.run',
+        description='Evaluate an agent against its test prompts across several worker processes.'
+    )
+    parser.add_argument('--agent-id', required=True, help='ID of the agent to evaluate')
+    parser.add_argument('--qanda', help='qanda.json file to evaluate instead of the agent\'s test prompts')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='worker processes (default: CPU count)')
+    parser.add_argument('--concurrency', type=int, default=10, help='evaluations in flight per worker (default: 10)')
+    parser.add_argument('--shard-size', type=int, help='items per shard (default: about four shards per worker)')
+    parser.add_argument('--journal', help='directory of run journals used to resume interrupted runs')
+    parser.add_argument('--output', '-o', help='write the JSON report here (default: stdout)')
+    parser.add_argument('--api-key', default=os.getenv('RIPPLETIDE_API_KEY'), help='API key (default: $RIPPLETIDE_API_KEY)')
+    parser.add_argument('--base-url', help='API base URL (default: $RIPPLETIDE_BASE_URL or the hosted backend)')
+    parser.add_argument('--session-id', help='anonymous session that owns the agent, when there is no API key')
+    parser.add_argument('--quiet', '-q', action='store_true', help='do not print progress')
+    args = parser.parse_args(argv)
+
+    if args.workers < 1 or args.concurrency < 1:
+        parser.error('--workers and --concurrency must be at least 1')
+
+    session_id = args.session_id
+    if args.qanda:
+        try:
+            items = load_qanda(args.qanda)
+        except (OSError, ValueError) as e:
+            parser.error(f"cannot read {args.qanda}: {e}")
+    else:
+        with RippletideClient(api_key=args.api_key, base_url=args.base_url, session_id=session_id) as client:
+            try:
+                items = client.get_test_prompts(args.agent_id, raw=True)
+            except requests.RequestException as e:
+                print(f"Cannot fetch test prompts for {args.agent_id}: {e}", file=sys.stderr)
+                return 1
+            session_id = client.session_id
+
+    report = run_sharded(
+        args.agent_id,
+        items,
+        workers=args.workers,
+        concurrency=args.concurrency,
+        shard_size=args.shard_size,
+        api_key=args.api_key,
+        base_url=args.base_url,
+        session_id=session_id,
+        journal_dir=args.journal,
+        progress=not args.quiet
+    )
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        sys.stdout.write('\n')
+    if not args.quiet:
+        rate = f"{report['pass_rate']:.1%}" if report['pass_rate'] is not None else 'n/a'
+        print(
+            f"Evaluated {report['total']} prompts with {args.workers} workers in {report['duration']:.1f}s: "
+            f"{report['passed']} passed ({rate}), {report['failed']} failed, {report['errors']} errors",
+            file=sys.stderr
+        )
+    return 1 if report['errors'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,263 @@
+"""
+Incremental decoding of streamed chat responses.
+"""
+import codecs
+import json
+from collections import deque
+from typing import Any, Callable, Deque, List, Optional
+
+# Fields that commonly carry the text of a streamed chunk, in priority order
+CHUNK_TEXT_FIELDS = ('delta', 'content', 'token', 'text', 'message', 'answer', 'response')
+
+
+def chunk_text(payload: Any) -> str:
+    """Extract the text of one chunk from a decoded JSON payload."""
+    if isinstance(payload, str):
+        return payload
+    if isinstance(payload, dict):
+        for field in CHUNK_TEXT_FIELDS:
+            value = payload.get(field)
+            if isinstance(value, str):
+                return value
+            if isinstance(value, dict):
+                # e.g. {"delta": {"content": "..."}}
+                return chunk_text(value)
+        return ''
+    return json.dumps(payload)
+
+
+class SSEParser:
+    """Incremental parser returning the data payload of each server-sent event."""
+
+    def __init__(self):
+        self._buffer = ''
+        self._data: List[str] = []
+
+    def feed(self, text: str) -> List[str]:
+        self._buffer += text
+        *lines, self._buffer = self._buffer.split('\n')
+        events = []
+        for line in lines:
+            line = line.rstrip('\r')
+            if not line:
+                if self._data:
+                    events.append('\n'.join(self._data))
+                    self._data = []
+                continue
+            if line.startswith(':'):
+                # Comment / keep-alive line
+                continue
+            field, _, value = line.partition(':')
+            if field == 'data':
+                self._data.append(value[1:] if value.startswith(' ') else value)
+        return events
+
+    def flush(self) -> List[str]:
+        events = self.feed('\n\n') if self._buffer or self._data else []
+        self._buffer = ''
+        return events
+
+
+class StreamDecoder:
+    """
+    Turns raw response bytes into text chunks.
+
+    ``text/event-stream`` bodies are parsed as server-sent events (stopping
+    at a ``[DONE]`` event), JSON bodies are buffered and yield a single chunk
+    once complete, and anything else is passed through as decoded text.
+
+    Args:
+        content_type: Content-Type header of the response
+    """
+
+    def __init__(self, content_type: Optional[str]):
+        content_type = (content_type or '').lower()
+        if 'text/event-stream' in content_type:
+            self.mode = 'sse'
+        elif 'json' in content_type:
+            self.mode = 'json'
+        else:
+            self.mode = 'text'
+        self.done = False
+        self._text = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        self._sse = SSEParser()
+        self._json_parts: List[bytes] = []
+
+    def feed(self, data: bytes) -> List[str]:
+        if self.done:
+            return []
+        if self.mode == 'json':
+            self._json_parts.append(data)
+            return []
+        text = self._text.decode(data)
+        if self.mode == 'text':
+            return [text] if text else []
+        return self._from_events(self._sse.feed(text))
+
+    def finish(self) -> List[str]:
+        if self.done:
+            return []
+        if self.mode == 'json':
+            self.done = True
+            body = b''.join(self._json_parts)
+            text = chunk_text(json.loads(body)) if body else ''
+            return [text] if text else []
+        text = self._text.decode(b'', final=True)
+        if self.mode == 'text':
+            self.done = True
+            return [text] if text else []
+        chunks = self._from_events(self._sse.feed(text) + self._sse.flush())
+        self.done = True
+        return chunks
+
+    def _from_events(self, events: List[str]) -> List[str]:
+        chunks = []
+        for data in events:
+            if data.strip() == '[DONE]':
+                self.done = True
+                break
+            try:
+                text = chunk_text(json.loads(data))
+            except ValueError:
+                text = data
+            if text:
+                chunks.append(text)
+        return chunks
+
+
+class ChatStream:
+    """
+    Iterator over the text chunks of a streamed chat response.
+
+    Closing the stream (explicitly, by leaving a ``with`` block, or when the
+    iterator is exhausted) closes the underlying connection, so breaking out
+    early stops the download.
+
+    Args:
+        response: Streaming ``requests.Response``
+        chunk_size: Bytes to read at a time, or None to yield data as it arrives (default: None)
+        on_close: Called once when the stream is closed, e.g. to free a rate limiter slot
+    """
+
+    def __init__(
+        self,
+        response,
+        chunk_size: Optional[int] = None,
+        on_close: Optional[Callable[[], None]] = None
+    ):
+        self.response = response
+        self._on_close = on_close
+        self._decoder = StreamDecoder(response.headers.get('Content-Type'))
+        self._raw = response.iter_content(chunk_size=chunk_size)
+        self._pending: Deque[str] = deque()
+        self.closed = False
+
+    def __iter__(self) -> "ChatStream":
+        return self
+
+    def __next__(self) -> str:
+        while not self._pending:
+            if self.closed or self._decoder.done:
+                self.close()
+                raise StopIteration
+            try:
+                data = next(self._raw)
+            except StopIteration:
+                self._pending.extend(self._decoder.finish())
+                self.close()
+                if not self._pending:
+                    raise
+                break
+            self._pending.extend(self._decoder.feed(data))
+        return self._pending.popleft()
+
+    def text(self) -> str:
+        """Consume the rest of the stream and return it as one string."""
+        return ''.join(self)
+
+    def close(self) -> None:
+        if not self.closed:
+            self.closed = True
+            self.response.close()
+            if self._on_close is not None:
+                self._on_close()
+
+    def __enter__(self) -> "ChatStream":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+
+class AsyncChatStream:
+    """
+    Async iterator over the text chunks of a streamed chat response.
+
+    The request is sent on first iteration (or on entering ``async with``).
+    Use ``async with`` or call :meth:`aclose` when stopping early, so the
+    connection is released immediately.
+
+    Args:
+        open_response: Coroutine function returning the streaming ``aiohttp.ClientResponse``
+        on_close: Called once when an opened stream is closed, e.g. to free a rate limiter slot
+    """
+
+    def __init__(self, open_response, on_close: Optional[Callable[[], None]] = None):
+        self._open_response = open_response
+        self._on_close = on_close
+        self.response = None
+        self._decoder: Optional[StreamDecoder] = None
+        self._pending: Deque[str] = deque()
+        self.closed = False
+
+    async def _start(self) -> None:
+        if self.response is None:
+            self.response = await self._open_response()
+            self._decoder = StreamDecoder(self.response.headers.get('Content-Type'))
+
+    def __aiter__(self) -> "AsyncChatStream":
+        return self
+
+    async def __anext__(self) -> str:
+        await self._start()
+        while not self._pending:
+            if self.closed or self._decoder.done:
+                await self.aclose()
+                raise StopAsyncIteration
+            data = await self.response.content.readany()
+            if not data:
+                self._pending.extend(self._decoder.finish())
+                # Fully read, so the connection can go back to the pool
+                self._finish(drop=False)
+                if not self._pending:
+                    raise StopAsyncIteration
+                break
+            self._pending.extend(self._decoder.feed(data))
+        return self._pending.popleft()
+
+    async def text(self) -> str:
+        """Consume the rest of the stream and return it as one string."""
+        return ''.join([chunk async for chunk in self])
+
+    async def aclose(self) -> None:
+        if not self.closed:
+            # Drop the connection rather than draining the rest of the body
+            self._finish(drop=True)
+
+    def _finish(self, drop: bool) -> None:
+        self.closed = True
+        if self.response is None:
+            return
+        if drop:
+            self.response.close()
+        else:
+            self.response.release()
+        if self._on_close is not None:
+            self._on_close()
+
+    async def __aenter__(self) -> "AsyncChatStream":
+        await self._start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.aclose()
@@ -0,0 +1,16 @@
+import pytest
+
+from rippletide_client.mock_server import MockRippletideServer
+from rippletide_client.retry import RetryPolicy
+
+
+@pytest.fixture
+def server():
+    with MockRippletideServer() as mock:
+        yield mock
+
+
+def fast_policy(**kwargs) -> RetryPolicy:
+    """Retry policy that does not sleep between attempts."""
+    kwargs.setdefault('max_retries', 5)
+    return RetryPolicy(backoff_factor=0, jitter=False, respect_retry_after=False, **kwargs)
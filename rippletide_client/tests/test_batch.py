@@ -0,0 +1,92 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from rippletide_client import AsyncRippletideClient, EvaluationReport, RippletideClient
+from rippletide_client.batch import item_id, normalize_item
+
+ITEMS = ['What is the price?', ('Where is it?', 'In Paris'), {'prompt': 'When?', 'expectedAnswer': 'Now'}]
+
+
+def test_items_are_normalized():
+    assert normalize_item('q?') == ('q?', None)
+    assert normalize_item(('q?', 'a')) == ('q?', 'a')
+    assert normalize_item({'question': 'q?', 'answer': 'a'}) == ('q?', 'a')
+    assert normalize_item({'prompt': 'q?', 'expectedAnswer': 'a'}) == ('q?', 'a')
+    with pytest.raises(ValueError):
+        normalize_item({'bad': 1})
+    assert item_id({'id': 7, 'prompt': 'q?'}) == '7'
+    assert item_id(('q?', 'a')) == item_id({'question': 'q?', 'answer': 'a'})
+
+
+def test_evaluate_many_yields_every_item(server):
+    with RippletideClient(api_key='key', base_url=server.url) as client:
+        results = sorted(client.evaluate_many('agent', ITEMS + [{'bad': 1}], max_concurrency=2))
+    assert [result.index for result in results] == [0, 1, 2, 3]
+    assert [result.item for result in results[:3]] == ITEMS
+    assert all(isinstance(result.result, EvaluationReport) and result.latency > 0 for result in results[:3])
+    # A bad item is reported without stopping the batch
+    assert isinstance(results[3].error, ValueError) and results[3].result is None
+    assert server.stats()['requests']['/api/agents/{id}/evaluate'] == 3
+
+
+def test_evaluate_many_bounds_calls_in_flight(server):
+    client = RippletideClient(api_key='key', base_url=server.url)
+    lock = threading.Lock()
+    in_flight = peak = 0
+
+    def evaluate(agent_id, question, expected_answer=None, raw=False):
+        nonlocal in_flight, peak
+        with lock:
+            in_flight += 1
+            peak = max(peak, in_flight)
+        time.sleep(0.01)
+        with lock:
+            in_flight -= 1
+        return {'label': 'correct'}
+
+    client.evaluate = evaluate
+    results = list(client.evaluate_many('agent', [f'q{i}?' for i in range(20)], max_concurrency=3, raw=True))
+    assert len(results) == 20 and all(result.ok for result in results)
+    assert peak == 3
+
+
+def test_evaluate_many_consumes_items_lazily(server):
+    consumed = []
+
+    def items():
+        for i in range(1000):
+            consumed.append(i)
+            yield f'q{i}?'
+
+    with RippletideClient(api_key='key', base_url=server.url) as client:
+        batch = client.evaluate_many('agent', items(), max_concurrency=4, raw=True)
+        next(batch)
+        batch.close()
+    assert len(consumed) < 20
+
+
+def test_async_evaluate_many_yields_every_item(server):
+    async def scenario():
+        async with AsyncRippletideClient(api_key='key', base_url=server.url) as client:
+            return [result async for result in client.evaluate_many('agent', ITEMS, max_concurrency=2, raw=True)]
+
+    results = sorted(asyncio.run(scenario()))
+    assert [result.index for result in results] == [0, 1, 2]
+    assert all(result.ok and result.result['label'] in ('correct', 'incorrect') for result in results)
+
+
+def test_invalid_arguments_are_rejected_before_iteration(tmp_path):
+    client = RippletideClient(api_key='key', base_url='http://127.0.0.1:9')
+    with pytest.raises(ValueError):
+        client.evaluate_many('agent', ['q?'], max_concurrency=0)
+    with pytest.raises(ValueError):
+        client.ingest_pdfs('agent', tmp_path, preprocess='shrink')
+
+    async_client = AsyncRippletideClient(api_key='key', base_url='http://127.0.0.1:9')
+    with pytest.raises(ValueError):
+        async_client.evaluate_many('agent', ['q?'], max_concurrency=0)
+    with pytest.raises(ValueError):
+        async_client.ingest_pdfs('agent', tmp_path, max_concurrency=0)
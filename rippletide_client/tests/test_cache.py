@@ -0,0 +1,98 @@
+import pytest
+
+from rippletide_client import EvaluationCache, EvaluationReport, PromptCache, RippletideClient
+
+EVALUATE = '/api/agents/{id}/evaluate'
+PROMPTS = '/api/agents/{id}/test-prompts'
+
+
+def test_cached_evaluation_skips_the_api(server, tmp_path):
+    cache = EvaluationCache(tmp_path / 'evaluations.sqlite3')
+    with RippletideClient(api_key='key', base_url=server.url, evaluation_cache=cache) as client:
+        first = client.evaluate('agent', 'What is the price?', '10 EUR', agent_version='v1')
+        second = client.evaluate('agent', 'What is the price?', '10 EUR', agent_version='v1')
+        raw = client.evaluate('agent', 'What is the price?', '10 EUR', agent_version='v1', raw=True)
+    assert isinstance(second, EvaluationReport) and second.to_dict() == first.to_dict()
+    assert raw == first.to_dict()
+    assert server.stats()['requests'][EVALUATE] == 1
+    assert (cache.hits, cache.misses) == (2, 1)
+
+
+def test_cache_persists_across_instances(server, tmp_path):
+    path = tmp_path / 'evaluations.sqlite3'
+    with RippletideClient(api_key='key', base_url=server.url, evaluation_cache=EvaluationCache(path)) as client:
+        client.evaluate('agent', 'What is the price?', agent_version='v1')
+    reopened = EvaluationCache(path)
+    assert len(reopened) == 1
+    with RippletideClient(api_key='key', base_url=server.url, evaluation_cache=reopened) as client:
+        client.evaluate('agent', 'What is the price?', agent_version='v1')
+    assert server.stats()['requests'][EVALUATE] == 1
+
+
+def test_changed_agent_version_misses(server, tmp_path):
+    cache = EvaluationCache(tmp_path / 'evaluations.sqlite3')
+    with RippletideClient(api_key='key', base_url=server.url, evaluation_cache=cache) as client:
+        client.evaluate('agent', 'What is the price?', agent_version='v1')
+        client.evaluate('agent', 'What is the price?', agent_version='v2')
+        # Without an explicit version the agent is fingerprinted, once per fingerprint_ttl
+        client.evaluate('agent', 'What is the price?')
+        client.evaluate('agent', 'What is the price?')
+    requests = server.stats()['requests']
+    assert requests[EVALUATE] == 3
+    assert requests['/api/agents/{id}'] == 1
+
+
+def test_expired_and_evicted_entries_are_dropped(tmp_path):
+    cache = EvaluationCache(tmp_path / 'evaluations.sqlite3', ttl=None, max_entries=10)
+    for i in range(11):
+        cache.set(str(i), {'label': 'correct'})
+    # Eviction keeps 10% headroom below the cap, oldest first
+    assert len(cache) == 9
+    assert cache.get('0') is None and cache.get('10') == {'label': 'correct'}
+
+    expired = EvaluationCache(tmp_path / 'expired.sqlite3', ttl=-1)
+    expired.set('key', {'label': 'correct'})
+    assert expired.get('key') is None and len(expired) == 0
+    with pytest.raises(ValueError):
+        EvaluationCache(tmp_path / 'invalid.sqlite3', max_entries=0)
+
+def test_fresh_prompts_are_served_without_a_request(server):
+    with RippletideClient(api_key='key', base_url=server.url, prompt_cache=PromptCache(ttl=60)) as client:
+        first = client.get_test_prompts('agent')
+        second = client.get_test_prompts('agent')
+    assert len(first) == len(second) == 20
+    assert server.stats()['requests'][PROMPTS] == 1
+
+
+def test_stale_prompts_are_revalidated(server):
+    cache = PromptCache(ttl=0)
+    with RippletideClient(api_key='key', base_url=server.url, prompt_cache=cache) as client:
+        first = client.get_test_prompts('agent', raw=True)
+        etag = cache.get('agent').etag
+        second = client.get_test_prompts('agent', raw=True)
+        assert second == first and cache.get('agent').etag == etag
+
+        client.send('POST', '/api/agents/agent/test-prompts', PROMPTS, json={'prompt': 'New?', 'expectedAnswer': 'Yes'})
+        third = client.get_test_prompts('agent', raw=True)
+    assert len(third) == 21 and cache.get('agent').etag != etag
+    # Three fetches (one answered with a 304) and the POST share the route
+    assert server.stats()['requests'][PROMPTS] == 4
+
+
+def test_raw_prompts_are_copied_from_the_cache(server):
+    with RippletideClient(api_key='key', base_url=server.url, prompt_cache=PromptCache()) as client:
+        client.get_test_prompts('agent', raw=True)[0]['prompt'] = 'changed'
+        assert client.get_test_prompts('agent', raw=True)[0]['prompt'] != 'changed'
+
+
+def test_least_recently_used_agent_is_dropped():
+    cache = PromptCache(max_agents=2)
+    cache.set('a', [], None)
+    cache.set('b', [], None)
+    cache.get('a')
+    cache.set('c', [], None)
+    assert cache.get('b') is None and cache.get('a') is not None
+    cache.invalidate()
+    assert cache.get('a') is None
+    with pytest.raises(ValueError):
+        PromptCache(max_agents=0)
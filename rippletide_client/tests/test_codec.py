@@ -0,0 +1,40 @@
+import pytest
+
+from rippletide_client import RippletideClient
+from rippletide_client.codec import JSONCodec, default_codec
+
+VALUE = {'question': 'Où est-il ?', 'facts': [{'id': 1, 'score': 0.5, 'label': None, 'ok': True}]}
+
+
+def codec(name):
+    try:
+        return default_codec(name)
+    except ImportError as e:
+        pytest.skip(str(e))
+
+
+@pytest.mark.parametrize('name', ['json', 'orjson', 'msgspec'])
+def test_codecs_round_trip(name):
+    json_codec = codec(name)
+    encoded = json_codec.dumps(VALUE)
+    assert isinstance(encoded, bytes)
+    assert json_codec.loads(encoded) == VALUE
+    assert json_codec.loads(encoded.decode('utf-8')) == VALUE
+    # Every codec reads what the others write
+    assert JSONCodec().loads(encoded) == VALUE
+    with pytest.raises(ValueError):
+        json_codec.loads(b'{"broken":')
+
+
+def test_default_codec():
+    assert default_codec().name in ('orjson', 'msgspec', 'json')
+    with pytest.raises(ValueError):
+        default_codec('yaml')
+
+
+@pytest.mark.parametrize('name', ['json', 'orjson', 'msgspec'])
+def test_client_uses_its_codec(server, name):
+    with RippletideClient(api_key='key', base_url=server.url, json_codec=codec(name)) as client:
+        report = client.evaluate('agent', VALUE['question'], 'Ici')
+        assert report.label in ('correct', 'incorrect')
+        assert client.chat('agent', VALUE['question']).message.endswith(VALUE['question'])
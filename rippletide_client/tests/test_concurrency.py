@@ -0,0 +1,86 @@
+import asyncio
+
+import aiohttp
+import pytest
+import requests
+
+from rippletide_client import AdaptiveConcurrencyLimiter, RippletideClient
+from rippletide_client.concurrency import is_overload_error
+
+
+def http_error(status):
+    response = requests.Response()
+    response.status_code = status
+    return requests.HTTPError(response=response)
+
+
+def test_only_capacity_errors_count_as_overload():
+    assert is_overload_error(http_error(429))
+    assert is_overload_error(http_error(503))
+    assert is_overload_error(requests.ConnectionError())
+    assert is_overload_error(requests.ReadTimeout())
+    assert is_overload_error(asyncio.TimeoutError())
+    assert is_overload_error(aiohttp.ServerDisconnectedError())
+    assert is_overload_error(aiohttp.ClientResponseError(None, (), status=502))
+
+    assert not is_overload_error(http_error(404))
+    assert not is_overload_error(aiohttp.ClientResponseError(None, (), status=400))
+    assert not is_overload_error(ValueError("Evaluation item has no 'question' or 'prompt'"))
+    assert not is_overload_error(KeyError('label'))
+
+
+def test_limit_grows_while_healthy_and_is_capped():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=4, max_limit=8)
+    for _ in range(200):
+        limiter.record(0.01)
+    assert limiter.limit == 8
+    assert limiter.stats()['increases'] == 4
+
+
+def test_overload_halves_the_limit_once_per_round():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=16, max_limit=16)
+    for _ in range(5):
+        limiter.record(0.01, http_error(503))
+    assert limiter.limit == 8
+    assert limiter.stats()['decreases'] == 1
+    # Once a round of `limit` completions has passed, the next overload counts again
+    for _ in range(3):
+        limiter.record(0.01, http_error(503))
+    assert limiter.limit == 8
+    limiter.record(0.01, http_error(503))
+    assert limiter.limit == 4
+
+
+def test_client_errors_and_bad_items_leave_the_limit_alone():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=8)
+    limiter.record(0.01, http_error(404))
+    limiter.record(0.01, ValueError('no question'))
+    assert limiter.limit == 8
+
+
+def test_latency_growth_backs_off_and_the_floor_holds():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=2, min_limit=2, max_limit=64)
+    for _ in range(AdaptiveConcurrencyLimiter.MIN_SAMPLES):
+        limiter.record(0.01)
+    grown = limiter.limit
+    for _ in range(100):
+        limiter.record(1.0)
+    assert limiter.stats()['decreases'] >= 1
+    assert 2 <= limiter.limit <= grown
+
+
+def test_evaluate_many_feeds_the_limiter(server):
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=2, max_limit=6)
+    with RippletideClient(api_key='key', base_url=server.url) as client:
+        results = list(client.evaluate_many('agent', [f'q{i}?' for i in range(60)], concurrency_limiter=limiter))
+    assert all(result.ok for result in results)
+    assert limiter.limit > 2
+
+
+def test_invalid_limits_are_rejected():
+    with pytest.raises(ValueError):
+        AdaptiveConcurrencyLimiter(initial_limit=0)
+    with pytest.raises(ValueError):
+        AdaptiveConcurrencyLimiter(initial_limit=8, max_limit=4)
+    with pytest.raises(ValueError):
+        AdaptiveConcurrencyLimiter(decrease_factor=1.5)
@@ -0,0 +1,135 @@
+import asyncio
+import threading
+import time
+
+import pytest
+import requests
+
+from rippletide_client import AsyncConversationPool, AsyncRippletideClient, ConversationPool, RippletideClient
+
+
+def watch(client):
+    """Wrap client.request to record the order of turns and how many overlap."""
+    request = client.request
+    lock = threading.Lock()
+    log = {'sent': [], 'in_flight': set(), 'peak': 0, 'overlaps': 0}
+
+    def record(json):
+        conversation = json['conversation_uuid']
+        with lock:
+            log['sent'].append((conversation, json['user_message']))
+            log['overlaps'] += conversation in log['in_flight']
+            log['in_flight'].add(conversation)
+            log['peak'] = max(log['peak'], len(log['in_flight']))
+
+    def done(json):
+        with lock:
+            log['in_flight'].discard(json['conversation_uuid'])
+
+    def watched(method, endpoint, route=None, **kwargs):
+        record(kwargs['json'])
+        try:
+            time.sleep(0.01)
+            return request(method, endpoint, route, **kwargs)
+        finally:
+            done(kwargs['json'])
+
+    client.request = watched
+    return log
+
+
+def test_turns_of_a_conversation_run_in_order(server):
+    client = RippletideClient(api_key='key', base_url=server.url)
+    log = watch(client)
+    with ConversationPool('agent', client, max_in_flight=2) as pool:
+        conversations = [pool.new_conversation() for _ in range(3)]
+        futures = [pool.send(f'turn {n}', conversation) for n in range(4) for conversation in conversations]
+        turns = [future.result() for future in futures]
+        assert pool.active == 0
+    assert log['peak'] == 2 and log['overlaps'] == 0
+    for conversation in conversations:
+        assert [message for c, message in log['sent'] if c == conversation] == [f'turn {n}' for n in range(4)]
+        mine = [turn for turn in turns if turn.conversation_id == conversation]
+        assert [turn.turn for turn in mine] == [0, 1, 2, 3]
+        assert mine[-1].answer == 'Mock answer to: turn 3' and mine[-1].queued > 0
+
+        stats = pool.stats(conversation)
+        assert (stats.turns, stats.errors, len(stats.latencies)) == (4, 0, 4)
+        assert stats.last == mine[-1].latency and stats.percentile(100) == max(stats.latencies)
+    summary = pool.summary(slowest=2)
+    assert (summary['conversations'], summary['turns'], summary['errors']) == (3, 12, 0)
+    assert len(summary['slowest']) == 2 and summary['p50'] is not None
+
+
+def test_failed_turns_are_counted(server):
+    client = RippletideClient(api_key='key', base_url=server.url)
+    with ConversationPool('agent', client) as pool:
+        conversation = pool.new_conversation()
+        failed = pool.send('', conversation)
+        turn = pool.chat('Hello', conversation)
+        with pytest.raises(requests.HTTPError):
+            failed.result()
+        assert turn.turn == 1
+        stats = pool.end_conversation(conversation)
+        assert (stats.turns, stats.errors) == (2, 1)
+        # An ended conversation starts again from turn 0
+        assert pool.chat('Hello again', conversation).turn == 0
+    with pytest.raises(RuntimeError):
+        pool.send('Too late')
+
+
+def test_close_without_waiting_cancels_queued_turns(server):
+    client = RippletideClient(api_key='key', base_url=server.url)
+    request = client.request
+    started, release = threading.Event(), threading.Event()
+
+    def blocked(*args, **kwargs):
+        started.set()
+        release.wait(5)
+        return request(*args, **kwargs)
+
+    client.request = blocked
+    pool = ConversationPool('agent', client)
+    conversation = pool.new_conversation()
+    first = pool.send('first', conversation)
+    second = pool.send('second', conversation)
+    assert started.wait(5)
+    pool.close(wait=False)
+    assert second.cancelled()
+    release.set()
+    assert first.result(5).answer == 'Mock answer to: first'
+
+
+def test_async_pool(server):
+    async def scenario():
+        async with AsyncRippletideClient(api_key='key', base_url=server.url) as client:
+            request = client.request
+            sent, in_flight, peak = [], set(), 0
+
+            async def watched(method, endpoint, route=None, **kwargs):
+                nonlocal peak
+                conversation = kwargs['json']['conversation_uuid']
+                assert conversation not in in_flight
+                sent.append((conversation, kwargs['json']['user_message']))
+                in_flight.add(conversation)
+                peak = max(peak, len(in_flight))
+                try:
+                    await asyncio.sleep(0.01)
+                    return await request(method, endpoint, route, **kwargs)
+                finally:
+                    in_flight.discard(conversation)
+
+            client.request = watched
+            pool = AsyncConversationPool('agent', client, max_in_flight=2)
+            conversations = [pool.new_conversation() for _ in range(3)]
+            turns = await asyncio.gather(*(
+                pool.chat(f'turn {n}', conversation) for n in range(3) for conversation in conversations
+            ))
+            assert pool.active == 0 and peak == 2
+            return conversations, turns, pool.summary(), sent
+
+    conversations, turns, summary, sent = asyncio.run(scenario())
+    for conversation in conversations:
+        assert [message for c, message in sent if c == conversation] == ['turn 0', 'turn 1', 'turn 2']
+        assert [turn.turn for turn in turns if turn.conversation_id == conversation] == [0, 1, 2]
+    assert (summary['conversations'], summary['turns']) == (3, 9)
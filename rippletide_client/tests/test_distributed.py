@@ -0,0 +1,146 @@
+import threading
+import time
+
+import pytest
+import requests
+
+from rippletide_client import RippletideClient
+from rippletide_client.distributed import TOKEN_HEADER, Coordinator, Worker
+from rippletide_client.mock_server import MockRippletideServer
+
+ITEMS = [{'question': f'question {i}?', 'answer': f'answer {i}'} for i in range(6)]
+
+
+def row(index, error=None):
+    return {
+        'index': index,
+        'id': f'id-{index}',
+        'label': None if error else 'correct',
+        'passed': not error,
+        'latency': 0.1,
+        'error': error,
+        'result': None if error else {'label': 'correct'},
+    }
+
+
+@pytest.fixture
+def coordinator():
+    with Coordinator('agent', ITEMS, port=0, lease_timeout=0.2, max_lease_items=4, linger=0) as coordinator:
+        yield coordinator
+
+
+def test_expired_lease_is_handed_out_again(coordinator):
+    first = coordinator.lease({'worker': 'a'})
+    assert [index for index, _ in first['items']] == [0, 1, 2, 3]
+    time.sleep(0.3)
+    # Expired items go back to the front of the queue
+    again = coordinator.lease({'worker': 'b'})
+    assert [index for index, _ in again['items']] == [0, 1, 2, 3]
+    assert coordinator.status()['expired_leases'] == 1
+    rest = coordinator.lease({'worker': 'c'})
+    assert [index for index, _ in rest['items']] == [4, 5]
+    assert coordinator.lease({'worker': 'd'})['items'] == []
+    assert coordinator.heartbeat({'lease_id': first['lease_id']}) == {'ok': False}
+
+
+def test_heartbeat_extends_a_lease(coordinator):
+    lease = coordinator.lease({'worker': 'a'})
+    for _ in range(4):
+        time.sleep(0.1)
+        assert coordinator.heartbeat({'lease_id': lease['lease_id']}) == {'ok': True}
+    assert coordinator.status()['expired_leases'] == 0
+    assert coordinator.heartbeat({'lease_id': 'unknown'}) == {'ok': False}
+
+
+def test_late_results_are_accepted_once(coordinator):
+    stale = coordinator.lease({'worker': 'a', 'max_items': 2})
+    time.sleep(0.3)
+    fresh = coordinator.lease({'worker': 'b', 'max_items': 2})
+    assert coordinator.complete({'lease_id': stale['lease_id'], 'results': [row(0)]}) == {'accepted': 1}
+    assert coordinator.complete({'lease_id': fresh['lease_id'], 'results': [row(0), row(1)]}) == {'accepted': 1}
+    assert coordinator.status()['completed'] == 2
+
+
+def test_errored_results_are_retried_up_to_max_attempts():
+    with Coordinator('agent', ITEMS[:1], port=0, max_attempts=2, linger=0) as coordinator:
+        lease = coordinator.lease({'worker': 'a'})
+        assert coordinator.complete({'lease_id': lease['lease_id'], 'results': [row(0, 'boom')]}) == {'accepted': 0}
+        lease = coordinator.lease({'worker': 'a'})
+        assert coordinator.complete({'lease_id': lease['lease_id'], 'results': [row(0, 'boom')]}) == {'accepted': 1}
+        assert coordinator.wait(1)
+        report = coordinator.report()
+    assert report['errors'] == 1
+    assert report['retried_errors'] == 1
+
+
+def test_token_is_required_off_loopback():
+    with pytest.raises(ValueError):
+        Coordinator('agent', ITEMS, host='0.0.0.0', port=0)
+
+
+def test_token_is_checked():
+    with Coordinator('agent', ITEMS, port=0, token='secret', linger=0) as coordinator:
+        assert requests.get(f'{coordinator.url}/status').status_code == 401
+        response = requests.get(f'{coordinator.url}/status', headers={TOKEN_HEADER: 'secret'})
+        assert response.json()['total'] == len(ITEMS)
+
+
+def test_malformed_requests_are_rejected():
+    with Coordinator('agent', ITEMS, port=0, linger=0) as coordinator:
+        def post(path, body):
+            return requests.post(f'{coordinator.url}{path}', json=body).status_code
+
+        assert post('/lease', ['not', 'an', 'object']) == 400
+        assert post('/lease', {'max_items': 'many'}) == 400
+        assert post('/heartbeat', {}) == 400
+        assert post('/complete', {'lease_id': 'x', 'results': {'index': 0}}) == 400
+        assert post('/complete', {'lease_id': 'x', 'results': [{'index': '0', 'id': 'id-0'}]}) == 400
+        assert post('/complete', {'lease_id': 'x', 'results': [{'index': 0, 'id': 'id-0', 'result': 'ok'}]}) == 400
+        assert post('/lease', {'worker': 'w', 'max_items': 2}) == 200
+        assert coordinator.status()['total'] == len(ITEMS)
+
+
+def test_workers_complete_a_run():
+    items = [{'question': f'question {i}?', 'answer': f'answer {i}'} for i in range(40)]
+    with MockRippletideServer() as server:
+        coordinator = Coordinator('agent', items, port=0, max_lease_items=5, linger=0.5)
+        workers = [
+            Worker(coordinator.url, RippletideClient(api_key='key', base_url=server.url), concurrency=2, name=f'w{n}')
+            for n in range(3)
+        ]
+        threads = [threading.Thread(target=worker.run) for worker in workers]
+        coordinator.start()
+        try:
+            for thread in threads:
+                thread.start()
+            assert coordinator.wait(30)
+            for thread in threads:
+                thread.join(30)
+        finally:
+            coordinator.stop()
+    report = coordinator.report()
+    assert report['total'] == 40
+    assert report['errors'] == 0
+    assert sum(worker.completed for worker in workers) == 40
+
+
+def test_anonymous_workers_join_the_coordinator_session():
+    items = [{'question': f'question {i}?', 'answer': f'answer {i}'} for i in range(10)]
+    with MockRippletideServer() as server:
+        server.add_agent('private', session_id='owner')
+        coordinator = Coordinator('private', items, port=0, linger=0.5, session_id='owner')
+        worker = Worker(coordinator.url, RippletideClient(base_url=server.url), concurrency=2)
+        thread = threading.Thread(target=worker.run)
+        coordinator.start()
+        try:
+            thread.start()
+            assert coordinator.wait(30)
+            thread.join(30)
+        finally:
+            coordinator.stop()
+        # Another session cannot see the agent at all
+        with pytest.raises(requests.HTTPError):
+            RippletideClient(base_url=server.url).get_test_prompts('private')
+    report = coordinator.report()
+    assert report['errors'] == 0
+    assert worker.client.session_id == 'owner'
@@ -0,0 +1,84 @@
+import asyncio
+import shutil
+import threading
+
+import pytest
+
+from rippletide_client import AsyncRippletideClient, IngestManifest, RippletideClient
+from rippletide_client.mock_server import BYTES_PER_QA_PAIR
+
+
+@pytest.fixture
+def pdfs(tmp_path):
+    folder = tmp_path / 'pdfs'
+    folder.mkdir()
+    (folder / 'a.pdf').write_bytes(b'%PDF' + bytes(BYTES_PER_QA_PAIR))
+    for name in ('b.pdf', 'c.pdf'):
+        shutil.copy(folder / 'a.pdf', folder / name)
+    (folder / 'd.pdf').write_bytes(b'%PDF' + bytes(2 * BYTES_PER_QA_PAIR))
+    return folder
+
+
+def test_manifest_skips_ingested_files(server, pdfs, tmp_path):
+    client = RippletideClient(api_key='key', base_url=server.url)
+    manifest = tmp_path / 'manifest.jsonl'
+    first = {result.path.name: result for result in client.ingest_pdfs('agent', pdfs, manifest=manifest)}
+    assert all(result.ok for result in first.values())
+    assert sum(not result.skipped for result in first.values()) == 2
+    # Copies are skipped with the response of the upload they duplicate
+    assert all(result.pairs_stored for result in first.values())
+
+    second = list(client.ingest_pdfs('agent', pdfs, manifest=manifest))
+    assert all(result.skipped for result in second)
+    assert server.stats()['requests']['/api/agents/{id}/upload-pdf'] == 2
+    with IngestManifest(manifest) as record:
+        assert len(record) == 2
+
+
+def test_duplicate_is_uploaded_when_the_first_copy_fails(server, pdfs, tmp_path):
+    client = RippletideClient(api_key='key', base_url=server.url)
+    upload = client._upload_pdf
+    lock = threading.Lock()
+    calls = []
+
+    def flaky_upload(agent_id, source, filename, *args):
+        with lock:
+            calls.append(filename)
+            fail = len(calls) == 1
+        if fail:
+            raise ConnectionError('upload failed')
+        return upload(agent_id, source, filename, *args)
+
+    client._upload_pdf = flaky_upload
+    (pdfs / 'd.pdf').unlink()
+    results = list(client.ingest_pdfs('agent', pdfs, manifest=tmp_path / 'manifest.jsonl', max_concurrency=3))
+    assert sum(not result.ok for result in results) == 1
+    assert sum(result.ok and not result.skipped for result in results) == 1
+    assert all(result.result for result in results if result.skipped)
+    assert len(calls) == 2
+
+
+def test_async_duplicate_is_uploaded_when_the_first_copy_fails(server, pdfs, tmp_path):
+    async def scenario():
+        async with AsyncRippletideClient(api_key='key', base_url=server.url) as client:
+            upload = client._upload_pdf
+            calls = []
+
+            async def flaky_upload(agent_id, source, filename, *args):
+                calls.append(filename)
+                if len(calls) == 1:
+                    raise ConnectionError('upload failed')
+                return await upload(agent_id, source, filename, *args)
+
+            client._upload_pdf = flaky_upload
+            results = [
+                result async for result in
+                client.ingest_pdfs('agent', pdfs, manifest=tmp_path / 'manifest.jsonl', max_concurrency=4)
+            ]
+            return results, calls
+
+    results, calls = asyncio.run(scenario())
+    assert sum(not result.ok for result in results) == 1
+    assert sum(result.ok and not result.skipped for result in results) == 2
+    assert all(result.result for result in results if result.skipped)
+    assert len(calls) == 3
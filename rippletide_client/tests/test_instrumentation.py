@@ -0,0 +1,103 @@
+import asyncio
+
+import pytest
+import requests
+
+from rippletide_client import AsyncRippletideClient, HistogramCollector, InstrumentationHook, RippletideClient
+from rippletide_client.instrumentation import Histogram
+from rippletide_client.mock_server import MockRippletideServer
+
+from .conftest import fast_policy
+
+PROMPTS = '/api/agents/{agent_id}/test-prompts'
+
+
+class Recorder(InstrumentationHook):
+    def __init__(self):
+        self.events = []
+
+    def on_request_start(self, info):
+        self.events.append(('start', info.route, info.retries))
+
+    def on_response(self, info):
+        self.events.append(('response', info.status, info.will_retry, info))
+
+    def on_error(self, info):
+        self.events.append(('error', type(info.error).__name__, info.will_retry, info))
+
+
+def test_histogram_quantiles():
+    histogram = Histogram((1.0, 2.0, 4.0))
+    assert histogram.quantile(0.5) is None
+    for value in (0.5, 1.5, 1.5, 3.0, 10.0):
+        histogram.observe(value)
+    assert histogram.counts == [1, 2, 1, 1]
+    assert histogram.quantile(0.2) == 1.0
+    assert histogram.quantile(0.5) == pytest.approx(1.75)
+    # Values past the last bound are reported as that bound
+    assert histogram.quantile(1.0) == 4.0
+
+
+def test_hooks_see_every_attempt():
+    recorder = Recorder()
+    with MockRippletideServer(error_rate=1.0) as server:
+        client = RippletideClient(
+            api_key='key', base_url=server.url, retry_policy=fast_policy(max_retries=1), hooks=[recorder]
+        )
+        with pytest.raises(requests.HTTPError):
+            client.get_test_prompts('agent')
+    starts = [event for event in recorder.events if event[0] == 'start']
+    assert starts == [('start', PROMPTS, 0), ('start', PROMPTS, 1)]
+    responses = [event for event in recorder.events if event[0] == 'response']
+    assert [will_retry for _, _, will_retry, _ in responses] == [True, False]
+    assert all(info.status >= 500 and info.timings['total'] > 0 for *_, info in responses)
+
+    recorder.events.clear()
+    # The server is gone, so attempts fail without a response
+    client = RippletideClient(
+        api_key='key', base_url=server.url, retry_policy=fast_policy(max_retries=1), hooks=[recorder]
+    )
+    with pytest.raises(requests.ConnectionError):
+        client.get_test_prompts('agent')
+    assert [event[:3] for event in recorder.events] == [
+        ('start', PROMPTS, 0), ('error', 'ConnectionError', True),
+        ('start', PROMPTS, 1), ('error', 'ConnectionError', False),
+    ]
+    assert recorder.events[-1][3].status is None
+
+
+def test_collector_groups_by_route(server):
+    collector = HistogramCollector()
+    with RippletideClient(api_key='key', base_url=server.url, hooks=[collector]) as client:
+        for n in range(3):
+            client.evaluate('agent', f'question {n}?')
+        client.get_test_prompts('agent')
+    rows = {row['route']: row for row in collector.summary()}
+    evaluate = rows['/api/agents/{agent_id}/evaluate']
+    assert evaluate['count'] == 3 and evaluate['statuses'] == {'200': 3}
+    assert evaluate['p50'] is not None and evaluate['retries'] == 0
+    assert {'server', 'transfer', 'decode'} <= set(evaluate['phases'])
+    assert rows[PROMPTS]['count'] == 1
+
+    metrics = collector.to_prometheus()
+    assert (
+        'rippletide_client_request_duration_seconds_count'
+        '{method="POST",route="/api/agents/{agent_id}/evaluate",status="200"} 3'
+    ) in metrics
+    assert 'rippletide_client_request_bytes_total{route="/api/agents/{agent_id}/evaluate",direction="out"}' in metrics
+    collector.reset()
+    assert collector.summary() == []
+
+
+def test_async_client_calls_hooks(server):
+    recorder = Recorder()
+
+    async def scenario():
+        async with AsyncRippletideClient(api_key='key', base_url=server.url, hooks=[recorder]) as client:
+            await client.evaluate('agent', 'question?')
+
+    asyncio.run(scenario())
+    assert [event[0] for event in recorder.events] == ['start', 'response']
+    info = recorder.events[-1][3]
+    assert info.status == 200 and info.bytes_out and info.bytes_in
+    assert info.timings['total'] >= info.timings['server']
@@ -0,0 +1,93 @@
+import asyncio
+import logging
+
+from rippletide_client import AsyncRippletideClient, IngestManifest, RippletideClient, RunJournal
+from rippletide_client.codec import default_codec
+from rippletide_client.journal import read_records
+
+
+def write_journal(path, count):
+    with RunJournal(path) as journal:
+        for i in range(count):
+            journal.record('agent', str(i), {'label': 'correct'}, latency=0.1)
+
+
+def test_journal_round_trip(tmp_path):
+    path = tmp_path / 'run.jsonl'
+    write_journal(path, 3)
+    with RunJournal(path) as journal:
+        assert len(journal) == 3
+        assert journal.get('agent', '1') == ({'label': 'correct'}, 0.1)
+        assert journal.get('agent', '9') is None
+
+
+def test_torn_final_line_is_truncated(tmp_path):
+    path = tmp_path / 'run.jsonl'
+    write_journal(path, 3)
+    complete = path.read_bytes()
+    with open(path, 'ab') as f:
+        f.write(b'{"agent":"agent","id":"3","res')
+    with RunJournal(path) as journal:
+        assert len(journal) == 3
+        journal.record('agent', '3', {'label': 'correct'})
+    assert path.read_bytes().startswith(complete)
+    with RunJournal(path) as journal:
+        assert len(journal) == 4
+
+
+def test_corrupted_interior_lines_are_skipped(tmp_path, caplog):
+    path = tmp_path / 'run.jsonl'
+    write_journal(path, 5)
+    lines = path.read_bytes().splitlines(keepends=True)
+    lines[1] = b'{"agent": "agent", "id"\n'
+    lines[3] = b'["not", "a", "record"]\n'
+    path.write_bytes(b''.join(lines))
+    with caplog.at_level(logging.WARNING, logger='rippletide_client.journal'):
+        with RunJournal(path) as journal:
+            assert len(journal) == 3
+            assert journal.get('agent', '4') is not None
+    assert len(caplog.records) == 2
+    # Bad lines are left in place rather than cut off with everything after them
+    assert len(path.read_bytes().splitlines()) == 5
+
+
+def test_records_missing_required_keys_are_skipped(tmp_path):
+    path = tmp_path / 'records.jsonl'
+    path.write_bytes(b'{"a": 1, "b": 2}\n{"a": 3}\n\n{"a": 4, "b": 5}\n')
+    codec = default_codec()
+    assert list(read_records(path, codec, ('a', 'b'))) == [{'a': 1, 'b': 2}, {'a': 4, 'b': 5}]
+    assert list(read_records(tmp_path / 'missing.jsonl', codec)) == []
+
+
+def test_manifest_torn_and_corrupted_lines(tmp_path):
+    path = tmp_path / 'ingested.jsonl'
+    with IngestManifest(path) as manifest:
+        manifest.record('agent', 'digest-1', 'a.pdf', 10, {'success': True})
+        manifest.record('agent', 'digest-2', 'b.pdf', 20)
+    path.write_bytes(b'garbage\n' + path.read_bytes() + b'{"agent":"agent","sha')
+    with IngestManifest(path) as manifest:
+        assert len(manifest) == 2
+        assert manifest.get('agent', 'digest-1').result == {'success': True}
+        assert manifest.get('agent', 'digest-2').size == 20
+        manifest.record('agent', 'digest-3', 'c.pdf', 30)
+    with IngestManifest(path) as manifest:
+        assert len(manifest) == 3
+
+
+def test_malformed_item_in_a_journaled_run_is_reported(server, tmp_path):
+    with RippletideClient(api_key='key', base_url=server.url) as client, \
+            RunJournal(tmp_path / 'run.jsonl') as journal:
+        results = sorted(client.evaluate_many('agent', ['q?', {'bad': 1}], journal=journal))
+    assert results[0].ok
+    assert isinstance(results[1].error, ValueError)
+
+
+def test_async_malformed_item_in_a_journaled_run_is_reported(server, tmp_path):
+    async def scenario():
+        async with AsyncRippletideClient(api_key='key', base_url=server.url) as client:
+            with RunJournal(tmp_path / 'run.jsonl') as journal:
+                return [result async for result in client.evaluate_many('agent', ['q?', {'bad': 1}], journal=journal)]
+
+    results = sorted(asyncio.run(scenario()))
+    assert results[0].ok
+    assert isinstance(results[1].error, ValueError)
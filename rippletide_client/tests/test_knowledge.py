@@ -0,0 +1,147 @@
+import pytest
+
+from rippletide_client import KnowledgeProvisioner, RippletideClient, sync_knowledge
+from rippletide_client.knowledge import DependencyFailed, TaskGraph
+
+AGENT = 'agent-1'
+KNOWLEDGE = {
+    'tags': [('pricing', 'Price questions'), {'name': 'shipping', 'description': 'Delivery questions'}],
+    'q_and_as': [
+        {'question': 'How much is it?', 'answer': '10 EUR', 'tags': ['pricing']},
+        {'question': 'When does it ship?', 'answer': 'Tomorrow', 'tags': ['shipping', 'pricing']},
+        {'question': 'Is there a warranty?', 'answer': 'Two years'},
+    ],
+    'guardrails': [{'type': 'must', 'instruction': 'Be polite'}, {'type': 'must-not', 'instruction': 'Swear'}],
+    'actions': [{'name': 'refund', 'description': 'Refund an order', 'what_to_do': 'Ask for the order number'}],
+    'state_predicate': {'transition_kind': 'branch', 'question_to_evaluate': 'Is the user a customer?'},
+}
+
+
+@pytest.fixture
+def provisioner(server):
+    with RippletideClient(api_key='key', base_url=server.url) as client:
+        yield KnowledgeProvisioner(client, max_workers=4)
+
+
+def provision(provisioner, knowledge=KNOWLEDGE):
+    return provisioner.provision(AGENT, **knowledge)
+
+
+def test_provision_creates_everything(server, provisioner):
+    progress = []
+    provisioner.progress = lambda stage, done, total: progress.append((stage, done, total))
+    report = provision(provisioner)
+    assert report.ok
+    assert report.created == {
+        'tag': 2, 'q_and_a': 3, 'q_and_a_tag': 3, 'guardrail': 2, 'action': 1, 'state_predicate': 0,
+    }
+    assert report.updated['state_predicate'] == 1
+    assert set(report.tag_ids) == {'pricing', 'shipping'} and len(report.q_and_a_ids) == 3
+    assert server.tags[report.tag_ids['shipping']]['description'] == 'Delivery questions'
+    links = {(server.q_and_as[q]['question'], server.tags[t]['name']) for q, t in server.q_and_a_tags}
+    assert links == {
+        ('How much is it?', 'pricing'), ('When does it ship?', 'shipping'), ('When does it ship?', 'pricing'),
+    }
+    assert server.state_predicates[AGENT] == KNOWLEDGE['state_predicate']
+    assert ('q_and_a_tag', 3, 3) in progress
+
+
+def test_provision_is_idempotent(server, provisioner):
+    provision(provisioner)
+    report = provision(provisioner)
+    assert report.ok and sum(report.created.values()) == 3
+    assert report.skipped == {
+        'tag': 2, 'q_and_a': 3, 'q_and_a_tag': 0, 'guardrail': 2, 'action': 1, 'state_predicate': 0,
+    }
+    # Links are resent to the same records rather than duplicated
+    assert report.created['q_and_a_tag'] == 3 and len(server.q_and_a_tags) == 3
+    assert (len(server.tags), len(server.q_and_as), len(server.guardrails), len(server.actions)) == (2, 3, 2, 1)
+
+
+def test_provision_keeps_going_after_a_failure(server, provisioner):
+    request = provisioner._request
+
+    def flaky_request(method, path, route=None, **kwargs):
+        if path == '/q-and-a' and kwargs['json']['question'] == 'When does it ship?':
+            raise ConnectionError('connection reset')
+        return request(method, path, route, **kwargs)
+
+    provisioner._request = flaky_request
+    report = provision(provisioner)
+    # The Q&A's links depend on it and are not attempted
+    assert sorted(stage for stage, _, _ in report.errors) == ['q_and_a', 'q_and_a_tag', 'q_and_a_tag']
+    assert isinstance(report.errors[-1][2], DependencyFailed)
+    assert report.created['q_and_a'] == 2 and report.created['q_and_a_tag'] == 1
+    with pytest.raises(ConnectionError):
+        provision(provisioner, dict(KNOWLEDGE, tags=[], raise_on_error=True))
+
+    # Running again fills in what failed
+    provisioner._request = request
+    assert provision(provisioner).ok
+    assert len(server.q_and_as) == 3 and len(server.q_and_a_tags) == 3
+
+    # Links to tags that neither exist nor are listed are skipped
+    unknown_tag = [{'question': 'Price?', 'answer': '10 EUR', 'tags': ['unknown']}]
+    report = provision(provisioner, dict(KNOWLEDGE, q_and_as=unknown_tag))
+    assert report.ok and report.skipped['q_and_a_tag'] == 1
+
+
+def test_task_graph_skips_dependents_of_failed_tasks():
+    graph = TaskGraph()
+    graph.add('a', lambda _: 1)
+    graph.add('b', lambda _: 1 / 0)
+    graph.add('c', lambda results: results['a'] + 1, ['a'])
+    graph.add('d', lambda results: results['b'], ['a', 'b'])
+    outcomes = {}
+    graph.run(2, lambda key, result, error: outcomes.__setitem__(key, (result, error)))
+    assert outcomes['c'] == (2, None)
+    assert isinstance(outcomes['b'][1], ZeroDivisionError)
+    assert isinstance(outcomes['d'][1], DependencyFailed)
+
+
+def test_plan_after_provisioning_only_rewrites_links_and_predicate(provisioner):
+    provision(provisioner)
+    plan = provisioner.plan_sync(AGENT, KNOWLEDGE)
+    # Neither can be read back from the API
+    assert plan.counts() == {'create': {'q_and_a_tag': 3}, 'update': {'state_predicate': 1}}
+    assert plan.unchanged == {
+        'tag': 2, 'q_and_a': 3, 'q_and_a_tag': 0, 'guardrail': 2, 'action': 1, 'state_predicate': 0,
+    }
+    assert not provisioner.plan_sync(AGENT, {}, prune=False)
+    assert len(provisioner.plan_sync(AGENT, {})) == 6
+
+
+def test_sync_updates_and_prunes(server, provisioner):
+    provision(provisioner)
+    # A duplicate left by an earlier run
+    provisioner._create('q_and_a', AGENT, {'question': 'How much is it?', 'answer': '10 EUR'})
+    desired = dict(
+        KNOWLEDGE,
+        q_and_as=[{'question': 'How much is it?', 'answer': '12 EUR', 'tags': ['pricing']}],
+        guardrails=KNOWLEDGE['guardrails'][:1] + [{'type': 'must', 'instruction': 'Be brief'}],
+        actions=[dict(KNOWLEDGE['actions'][0], what_to_do='Ask for the receipt')],
+    )
+    report = sync_knowledge(AGENT, desired, client=provisioner.client)
+    assert report.ok
+    assert report.plan.counts() == {
+        'update': {'q_and_a': 1, 'action': 1, 'state_predicate': 1},
+        'delete': {'q_and_a': 3, 'guardrail': 1},
+        'create': {'q_and_a_tag': 1, 'guardrail': 1},
+    }
+    assert [(qa['question'], qa['answer']) for qa in server.q_and_as.values()] == [('How much is it?', '12 EUR')]
+    assert sorted(g['instruction'] for g in server.guardrails.values()) == ['Be brief', 'Be polite']
+    assert [a['what_to_do'] for a in server.actions.values()] == ['Ask for the receipt']
+    # Tags are shared between agents and never pruned
+    assert len(server.tags) == 2
+
+
+def test_sync_without_prune_or_update(server, provisioner):
+    provision(provisioner)
+    desired = {'q_and_as': [{'question': 'How much is it?', 'answer': '12 EUR'}]}
+    report = provisioner.sync_knowledge(AGENT, desired, prune=False)
+    assert report.updated['q_and_a'] == 1 and sum(report.deleted.values()) == 0
+    assert len(server.q_and_as) == 3
+
+    plan = provisioner.plan_sync(AGENT, {'q_and_as': [{'question': 'How much is it?', 'answer': '9 EUR'}]},
+                                 update=False, prune=False)
+    assert not plan and plan.unchanged['q_and_a'] == 1
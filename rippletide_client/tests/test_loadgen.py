@@ -0,0 +1,95 @@
+import asyncio
+import json
+import random
+
+import pytest
+import requests
+
+from rippletide_client.loadgen import ConversationScripts, LoadProfile, error_kind, main, run_load
+
+
+def test_scripts_from_file(tmp_path):
+    path = tmp_path / 'qanda.json'
+    path.write_text(json.dumps([{'question': 'a?', 'answer': '1'}, {'prompt': 'b?'}, 'c?']))
+    scripts = ConversationScripts.from_file(path, turns=(2, 2))
+    assert scripts.questions == ['a?', 'b?', 'c?'] and scripts.mean_turns == 2
+    conversation = scripts.draw(random.Random(0))
+    assert len(conversation) == 2 and len(set(conversation)) == 2
+
+    path.write_text(json.dumps({'conversations': [['a?', {'question': 'b?'}], {'turns': ['c?']}]}))
+    scripts = ConversationScripts.from_file(path)
+    assert scripts.scripts == [['a?', 'b?'], ['c?']] and scripts.mean_turns == 1.5
+
+    for entries in ([['a?'], 'b?'], [{'answer': '1'}], []):
+        path.write_text(json.dumps(entries))
+        with pytest.raises(ValueError):
+            ConversationScripts.from_file(path)
+
+
+def test_profile_validation():
+    for kwargs in ({}, {'users': 1, 'rps': 1}, {'users': 0}, {'rps': -1}, {'users': 1, 'duration': 0}):
+        with pytest.raises(ValueError):
+            LoadProfile(**kwargs)
+    assert LoadProfile(rps=5, think_time='uniform:1,3').to_dict()['think_time'] == 'uniform:1.0,3.0'
+
+
+def test_error_kind():
+    response = requests.Response()
+    response.status_code = 503
+    assert error_kind(requests.HTTPError(response=response)) == '503'
+    assert error_kind(asyncio.TimeoutError()) == 'Timeout'
+    assert error_kind(ConnectionResetError()) == 'ConnectionResetError'
+
+
+def test_closed_model_run():
+    sent = []
+
+    async def send(conversation_id, message):
+        sent.append((conversation_id, message))
+        await asyncio.sleep(0.01)
+        if len(sent) % 5 == 0:
+            raise ConnectionResetError()
+
+    scripts = ConversationScripts(scripts=[['hello', 'price?', 'bye']])
+    profile = LoadProfile(users=4, duration=0.4, warmup=0.2, think_time='0', interval=0.1)
+    rows = []
+    report = asyncio.run(run_load(send, scripts, profile, progress=rows.append))
+    assert rows == report.timeline and len(rows) == 6
+    assert [row['warmup'] for row in rows] == [True, True, False, False, False, False]
+    # Every conversation plays its script in order
+    conversations = {}
+    for conversation_id, message in sent:
+        conversations.setdefault(conversation_id, []).append(message)
+    assert all(messages == ['hello', 'price?', 'bye'][:len(messages)] for messages in conversations.values())
+
+    summary = report.summary()
+    assert summary['requests'] > 0 and summary['errors'] == report.errors['ConnectionResetError']
+    assert summary['requests'] == len(report.latencies) + summary['errors']
+    assert report.histogram.count == len(report.latencies)
+    assert summary['p50'] >= 0.01 and max(row['active'] for row in rows) == 4
+    assert 'latency histogram' in report.format_text()
+
+
+def test_open_model_drops_arrivals_over_max_users():
+    async def send(conversation_id, message):
+        await asyncio.sleep(1)
+
+    scripts = ConversationScripts(['q?'], turns=(1, 1))
+    profile = LoadProfile(rps=100, duration=0.3, warmup=0, think_time='0', max_users=2, interval=0.1)
+    report = asyncio.run(run_load(send, scripts, profile))
+    assert report.errors['dropped'] > 0 and not report.latencies
+    assert max(row['active'] for row in report.timeline) == 2
+
+
+@pytest.mark.parametrize('target', ['chat', 'sdk-chat'])
+def test_main_against_the_mock(tmp_path, target):
+    output = tmp_path / 'run.json'
+    code = main([
+        '--mock', '--target', target, '--users', '3', '--duration', '0.4', '--warmup', '0.1',
+        '--interval', '0.1', '--think-time', '0', '--mock-latency', '0.01', '--quiet', '-o', str(output),
+    ])
+    report = json.loads(output.read_text())
+    assert code == 0
+    assert report['summary']['requests'] > 0 and report['summary']['errors'] == 0
+    assert report['profile']['users'] == 3 and len(report['timeline']) == 5
+    assert sum(bucket['count'] for bucket in report['histogram']) == report['summary']['requests']
@@ -0,0 +1,51 @@
+import pytest
+
+# Aliased so pytest does not try to collect it as a test class
+from rippletide_client import EvaluationReport, Fact, TestPrompt as Prompt
+
+REPORT = {
+    'label': 'correct',
+    'justification': None,
+    'facts': [{'fact': 'Costs 10 EUR', 'label': 'FactIsPresent'}],
+    'score': 0.9,
+}
+
+
+def test_report_round_trips():
+    report = EvaluationReport.from_dict(REPORT)
+    assert report.label == 'correct' and report.justification is None and report.extra == {'score': 0.9}
+    assert report.facts == (Fact(fact='Costs 10 EUR', label='FactIsPresent'),)
+    assert report.facts[0].label == 'FactIsPresent'
+    assert report.to_dict() == REPORT
+    assert report == REPORT and report == EvaluationReport.from_dict(dict(REPORT))
+
+
+def test_dict_access_by_wire_name():
+    report = EvaluationReport.from_dict({'label': 'incorrect', 'justification': None})
+    assert report['label'] == 'incorrect' and report.get('label') == 'incorrect'
+    # A null field is present, a missing one is not
+    assert report['justification'] is None and 'justification' in report
+    assert 'facts' not in report and report.get('facts', []) == []
+    with pytest.raises(KeyError):
+        report['facts']
+    assert list(report.keys()) == ['label', 'justification']
+
+    prompt = Prompt.from_dict({'id': 1, 'prompt': 'q?', 'expectedAnswer': 'a'})
+    assert prompt.expected_answer == prompt['expectedAnswer'] == 'a'
+    assert prompt.to_dict() == {'id': 1, 'prompt': 'q?', 'expectedAnswer': 'a'}
+
+
+def test_fields_set_after_loading_are_written():
+    report = EvaluationReport.from_dict({'label': 'correct'})
+    report.justification = 'Matches the expected answer'
+    assert report.to_dict() == {'label': 'correct', 'justification': 'Matches the expected answer'}
+    assert EvaluationReport(label='correct').to_dict() == {'label': 'correct'}
+    with pytest.raises(TypeError):
+        EvaluationReport(score=1)
+    with pytest.raises(AttributeError):
+        report.score = 1
+
+
+def test_labels_are_interned():
+    reports = EvaluationReport.from_list([{'label': ''.join(['cor', 'rect'])} for _ in range(2)])
+    assert reports[0].label is reports[1].label
@@ -0,0 +1,99 @@
+import asyncio
+import io
+import os
+
+import pytest
+
+from rippletide_client.multipart import MultipartEncoder
+
+
+def expected_body(boundary, fields):
+    body = b''
+    for name, value in fields:
+        body += f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"'.encode()
+        if isinstance(value, tuple):
+            filename, data, content_type = value
+            body += f'; filename="{filename}"\r\nContent-Type: {content_type}\r\n\r\n'.encode() + data + b'\r\n'
+        else:
+            body += b'\r\n\r\n' + value.encode() + b'\r\n'
+    return body + f'--{boundary}--\r\n'.encode()
+
+
+@pytest.fixture
+def pdf(tmp_path):
+    path = tmp_path / 'doc.pdf'
+    path.write_bytes(os.urandom(100_000))
+    return path
+
+
+@pytest.mark.parametrize('chunk_size', [1, 7, 4096, 1 << 20])
+@pytest.mark.parametrize('use_mmap', [True, False])
+def test_body_matches_form_encoding(pdf, chunk_size, use_mmap):
+    fields = [('name', 'report'), ('file', ('doc.pdf', pdf, 'application/pdf'))]
+    with MultipartEncoder(fields, boundary='b0undary', chunk_size=chunk_size, use_mmap=use_mmap) as encoder:
+        chunks = list(encoder)
+        body = expected_body('b0undary', [('name', 'report'), ('file', ('doc.pdf', pdf.read_bytes(), 'application/pdf'))])
+        assert b''.join(chunks) == body
+        assert encoder.len == len(body)
+        assert all(len(chunk) == chunk_size for chunk in chunks[:-1])
+        assert encoder.content_type == 'multipart/form-data; boundary=b0undary'
+
+
+def test_file_object_is_read_from_its_position(pdf):
+    with open(pdf, 'rb') as f:
+        f.seek(1000)
+        with MultipartEncoder([('file', ('doc.pdf', f, 'application/pdf'))], boundary='x') as encoder:
+            assert encoder.read_all() == expected_body('x', [('file', ('doc.pdf', pdf.read_bytes()[1000:], 'application/pdf'))])
+
+
+def test_seek_and_tell_allow_a_retry(pdf):
+    progress = []
+    encoder = MultipartEncoder(
+        [('file', ('doc.pdf', pdf, 'application/pdf'))],
+        chunk_size=4096,
+        progress=lambda sent, total: progress.append((sent, total))
+    )
+    with encoder:
+        first = encoder.read_all()
+        assert encoder.tell() == encoder.len
+        assert progress[-1] == (encoder.len, encoder.len)
+        encoder.seek(0)
+        assert encoder.read_all() == first
+        encoder.seek(-10, os.SEEK_END)
+        assert encoder.read_all() == first[-10:]
+
+
+def test_quotes_names():
+    with MultipartEncoder([('na"me', ('a\r\nb.pdf', io.BytesIO(b'x'), 'application/pdf'))], boundary='x') as encoder:
+        body = encoder.read_all()
+    assert b'name="na%22me"; filename="a%0D%0Ab.pdf"' in body
+
+
+def test_rejects_unseekable_files():
+    class Pipe(io.RawIOBase):
+        def readable(self):
+            return True
+
+    with pytest.raises(ValueError):
+        MultipartEncoder([('file', ('doc.pdf', Pipe(), 'application/pdf'))])
+    with pytest.raises(ValueError):
+        MultipartEncoder([], chunk_size=0)
+
+
+def test_truncated_file_is_an_error(tmp_path):
+    path = tmp_path / 'shrinking.pdf'
+    path.write_bytes(b'x' * 1000)
+    with MultipartEncoder([('file', ('doc.pdf', path, 'application/pdf'))], use_mmap=False) as encoder:
+        path.write_bytes(b'x' * 10)
+        with pytest.raises(IOError):
+            encoder.read_all()
+
+
+def test_async_iteration(pdf):
+    async def read(encoder):
+        return b''.join([chunk async for chunk in encoder.aiter()])
+
+    with MultipartEncoder([('file', ('doc.pdf', pdf, 'application/pdf'))], chunk_size=8192) as encoder:
+        body = asyncio.run(read(encoder))
+        encoder.seek(0)
+        assert body == encoder.read_all()
@@ -0,0 +1,105 @@
+import io
+import os
+
+import pytest
+
+from rippletide_client import RippletideClient, preprocess_pdf
+from rippletide_client.preprocess import FONT_FILE_KEYS, TEXT_PAGE_LINES, write_text_pdf
+
+pypdf = pytest.importorskip('pypdf')
+
+TEXT = 'Refunds take five days'
+
+
+def make_pdf(path, image_size=30000, font_size=20000):
+    """Write a one-page PDF with a line of text, an embedded font program and an image."""
+    image, font = os.urandom(image_size), os.urandom(font_size)
+    content = b'BT /F1 12 Tf 50 700 Td (%s) Tj ET q 100 0 0 100 50 500 cm /Im1 Do Q' % TEXT.encode()
+    objects = [
+        b'<< /Type /Catalog /Pages 2 0 R >>',
+        b'<< /Type /Pages /Kids [3 0 R] /Count 1 >>',
+        b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents 5 0 R '
+        b'/Resources << /Font << /F1 4 0 R >> /XObject << /Im1 6 0 R >> >> >>',
+        b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding /FontDescriptor 7 0 R >>',
+        b'<< /Length %d >>\nstream\n%s\nendstream' % (len(content), content),
+        b'<< /Type /XObject /Subtype /Image /Width 100 /Height 100 /ColorSpace /DeviceRGB '
+        b'/BitsPerComponent 8 /Length %d >>\nstream\n%s\nendstream' % (len(image), image),
+        b'<< /Type /FontDescriptor /FontName /Helvetica /Flags 32 /FontBBox [0 0 1000 1000] /ItalicAngle 0 '
+        b'/Ascent 700 /Descent -200 /CapHeight 700 /StemV 80 /FontFile 8 0 R >>',
+        b'<< /Length %d /Length1 %d /Length2 0 /Length3 0 >>\nstream\n%s\nendstream' % (len(font), len(font), font),
+    ]
+    data = bytearray(b'%PDF-1.4\n')
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(data))
+        data += b'%d 0 obj\n%s\nendobj\n' % (number, body)
+    xref = len(data)
+    data += b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1)
+    data += b''.join(b'%010d 00000 n \n' % offset for offset in offsets)
+    data += b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (len(objects) + 1, xref)
+    path.write_bytes(bytes(data))
+    return path
+
+
+@pytest.fixture
+def pdf(tmp_path):
+    return make_pdf(tmp_path / 'manual.pdf')
+
+
+def font_files(reader):
+    descriptor = reader.pages[0]['/Resources']['/Font']['/F1'].get_object()['/FontDescriptor'].get_object()
+    return [key for key in FONT_FILE_KEYS if key in descriptor]
+
+
+def test_strip_removes_images_and_fonts(pdf):
+    with preprocess_pdf(pdf) as copy:
+        assert (copy.name, copy.mode, copy.pages) == ('manual.pdf', 'strip', 1)
+        assert copy.original_size == pdf.stat().st_size and copy.size < 5000
+        assert copy.to_dict()['saved'] == copy.saved > 45000
+        reader = pypdf.PdfReader(copy.file)
+        assert reader.pages[0].extract_text() == TEXT
+        assert not reader.pages[0].images and not font_files(reader)
+
+    with preprocess_pdf(pdf, images=False, fonts=False) as copy:
+        reader = pypdf.PdfReader(copy.file)
+        assert len(reader.pages[0].images) == 1 and font_files(reader) == ['/FontFile']
+
+
+def test_text_mode(pdf):
+    with open(pdf, 'rb') as f:
+        with preprocess_pdf(f, mode='text') as copy:
+            assert (copy.name, copy.mode, copy.pages) == ('document.pdf', 'text', 1)
+            assert copy.ratio < 0.05
+            assert pypdf.PdfReader(copy.file).pages[0].extract_text().strip() == TEXT
+
+
+def test_long_text_continues_on_new_pages():
+    output = io.BytesIO()
+    lines = [f'Line {n} (with \\ escapes) café' for n in range(TEXT_PAGE_LINES + 1)]
+    assert write_text_pdf(['\n'.join(lines), ''], output) == 3
+    reader = pypdf.PdfReader(output)
+    assert len(reader.pages) == 3
+    assert reader.pages[0].extract_text().splitlines()[0] == lines[0]
+    assert reader.pages[1].extract_text().strip() == lines[-1]
+
+
+def test_invalid_input(pdf, tmp_path):
+    with pytest.raises(ValueError):
+        preprocess_pdf(pdf, mode='ocr')
+    broken = tmp_path / 'broken.pdf'
+    broken.write_bytes(b'not a pdf')
+    with pytest.raises(pypdf.errors.PdfReadError):
+        preprocess_pdf(broken)
+
+
+def test_upload_reports_preprocessing(server, pdf, tmp_path):
+    client = RippletideClient(api_key='key', base_url=server.url)
+    result = client.extract_questions_from_pdf('agent', pdf, preprocess='strip')
+    assert result['preprocessing']['used'] and result['preprocessing']['mode'] == 'strip'
+
+    # A copy that is not smaller is not uploaded
+    small = tmp_path / 'small.pdf'
+    with open(small, 'wb') as f:
+        write_text_pdf([TEXT], f)
+    result = client.extract_questions_from_pdf('agent', small, preprocess='text')
+    assert not result['preprocessing']['used']
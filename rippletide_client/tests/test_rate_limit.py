@@ -0,0 +1,174 @@
+import asyncio
+import threading
+import time
+
+import pytest
+import requests
+
+from rippletide_client import RateLimiter, RippletideClient
+from rippletide_client.mock_server import MockRippletideServer
+from rippletide_client.rate_limit import TokenBucket
+
+from .conftest import fast_policy
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.005)
+
+
+def test_bucket_allows_burst_then_paces():
+    bucket = TokenBucket(rate=10, burst=3)
+    assert [bucket.reserve() for _ in range(3)] == [0, 0, 0]
+    assert bucket.reserve() == pytest.approx(0.1, abs=0.02)
+    assert bucket.reserve() == pytest.approx(0.2, abs=0.02)
+    assert not bucket.try_take()
+
+
+def test_bucket_refills():
+    bucket = TokenBucket(rate=100, burst=1)
+    assert bucket.try_take()
+    assert not bucket.try_take()
+    time.sleep(0.02)
+    assert bucket.try_take()
+
+
+def test_bucket_pause():
+    bucket = TokenBucket(rate=10, burst=10)
+    bucket.pause(0.5)
+    assert bucket.reserve() == pytest.approx(0.6, abs=0.02)
+
+
+def test_invalid_limits():
+    with pytest.raises(ValueError):
+        TokenBucket(rate=0)
+    with pytest.raises(ValueError):
+        RateLimiter(max_in_flight=0)
+
+
+def test_throttle_pauses_the_route_bucket():
+    limiter = RateLimiter(requests_per_second=100, per_endpoint={'/chat': (10, 10)})
+    limiter.throttle('/chat', 1.0)
+    assert limiter.endpoint_buckets['/chat'].reserve() > 0.9
+    assert limiter.bucket.reserve() == 0
+
+
+def test_max_in_flight_across_threads():
+    limiter = RateLimiter(max_in_flight=3)
+    lock = threading.Lock()
+    active = peak = 0
+
+    def work():
+        nonlocal active, peak
+        for _ in range(20):
+            with limiter.limit('/route'):
+                with lock:
+                    active += 1
+                    peak = max(peak, active)
+                time.sleep(0.001)
+                with lock:
+                    active -= 1
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert peak == 3
+    assert limiter.in_flight == 0
+
+
+def test_slots_go_to_threads_and_tasks_in_arrival_order():
+    limiter = RateLimiter(max_in_flight=1)
+    limiter.acquire('/route')
+    order = []
+
+    def thread_waiter(name):
+        limiter.acquire('/route')
+        order.append(name)
+        limiter.release('/route')
+
+    async def task_waiter(name):
+        await limiter.acquire_async('/route')
+        order.append(name)
+        limiter.release('/route')
+
+    loop = asyncio.new_event_loop()
+    loop_thread = threading.Thread(target=loop.run_forever)
+    loop_thread.start()
+    try:
+        futures = []
+        threads = []
+        for n, kind in enumerate(['thread', 'task', 'thread', 'task', 'task', 'thread']):
+            name = f'{kind}-{n}'
+            if kind == 'thread':
+                threads.append(threading.Thread(target=thread_waiter, args=(name,)))
+                threads[-1].start()
+            else:
+                futures.append(asyncio.run_coroutine_threadsafe(task_waiter(name), loop))
+            wait_for(lambda: len(limiter._waiters) == n + 1)
+        limiter.release('/route')
+        for thread in threads:
+            thread.join(5)
+        for future in futures:
+            future.result(5)
+    finally:
+        loop.call_soon_threadsafe(loop.stop)
+        loop_thread.join()
+        loop.close()
+    assert order == ['thread-0', 'task-1', 'thread-2', 'task-3', 'task-4', 'thread-5']
+    assert limiter.in_flight == 0
+
+
+def test_cancelled_task_passes_its_slot_on():
+    async def scenario():
+        limiter = RateLimiter(max_in_flight=1)
+        await limiter.acquire_async('/route')
+        cancelled = asyncio.ensure_future(limiter.acquire_async('/route'))
+        waiting = asyncio.ensure_future(limiter.acquire_async('/route'))
+        await asyncio.sleep(0.01)
+        cancelled.cancel()
+        limiter.release('/route')
+        await asyncio.wait_for(waiting, 1)
+        assert limiter.in_flight == 1
+        limiter.release('/route')
+        assert limiter.in_flight == 0
+
+    asyncio.run(scenario())
+
+
+def test_client_respects_the_limiter():
+    limiter = RateLimiter(max_in_flight=2)
+    with MockRippletideServer(latency=0.02) as server:
+        client = RippletideClient(api_key='key', base_url=server.url, rate_limiter=limiter)
+        items = [f'question {i}?' for i in range(12)]
+        results = list(client.evaluate_many('agent', items, max_concurrency=6))
+    assert all(result.ok for result in results)
+    assert limiter.in_flight == 0
+
+
+def test_open_stream_holds_its_slot():
+    limiter = RateLimiter(max_in_flight=2)
+    with MockRippletideServer() as server:
+        client = RippletideClient(api_key='key', base_url=server.url, rate_limiter=limiter)
+        with client.chat_stream('agent', 'hello') as stream:
+            assert limiter.in_flight == 1
+            next(stream)
+        assert limiter.in_flight == 0
+        assert client.chat_stream('agent', 'hello').text()
+        assert limiter.in_flight == 0
+
+
+def test_429_throttles_shared_limiter():
+    limiter = RateLimiter(requests_per_second=1000, burst=1000)
+    with MockRippletideServer(rate_limit_rate=1.0, retry_after=0.2) as server:
+        client = RippletideClient(
+            api_key='key', base_url=server.url, rate_limiter=limiter, retry_policy=fast_policy(max_retries=1)
+        )
+        start = time.monotonic()
+        with pytest.raises(requests.HTTPError):
+            client.evaluate('agent', 'question?')
+    # The retry waited for the bucket pause even though the policy itself does not sleep
+    assert time.monotonic() - start >= 0.15
@@ -0,0 +1,90 @@
+import csv
+import math
+
+import pytest
+
+from rippletide_client import EvaluationResultSet, RippletideClient
+
+np = pytest.importorskip('numpy')
+
+
+@pytest.fixture
+def result_set():
+    results = EvaluationResultSet(capacity=2)
+    for i in range(10):
+        results.add(f'q{i % 5}', label='correct' if i < 6 else 'incorrect', latency=i / 10,
+                    tag='pricing' if i % 2 else 'shipping')
+    results.add('q?', error='ConnectionError: down', tag='pricing')
+    results.add('untagged?', label='correct')
+    return results
+
+
+def test_aggregates(result_set):
+    assert len(result_set) == 12
+    assert result_set.pass_rate() == pytest.approx(7 / 12)
+    assert result_set.pass_rate('shipping') == pytest.approx(3 / 5)
+    assert math.isnan(result_set.pass_rate('unknown'))
+    assert result_set.label_counts() == {'correct': 7, 'incorrect': 4, None: 1}
+    # Rows without a latency are ignored
+    assert result_set.percentiles([0, 50, 100]) == pytest.approx({0: 0.0, 50: 0.45, 100: 0.9})
+    assert result_set.percentiles([50], tag='pricing') == pytest.approx({50: 0.5})
+
+    breakdown = result_set.by_tag(q=[100])
+    assert breakdown['pricing'] == {
+        'count': 6, 'passed': 3, 'errors': 1, 'pass_rate': 0.5, 'latency': {100: pytest.approx(0.9)}
+    }
+    assert breakdown['shipping']['count'] == 5 and breakdown['shipping']['errors'] == 0
+    assert breakdown[None]['count'] == 1 and math.isnan(breakdown[None]['latency'][100])
+    assert result_set.row(-2) == {
+        'index': 10, 'tag': 'pricing', 'question': 'q?', 'label': None, 'passed': False,
+        'latency': None, 'justification': None, 'error': 'ConnectionError: down',
+    }
+    # Questions are stored once however often they repeat
+    assert len(result_set.strings) == 8
+
+
+def test_column_views_are_read_only(result_set):
+    with pytest.raises(ValueError):
+        result_set.latencies[0] = 1.0
+    assert result_set.passed.sum() == 7 and result_set.errors.sum() == 1
+
+
+def test_from_batch(server):
+    items = [{'prompt': f'q{i}', 'tag': 'even' if i % 2 == 0 else 'odd'} for i in range(6)] + [{'bad': 1}]
+    with RippletideClient(api_key='key', base_url=server.url) as client:
+        batch = list(client.evaluate_many('agent', items, max_concurrency=3))
+    result_set = EvaluationResultSet.from_batch(batch)
+    assert len(result_set) == 7
+    assert sorted(result_set.row(i)['index'] for i in range(7)) == list(range(7))
+    passed = sum(result.result is not None and result.result.label == 'correct' for result in batch)
+    assert result_set.passed.sum() == passed
+    assert result_set.by_tag()['even']['count'] == 3
+    assert result_set.by_tag()[None]['errors'] == 1
+
+    lenient = EvaluationResultSet.from_batch(batch, tag=lambda item: 'all', passing_labels={'correct', 'incorrect'})
+    assert lenient.pass_rate('all') == pytest.approx(6 / 7)
+
+
+def test_csv_export(result_set, tmp_path):
+    path = tmp_path / 'results.csv'
+    result_set.to_csv(path, chunk_size=5)
+    with open(path, newline='', encoding='utf-8') as f:
+        rows = list(csv.DictReader(f))
+    assert len(rows) == 12
+    assert rows[1] == {
+        'index': '1', 'tag': 'pricing', 'question': 'q1', 'label': 'correct', 'passed': '1',
+        'latency': '0.1', 'justification': '', 'error': '',
+    }
+    assert rows[10]['error'] == 'ConnectionError: down' and rows[10]['latency'] == ''
+
+
+def test_parquet_export(result_set, tmp_path):
+    parquet = pytest.importorskip('pyarrow.parquet')
+    path = tmp_path / 'results.parquet'
+    result_set.to_parquet(path)
+    table = parquet.read_table(str(path))
+    assert table.num_rows == 12
+    assert table.column('question').to_pylist()[:2] == ['q0', 'q1']
+    assert table.column('label').to_pylist()[10] is None
+    assert table.column('latency').to_pylist()[-1] is None
+    assert sum(table.column('passed').to_pylist()) == 7
@@ -0,0 +1,133 @@
+import asyncio
+import io
+from email.utils import formatdate
+
+import aiohttp
+import pytest
+import requests
+
+from rippletide_client import AsyncRippletideClient, RippletideClient
+from rippletide_client.mock_server import BYTES_PER_QA_PAIR, MockRippletideServer
+from rippletide_client.retry import RetryPolicy, rewind_streams, snapshot_streams
+
+from .conftest import fast_policy
+
+
+def test_post_is_only_retried_when_safe():
+    policy = RetryPolicy(max_retries=3)
+    assert policy.should_retry_status('GET', 503, 0)
+    assert not policy.should_retry_status('POST', 503, 0)
+    assert policy.should_retry_status('POST', 429, 0)
+    assert policy.should_retry_error('POST', 0, connect_failed=True)
+    assert not policy.should_retry_error('POST', 0, connect_failed=False)
+    assert RetryPolicy(retry_post=True).should_retry_status('POST', 503, 0)
+
+
+def test_retry_budget():
+    policy = RetryPolicy(max_retries=2)
+    assert policy.should_retry_status('GET', 500, 1)
+    assert not policy.should_retry_status('GET', 500, 2)
+    assert not policy.should_retry_error('GET', 2)
+    assert not policy.should_retry_status('GET', 404, 0)
+
+
+def test_backoff_is_capped_and_honours_retry_after():
+    policy = RetryPolicy(backoff_factor=1, max_backoff=5, jitter=False, max_retry_after=60)
+    assert policy.get_backoff(0) == 1
+    assert policy.get_backoff(10) == 5
+    assert policy.get_backoff(0, retry_after=30) == 30
+    assert policy.get_backoff(0, retry_after=600) == 60
+    assert 0 <= RetryPolicy(backoff_factor=1).get_backoff(3) <= 8
+
+
+def test_parse_retry_after():
+    assert RetryPolicy.parse_retry_after('2.5') == 2.5
+    assert RetryPolicy.parse_retry_after(None) is None
+    assert RetryPolicy.parse_retry_after('soon') is None
+    assert RetryPolicy.parse_retry_after(formatdate(0, usegmt=True)) == 0
+
+
+def test_rewind_streams():
+    data = io.BytesIO(b'0123456789')
+    data.seek(3)
+    upload = io.BytesIO(b'pdf')
+    kwargs = {'files': {'file': ('a.pdf', upload, 'application/pdf')}}
+    positions = snapshot_streams(kwargs) + snapshot_streams({'data': data})
+    data.read()
+    upload.read()
+    rewind_streams(positions)
+    assert data.tell() == 3
+    assert upload.tell() == 0
+
+
+def test_get_is_retried_until_it_succeeds():
+    retries = []
+    policy = fast_policy(max_retries=10, on_retry=lambda *args: retries.append(args))
+    with MockRippletideServer(error_rate=0.5, seed=1) as server:
+        client = RippletideClient(api_key='key', base_url=server.url, retry_policy=policy)
+        for _ in range(10):
+            assert len(client.get_test_prompts('agent')) == server.test_prompts
+        injected = server.stats()['injected']['errors']
+    assert injected > 0
+    assert len(retries) == injected
+    method, endpoint, attempt, delay, reason = retries[0]
+    assert (method, endpoint, attempt, delay) == ('GET', '/api/agents/agent/test-prompts', 1, 0)
+    assert reason in ('500', '502', '503')
+
+
+def test_post_is_not_retried_on_server_error():
+    with MockRippletideServer(error_rate=1.0) as server:
+        client = RippletideClient(api_key='key', base_url=server.url, retry_policy=fast_policy())
+        with pytest.raises(requests.HTTPError):
+            client.evaluate('agent', 'question?')
+        assert server.stats()['requests']['/api/agents/{id}/evaluate'] == 1
+
+
+def test_responses_and_errors_carry_the_retry_count():
+    with MockRippletideServer(error_rate=1.0) as server:
+        client = RippletideClient(api_key='key', base_url=server.url, retry_policy=fast_policy(max_retries=2))
+        with pytest.raises(requests.HTTPError) as raised:
+            client.get_test_prompts('agent')
+        assert raised.value.retry_count == 2
+    with MockRippletideServer() as server:
+        client = RippletideClient(api_key='key', base_url=server.url)
+        assert client.send('GET', '/api/agents/agent').retry_count == 0
+
+
+def test_async_responses_and_errors_carry_the_retry_count():
+    async def scenario(url, endpoint):
+        async with AsyncRippletideClient(api_key='key', base_url=url, retry_policy=fast_policy(max_retries=2)) as client:
+            response, _ = await client.send('GET', endpoint)
+            return response.retry_count
+
+    with MockRippletideServer(error_rate=1.0) as server:
+        with pytest.raises(aiohttp.ClientResponseError) as raised:
+            asyncio.run(scenario(server.url, '/api/agents/agent/test-prompts'))
+        assert raised.value.retry_count == 2
+    url = server.url
+    with pytest.raises(aiohttp.ClientConnectionError) as raised:
+        asyncio.run(scenario(url, '/api/agents/agent'))
+    assert raised.value.retry_count == 2
+    with MockRippletideServer() as server:
+        assert asyncio.run(scenario(server.url, '/api/agents/agent')) == 0
+
+
+def test_rate_limited_post_is_retried():
+    with MockRippletideServer(rate_limit_rate=0.5, seed=2) as server:
+        client = RippletideClient(api_key='key', base_url=server.url, retry_policy=fast_policy(max_retries=10))
+        for _ in range(10):
+            assert client.evaluate('agent', 'question?', raw=True)['label']
+        assert server.stats()['injected']['rate_limited'] > 0
+
+
+def test_upload_is_rewound_between_attempts(tmp_path):
+    pdf = tmp_path / 'doc.pdf'
+    pdf.write_bytes(b'%PDF' + bytes(4 * BYTES_PER_QA_PAIR))
+    policy = fast_policy(max_retries=10, retry_post=True)
+    with MockRippletideServer(error_rate=0.5, seed=3) as server, open(pdf, 'rb') as f:
+        client = RippletideClient(api_key='key', base_url=server.url, retry_policy=policy)
+        for source in (pdf, f):
+            result = client.extract_questions_from_pdf('agent', source)
+            # A body that was not rewound would arrive empty and be rejected
+            assert result['knowledge']['qaPairsStored'] == 4
+        assert server.stats()['injected']['errors'] > 0
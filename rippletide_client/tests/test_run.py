@@ -0,0 +1,60 @@
+import json
+
+import pytest
+
+from rippletide_client.run import build_report, load_qanda, main, run_sharded
+
+EVALUATE = '/api/agents/{id}/evaluate'
+
+
+def test_run_merges_every_shard(server, tmp_path):
+    output = tmp_path / 'report.json'
+    code = main([
+        '--agent-id', 'agent', '--workers', '2', '--concurrency', '3', '--shard-size', '3',
+        '--api-key', 'key', '--base-url', server.url, '--output', str(output), '--quiet',
+    ])
+    report = json.loads(output.read_text())
+    assert code == 0
+    assert report['total'] == 20 and report['shards'] == 7 and report['errors'] == 0
+    assert report['passed'] + report['failed'] == 20
+    assert report['passed'] == report['labels'].get('correct', 0)
+    assert [record['index'] for record in report['results']] == list(range(20))
+    assert report['latency']['p50'] is not None
+    assert server.stats()['requests'][EVALUATE] == 20
+
+
+def test_journal_resumes_finished_items(server, tmp_path):
+    items = [{'question': f'q{i}?', 'answer': 'yes'} for i in range(8)]
+    journal = str(tmp_path / 'journal')
+    first = run_sharded('agent', items[:5], workers=2, api_key='key', base_url=server.url, journal_dir=journal)
+    assert first['resumed'] == 0 and first['total'] == 5
+
+    second = run_sharded('agent', items, workers=2, api_key='key', base_url=server.url, journal_dir=journal)
+    assert second['resumed'] == 5 and second['total'] == 8
+    assert [record['question'] for record in second['results']] == [item['question'] for item in items]
+    assert server.stats()['requests'][EVALUATE] == 8
+
+
+def test_load_qanda(tmp_path):
+    path = tmp_path / 'qanda.json'
+    path.write_text(json.dumps([{'question': 'q?', 'answer': 'a'}]))
+    assert load_qanda(str(path)) == [{'question': 'q?', 'answer': 'a'}]
+    path.write_text(json.dumps([{'answer': 'a'}]))
+    with pytest.raises(ValueError):
+        load_qanda(str(path))
+    path.write_text(json.dumps({'question': 'q?'}))
+    with pytest.raises(ValueError):
+        load_qanda(str(path))
+
+
+def test_build_report_totals():
+    records = [
+        {'index': 2, 'label': None, 'passed': False, 'latency': None, 'error': 'Worker failed'},
+        {'index': 0, 'label': 'correct', 'passed': True, 'latency': 0.2, 'error': None},
+        {'index': 1, 'label': 'incorrect', 'passed': False, 'latency': 0.4, 'error': None},
+    ]
+    report = build_report('agent', records, workers=1)
+    assert (report['total'], report['passed'], report['failed'], report['errors']) == (3, 1, 1, 1)
+    assert report['labels'] == {'correct': 1, 'incorrect': 1} and report['workers'] == 1
+    assert [record['index'] for record in report['results']] == [0, 1, 2]
+    assert build_report('agent', [])['pass_rate'] is None
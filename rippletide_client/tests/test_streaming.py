@@ -0,0 +1,63 @@
+import asyncio
+
+from rippletide_client import AsyncRippletideClient, RateLimiter, RippletideClient
+from rippletide_client.streaming import StreamDecoder
+
+QUESTION = 'What is the price of the premium plan?'
+
+
+def test_decoder_handles_split_events_and_characters():
+    decoder = StreamDecoder('text/event-stream')
+    body = 'data: {"delta": "café "}\n\ndata: {"content": "ok"}\n\ndata: [DONE]\n\ndata: "ignored"\n\n'.encode()
+    chunks = []
+    for n in range(len(body)):
+        chunks.extend(decoder.feed(body[n:n + 1]))
+    assert chunks == ['café ', 'ok'] and decoder.done
+
+    decoder = StreamDecoder('application/json')
+    assert decoder.feed(b'{"message": "wh') == []
+    assert decoder.feed(b'ole"}') == [] and decoder.finish() == ['whole']
+
+
+def test_stream_chunks_join_into_the_answer(server):
+    with RippletideClient(api_key='key', base_url=server.url) as client:
+        answer = client.chat('agent', QUESTION).message
+        with client.chat_stream('agent', QUESTION) as stream:
+            chunks = list(stream)
+    assert len(chunks) > 1 and ''.join(chunks) == answer
+
+
+def test_closing_a_stream_frees_its_slot(server):
+    limiter = RateLimiter(max_in_flight=1)
+    with RippletideClient(api_key='key', base_url=server.url, rate_limiter=limiter) as client:
+        stream = client.chat_stream('agent', QUESTION)
+        assert limiter.in_flight == 1
+        next(stream)
+        stream.close()
+        stream.close()
+        assert limiter.in_flight == 0 and list(stream) == []
+        # The slot is free for the next request
+        assert client.chat_stream('agent', QUESTION).text()
+    assert limiter.in_flight == 0
+
+
+def test_async_stream(server):
+    async def scenario():
+        limiter = RateLimiter(max_in_flight=1)
+        async with AsyncRippletideClient(api_key='key', base_url=server.url, rate_limiter=limiter) as client:
+            answer = (await client.chat('agent', QUESTION)).message
+            stream = client.chat_stream('agent', QUESTION)
+            # Nothing is sent until iteration starts
+            assert limiter.in_flight == 0
+            chunks = [chunk async for chunk in stream]
+            assert limiter.in_flight == 0
+
+            async with client.chat_stream('agent', QUESTION) as early:
+                first = await early.__anext__()
+                assert limiter.in_flight == 1
+            assert limiter.in_flight == 0
+            return answer, chunks, first
+
+    answer, chunks, first = asyncio.run(scenario())
+    assert len(chunks) > 1 and ''.join(chunks) == answer
+    assert answer.startswith(first)
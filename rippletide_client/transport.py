@@ -0,0 +1,166 @@
+"""
+HTTP transport tuning for the synchronous Rippletide client.
+"""
+import socket
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import ConnectTimeoutError, NewConnectionError
+from urllib3.util.connection import _set_socket_options, allowed_gai_family
+
+# (level, option, value) triples understood by urllib3
+SocketOption = Tuple[int, int, int]
+
+# Per-thread dict that connections opened by the current request record their timings into
+_connection_timings = threading.local()
+
+
+@contextmanager
+def record_connection_timings(timings: Dict[str, float]) -> Iterator[None]:
+    """
+    Record the setup of any connection opened in this block into ``timings``.
+
+    A new connection adds 'dns', 'connect' and, for HTTPS, 'tls' (seconds);
+    a request served from a pooled connection adds nothing.
+    """
+    _connection_timings.current = timings
+    try:
+        yield
+    finally:
+        _connection_timings.current = None
+
+
+def keepalive_socket_options(idle: int = 60, interval: int = 15, count: int = 4) -> List[SocketOption]:
+    """
+    Socket options enabling TCP keep-alive on top of urllib3's defaults.
+
+    Idle pooled connections are probed so that NAT gateways and load
+    balancers do not silently drop them between requests. The per-platform
+    tuning options are only added where the OS exposes them.
+
+    Args:
+        idle: Seconds of inactivity before the first probe
+        interval: Seconds between probes
+        count: Failed probes before the connection is dropped
+
+    Returns:
+        List of socket options for ``HTTPConnection.socket_options``
+    """
+    options = list(HTTPConnection.default_socket_options)
+    options.append((socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1))
+    if hasattr(socket, 'TCP_KEEPIDLE'):
+        options.append((socket.IPPROTO_TCP, socket.TCP_KEEPIDLE, idle))
+    elif hasattr(socket, 'TCP_KEEPALIVE'):  # macOS
+        options.append((socket.IPPROTO_TCP, socket.TCP_KEEPALIVE, idle))
+    if hasattr(socket, 'TCP_KEEPINTVL'):
+        options.append((socket.IPPROTO_TCP, socket.TCP_KEEPINTVL, interval))
+    if hasattr(socket, 'TCP_KEEPCNT'):
+        options.append((socket.IPPROTO_TCP, socket.TCP_KEEPCNT, count))
+    return options
+
+
+class TimedHTTPConnection(HTTPConnection):
+    """``HTTPConnection`` that reports DNS and connect time to :func:`record_connection_timings`."""
+
+    def _new_conn(self):
+        timings = getattr(_connection_timings, 'current', None)
+        if timings is None:
+            return super()._new_conn()
+        start = time.perf_counter()
+        try:
+            addresses = socket.getaddrinfo(
+                self._dns_host.strip('[]'), self.port, allowed_gai_family(), socket.SOCK_STREAM
+            )
+        except (OSError, UnicodeError):
+            addresses = []
+        resolved = time.perf_counter()
+        try:
+            if not addresses:
+                # Let urllib3 resolve again and raise its usual error
+                return super()._new_conn()
+            return self._connect_any(addresses)
+        finally:
+            timings['dns'] = resolved - start
+            timings['connect'] = time.perf_counter() - resolved
+
+    def _connect_any(self, addresses: list) -> socket.socket:
+        """
+        Connect to the first reachable address, in resolver order.
+
+        This is what urllib3's ``create_connection`` does after resolving,
+        so e.g. an unreachable IPv6 address still falls back to IPv4.
+        """
+        error = None
+        for family, socktype, proto, _, address in addresses:
+            sock = socket.socket(family, socktype, proto)
+            try:
+                _set_socket_options(sock, self.socket_options)
+                if self.timeout is not socket._GLOBAL_DEFAULT_TIMEOUT:
+                    sock.settimeout(self.timeout)
+                if self.source_address:
+                    sock.bind(self.source_address)
+                sock.connect(address)
+                return sock
+            except OSError as e:
+                error = e
+                sock.close()
+        if isinstance(error, socket.timeout):
+            raise ConnectTimeoutError(
+                self, f"Connection to {self.host} timed out. (connect timeout={self.timeout})"
+            )
+        raise NewConnectionError(self, f"Failed to establish a new connection: {error}")
+
+
+class TimedHTTPSConnection(TimedHTTPConnection, HTTPSConnection):
+    """``HTTPSConnection`` that also reports the TLS handshake time."""
+
+    def connect(self):
+        timings = getattr(_connection_timings, 'current', None)
+        start = time.perf_counter()
+        super().connect()
+        if timings is not None:
+            timings['tls'] = max(
+                0.0, time.perf_counter() - start - timings.get('dns', 0.0) - timings.get('connect', 0.0)
+            )
+
+
+class TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+
+class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+
+class PooledHTTPAdapter(HTTPAdapter):
+    """
+    ``HTTPAdapter`` that forwards custom socket options to its pool manager.
+
+    Its connections report their DNS, connect and TLS times while
+    :func:`record_connection_timings` is active.
+
+    Args:
+        socket_options: Socket options applied to every new connection
+        **kwargs: Passed through to ``HTTPAdapter`` (pool_connections, pool_maxsize, pool_block, ...)
+    """
+
+    __attrs__ = HTTPAdapter.__attrs__ + ['socket_options']
+
+    def __init__(self, socket_options: Optional[List[SocketOption]] = None, **kwargs):
+        # Must be set before HTTPAdapter.__init__, which builds the pool manager
+        self.socket_options = socket_options
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        if self.socket_options is not None:
+            kwargs['socket_options'] = self.socket_options
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': TimedHTTPConnectionPool,
+            'https': TimedHTTPSConnectionPool,
+        }